@@ -32,7 +32,6 @@ setup(name='terminus',
           'Pillow',
           'PyYAML',
           'mock',
-          'python-slugify',
-          'sortedcontainers'
+          'python-slugify'
       ],
       zip_safe=False)
@@ -17,3 +17,4 @@ limitations under the License.
 from builders.osm_city_builder import *
 from builders.procedural_city_builder import *
 from builders.simple_city_builder import *
+from builders.tiled_osm_city_builder import *
@@ -0,0 +1,128 @@
+"""
+Copyright (C) 2017 Open Source Robotics Foundation
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import bz2
+import struct
+import zlib
+import xml.etree.ElementTree as ET
+
+from geometry.latlon import LatLon
+
+
+def read_osm_bounds(osm_map):
+    """
+    Answer the (origin, corner) LatLon pair of the bounds of the given OSM
+    map, which can be an XML file (optionally bz2 compressed) or a PBF one.
+    Only the head of the file is read. Raises ValueError if there are no
+    bounds
+    """
+    if osm_map.endswith('.pbf'):
+        return _read_pbf_bounds(osm_map)
+    return _read_xml_bounds(osm_map)
+
+
+def _read_xml_bounds(osm_map):
+    # The file is streamed and the scan stops as soon as the `<bounds>`
+    # element is found, which is usually right at the head of the file.
+    # Elements seen before it are discarded, so memory use doesn't grow with
+    # the size of the file
+    if osm_map.endswith('.bz2'):
+        osm_file = bz2.BZ2File(osm_map, 'rb')
+    else:
+        osm_file = open(osm_map, 'rb')
+    with osm_file:
+        root = None
+        for event, element in ET.iterparse(osm_file, events=('start', 'end')):
+            if root is None:
+                root = element
+            if event == 'start' and element.tag == 'bounds':
+                bounds = element.attrib
+                return (LatLon(float(bounds['minlat']), float(bounds['minlon'])),
+                        LatLon(float(bounds['maxlat']), float(bounds['maxlon'])))
+            if event == 'end' and element is not root:
+                # Drop whatever was parsed so far
+                root.clear()
+    raise ValueError("No bounds found in OSM map {0}".format(osm_map))
+
+
+def _read_pbf_bounds(osm_map):
+    # A PBF file starts with an OSMHeader blob, whose HeaderBlock has the
+    # bounding box in nanodegrees. See
+    # http://wiki.openstreetmap.org/wiki/PBF_Format
+    with open(osm_map, 'rb') as osm_file:
+        header_size_data = osm_file.read(4)
+        if len(header_size_data) < 4:
+            raise ValueError("Empty PBF OSM map {0}".format(osm_map))
+        header_size = struct.unpack('>I', header_size_data)[0]
+        blob_header = dict(_protobuf_fields(osm_file.read(header_size)))
+        if blob_header.get(1) != 'OSMHeader':
+            raise ValueError("PBF OSM map {0} doesn't start with a header".format(osm_map))
+        blob = dict(_protobuf_fields(osm_file.read(blob_header[3])))
+    if 1 in blob:
+        header_block = blob[1]
+    elif 3 in blob:
+        header_block = zlib.decompress(blob[3])
+    else:
+        raise ValueError("Unsupported PBF compression in OSM map {0}".format(osm_map))
+    header_fields = dict(_protobuf_fields(header_block))
+    if 1 not in header_fields:
+        raise ValueError("No bounds found in OSM map {0}".format(osm_map))
+    bbox = dict((field, _zigzag_decoded(value)) for field, value in _protobuf_fields(header_fields[1]))
+    left, right, top, bottom = map(lambda field: bbox.get(field, 0) * 1e-9, [1, 2, 3, 4])
+    return (LatLon(bottom, left), LatLon(top, right))
+
+
+def _protobuf_fields(data):
+    """
+    Iterate the (field number, value) pairs of an encoded protocol buffers
+    message. Varints are answered as (unsigned) integers, length delimited
+    fields as strings and fixed size ones as raw strings
+    """
+    position = 0
+    while position < len(data):
+        key, position = _read_varint(data, position)
+        field, wire_type = key >> 3, key & 7
+        if wire_type == 0:
+            value, position = _read_varint(data, position)
+        elif wire_type == 2:
+            length, position = _read_varint(data, position)
+            value = data[position:position + length]
+            position += length
+        elif wire_type == 1:
+            value = data[position:position + 8]
+            position += 8
+        elif wire_type == 5:
+            value = data[position:position + 4]
+            position += 4
+        else:
+            raise ValueError("Unsupported protocol buffers wire type {0}".format(wire_type))
+        yield field, value
+
+
+def _read_varint(data, position):
+    value = 0
+    shift = 0
+    while True:
+        byte = ord(data[position])
+        position += 1
+        value |= (byte & 0x7f) << shift
+        if not byte & 0x80:
+            return value, position
+        shift += 7
+
+
+def _zigzag_decoded(value):
+    return (value >> 1) ^ -(value & 1)
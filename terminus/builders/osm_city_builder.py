@@ -31,8 +31,9 @@ from models.ground_plane import GroundPlane
 from models.road import *
 
 from builders.abstract_city_builder import AbstractCityBuilder
-
-import xml.etree.ElementTree as ET
+from builders.osm_bounds import read_osm_bounds
+from builders.osm_node_store import OsmNodeStore
+from builders.osm_way_store import OsmWayFilter, OsmWayStore
 
 import logging
 logging.basicConfig(level=logging.INFO)
@@ -40,17 +41,29 @@ logger = logging.getLogger(__name__)
 
 
 class OsmCityBuilder(AbstractCityBuilder):
-    def __init__(self, osm_map):
+    def __init__(self, osm_map, nodes_directory=None, way_filter=None,
+                 concurrency=None):
+        # The map can be an XML (.osm or .osm.bz2) or a PBF (.osm.pbf) file
         self.osm_map = osm_map
-        self.osm_coords = {}
-        self.osm_nodes = {}
-        self.osm_ways = {}
+        # Number of processes decoding the map blocks (all the available
+        # cores by default). Ways and coords are sorted by id once parsed,
+        # so the result doesn't depend on the order blocks are decoded
+        self.concurrency = concurrency
+        # If given, the node coordinates are memory-mapped from files in it
+        self.nodes_directory = nodes_directory
+        self.osm_coords = None
+        self.osm_ways = None
         self.bounds = {}
         self.map_origin = None
-        self.nodes = {}
+        self.projector = None
         self.road_types = ['motorway', 'trunk', 'primary', 'secondary',
                            'tertiary', 'unclassified', 'residential',
                            'living_street']
+        # Only the ways selected by the filter (by default, the roads) are
+        # kept while parsing, along with the tags we use
+        if way_filter is None:
+            way_filter = OsmWayFilter('highway', self.road_types, ['oneway'])
+        self.way_filter = way_filter
 
     def required_licence(self):
         return textwrap.dedent("""
@@ -64,15 +77,13 @@ class OsmCityBuilder(AbstractCityBuilder):
     def _buid_city(self):
         city = City()
 
-        # Get origin of the map (we use the center)
-        tree = ET.parse(self.osm_map)
-        bounds = tree.find('bounds').attrib
-        self.bounds = {'origin': LatLon(float(bounds['minlat']),
-                                        float(bounds['minlon'])),
-                       'corner': LatLon(float(bounds['maxlat']),
-                                        float(bounds['maxlon']))}
+        # Get origin of the map (we use the center). Only the head of the
+        # file is read, the whole map is parsed once below
+        origin, corner = read_osm_bounds(self.osm_map)
+        self.bounds = {'origin': origin, 'corner': corner}
 
         self.map_origin = self.bounds['origin'].midpoint(self.bounds['corner'])
+        self.projector = self.map_origin.enu_projector()
 
         logger.debug("Map Origin: {0}".format(self.map_origin))
 
@@ -87,10 +98,20 @@ class OsmCityBuilder(AbstractCityBuilder):
         logger.debug("Bounding box from {0} to {1}".format(self.bounds['origin'],
                                                            self.bounds['corner']))
 
-        # Parse OSM map
-        self.parser = OSMParser(coords_callback=self._get_coords,
-                                ways_callback=self._get_ways)
+        # Parse OSM map in two passes: the first one finds the roads, so the
+        # second one only keeps the coordinates of the nodes they go through
+        self.osm_ways = OsmWayStore(self.way_filter)
+        self.parser = OSMParser(concurrency=self.concurrency,
+                                ways_callback=self.osm_ways.add_ways,
+                                ways_tag_filter=self.way_filter.filter_tags)
+        self.parser.parse(self.osm_map)
+        self.osm_ways.freeze()
+
+        self.osm_coords = OsmNodeStore(self.projector, self.osm_ways.node_ids(), self.nodes_directory)
+        self.parser = OSMParser(concurrency=self.concurrency,
+                                coords_callback=self.osm_coords.add_coords)
         self.parser.parse(self.osm_map)
+        self.osm_coords.freeze()
 
         logger.debug("Number of ways: {}".format(len(self.osm_ways)))
         logger.debug("Number of coords: {}".format(len(self.osm_coords)))
@@ -100,42 +121,19 @@ class OsmCityBuilder(AbstractCityBuilder):
                                               self.bounds['size'].y),
                                           Point(0, 0, 0)))
 
+        self._populate_city(city)
+
+        return city
+
+    def _populate_city(self, city):
         self._create_roads(city)
         self._create_intersections(city)
         # self._create_buildings(city)
 
         city.trim_roads()
 
-        return city
-
-    def _get_ways(self, ways):
-        ''' OSM parser callback for the ways '''
-        # osmid: OSM id for the way/street
-        # tags: tag dictionary with various information about the way (name, type, etc)
-        # refs: nodes that are part of the way/street
-        for osmid, tags, refs in ways:
-            self.osm_ways[osmid] = {'tags': tags, 'refs': refs}
-            if 'highway' in tags and tags['highway'] in self.road_types:
-                for ref in refs:
-                    if ref not in self.nodes:
-                        self.nodes[ref] = set()
-                    self.nodes[ref].add(osmid)
-
-    def _get_coords(self, coords):
-        ''' OSM parser callback for the coords '''
-        # osmid: OSM id for the node
-        # lat, lon: latitude and longitude of the node
-        for osmid, lon, lat in coords:
-            lat_lon = LatLon(lat, lon)
-            self.osm_coords[osmid] = {
-                'lat_lon': lat_lon,
-                'point': self._translate_coords(lat_lon)
-            }
-
-    def _create_road_geometry(self, id, record):
-        points = []
-        for ref in record['refs']:
-            points.append(self.osm_coords[ref]['point'])
+    def _create_road_geometry(self, id, refs):
+        points = self.osm_coords.points_for(refs)
 
         geometry = Path.polyline_from_points(points)
 
@@ -147,10 +145,11 @@ class OsmCityBuilder(AbstractCityBuilder):
         else:
             road = Street(name='OSM_' + osm_id)
 
+        vertices = geometry.vertices()
         if is_reversed:
-            geometry = geometry.reversed()
+            vertices.reverse()
 
-        road.add_control_points(geometry.vertices())
+        road.add_control_points(vertices)
 
         city.add_road(road)
 
@@ -160,40 +159,46 @@ class OsmCityBuilder(AbstractCityBuilder):
         with them.
         '''
         # For now exclude smaller roads, in the future we should draw each
-        # type of street with different width/texture
-        for osmid, value in self.osm_ways.iteritems():
-            tags = value['tags']
-            # Filter highways
-            if 'highway' in tags and tags['highway'] in self.road_types:
-
-                geometry = self._create_road_geometry(osmid, value)
-
-                # Check if street is one or two ways
-                is_one_way = False
-                if 'oneway' in value['tags']:
-                    is_one_way = value['tags']['oneway'] in ['true', '1', 'yes', 'reverse', '-1']
-
-                # Check if the points were given in reversed order
-                is_reversed = is_one_way and (value['tags']['oneway'] in ['-1', 'reverse'])
-
-                # This should be improved in the future
-                is_trunk = tags['highway'] in ['trunk', 'primary', 'secondary']
-
-                # The road went outside the bounding box and back in. For that
-                # case we will generate a new road for each piece.
-                if len(geometry) > 1:
-                    index = "A"
-                    for road_geometry in geometry:
-                        self._create_road(city, str(osmid) + "_" + index, road_geometry, is_one_way, is_reversed, is_trunk)
-                        index = chr(ord(index) + 1)
-                else:
-                    road_geometry = geometry[0]
-                    self._create_road(city, str(osmid), road_geometry, is_one_way, is_reversed, is_trunk)
+        # type of street with different width/texture. Only highways were
+        # kept by the way filter
+        for osmid, tags, refs in self.osm_ways:
+            if self.way_filter.selects(tags):
+                self._create_way_roads(city, osmid, tags, refs)
+
+    def _create_way_roads(self, city, osmid, tags, refs):
+        geometry = self._create_road_geometry(osmid, refs)
+        is_one_way, is_reversed, is_trunk = self._way_kind(tags)
+        for name, road_geometry in zip(self._way_road_names(osmid, len(geometry)), geometry):
+            self._create_road(city, name, road_geometry, is_one_way, is_reversed, is_trunk)
+
+    def _way_kind(self, tags):
+        """
+        Answer whether the roads of a way with the given tags are one way,
+        reversed (i.e. the points were given in reversed order) and trunks
+        """
+        # Check if street is one or two ways
+        is_one_way = False
+        if 'oneway' in tags:
+            is_one_way = tags['oneway'] in ['true', '1', 'yes', 'reverse', '-1']
+
+        # Check if the points were given in reversed order
+        is_reversed = is_one_way and (tags['oneway'] in ['-1', 'reverse'])
+
+        # This should be improved in the future
+        is_trunk = tags['highway'] in ['trunk', 'primary', 'secondary']
+        return is_one_way, is_reversed, is_trunk
+
+    def _way_road_names(self, osmid, roads_count):
+        # The road went outside the bounding box and back in. For that
+        # case we will generate a new road for each piece.
+        if roads_count > 1:
+            return map(lambda index: str(osmid) + "_" + chr(ord("A") + index), range(roads_count))
+        return [str(osmid)]
 
     def _create_intersections(self, city):
-        for node_id, nodes in self.nodes.iteritems():
-            if len(nodes) > 1:
-                city.add_intersection_at(self.osm_coords[node_id]['point'])
+        # Nodes shared by more than one road
+        for point in self.osm_coords.points_for(self.osm_ways.shared_node_ids()):
+            city.add_intersection_at(point)
 
     def _add_point_to_road(self, road, point):
         if not road.includes_control_point(point):
@@ -204,23 +209,17 @@ class OsmCityBuilder(AbstractCityBuilder):
         Iterate the ways to find the buildings data and create model buildings
         with it.
         '''
-        for key, value in self.osm_ways.iteritems():
-            tags = value['tags']
+        # Only roads are kept while parsing, so the way filter and the node
+        # store wanted ids should include the buildings too
+        for osmid, tags, refs in self.osm_ways:
             if 'building' in tags:
-                vertices = []
-                for ref in value['refs']:
-                    ref_lat = self.osm_coords[ref]['lat']
-                    ref_lon = self.osm_coords[ref]['lon']
-                    ref_pair = LatLon(ref_lat, ref_lon)
-                    vertex = self._translate_coords(ref_pair)
-                    vertices.append(vertex)
-                if 'height' in value:
-                    height = value['height']
+                vertices = self.osm_coords.points_for(refs)
+                if 'height' in tags:
+                    height = tags['height']
                 else:
                     height = 20
                 building = Building(Point(0, 0, 0), vertices, height=height)
                 city.add_building(building)
 
     def _translate_coords(self, latlon):
-        (delta_lat, delta_lon) = self.map_origin.delta_in_meters(latlon)
-        return Point(delta_lon, delta_lat, 0)
+        return self.projector.to_point(latlon)
@@ -0,0 +1,209 @@
+"""
+Copyright (C) 2017 Open Source Robotics Foundation
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import os
+
+import numpy as np
+
+from geometry.latlon import LatLon
+from geometry.point import Point
+
+
+class OsmNodeStore(object):
+    """Keeps the coordinates of OSM nodes in a handful of NumPy arrays: the
+    node ids, sorted, and the latitude, longitude and projected x and y of
+    each one. Nodes are looked up with a binary search on the ids.
+
+    Coordinates are added in batches, as handed by the OSM parser, and only
+    the nodes among the wanted ids (if given) are kept. Once `freeze` is
+    called (or on the first lookup) no more nodes can be added. If a
+    directory is given, the arrays are memory-mapped from files in it. When
+    the wanted ids are given too, the files are preallocated with room for
+    all of them and each batch is written to its final position as it is
+    added, so the nodes never need to fit in memory; otherwise the batches
+    are kept in memory and saved on `freeze`.
+    """
+
+    ARRAY_NAMES = ['ids', 'lats', 'lons', 'xs', 'ys']
+    ARRAY_DTYPES = [np.int64, np.float64, np.float64, np.float64, np.float64]
+
+    # Number of nodes moved at a time when compacting the preallocated arrays
+    CHUNK_SIZE = 1 << 20
+
+    def __init__(self, projector, wanted_ids=None, directory=None):
+        self._projector = projector
+        if wanted_ids is None:
+            self._wanted_ids = None
+        else:
+            self._wanted_ids = np.unique(np.asarray(wanted_ids, dtype=np.int64))
+        self._directory = directory
+        self._batches = []
+        self._arrays = None
+        self._preallocated = None
+        self._filled = None
+        if directory is not None and self._wanted_ids is not None and len(self._wanted_ids):
+            self._preallocate()
+
+    def add_coords(self, coords):
+        """
+        Add a batch of (osm id, lon, lat) tuples. Meant to be used as the
+        coords callback of the OSM parser
+        """
+        if self._arrays is not None:
+            raise ValueError("Can't add nodes to a frozen store")
+        coords = list(coords)
+        if not coords:
+            return
+        ids = np.fromiter((osmid for osmid, _, _ in coords), dtype=np.int64, count=len(coords))
+        lons = np.fromiter((lon for _, lon, _ in coords), dtype=np.float64, count=len(coords))
+        lats = np.fromiter((lat for _, _, lat in coords), dtype=np.float64, count=len(coords))
+        if self._wanted_ids is not None:
+            wanted = self._includes(self._wanted_ids, ids)
+            ids, lats, lons = ids[wanted], lats[wanted], lons[wanted]
+            if len(ids) == 0:
+                return
+        xs, ys, _ = self._projector.to_enu_arrays(lats, lons)
+        if self._preallocated is not None:
+            indexes = np.searchsorted(self._wanted_ids, ids)
+            for array, values in zip(self._preallocated[1:], (lats, lons, xs, ys)):
+                array[indexes] = values
+            self._filled[indexes] = True
+        else:
+            self._batches.append((ids, lats, lons, xs, ys))
+
+    def freeze(self):
+        if self._arrays is not None:
+            return
+        if self._preallocated is not None:
+            self._arrays = dict(zip(self.ARRAY_NAMES, self._compact_preallocated()))
+            return
+        if self._batches:
+            arrays = map(np.concatenate, zip(*self._batches))
+        else:
+            arrays = [np.empty(0, dtype=np.int64)] + [np.empty(0, dtype=np.float64)] * 4
+        order = np.argsort(arrays[0], kind='mergesort')
+        arrays = map(lambda array: array[order], arrays)
+        self._batches = None
+        if self._directory is not None:
+            arrays = map(self._memory_mapped, self.ARRAY_NAMES, arrays)
+        self._arrays = dict(zip(self.ARRAY_NAMES, arrays))
+
+    def __len__(self):
+        return len(self._array('ids'))
+
+    def __contains__(self, osmid):
+        ids = self._array('ids')
+        return bool(self._includes(ids, np.array([osmid], dtype=np.int64))[0])
+
+    def indexes_of(self, osmids):
+        """
+        Answer the positions in the arrays of the given node ids. Raises
+        KeyError if some of them are not in the store
+        """
+        ids = self._array('ids')
+        osmids = np.asarray(osmids, dtype=np.int64)
+        indexes = np.searchsorted(ids, osmids)
+        found = self._includes(ids, osmids)
+        if not found.all():
+            raise KeyError(osmids[~found][0])
+        return indexes
+
+    def point_for(self, osmid):
+        return self.points_for([osmid])[0]
+
+    def points_for(self, osmids):
+        """
+        Answer the projected Points of the given node ids, in the same order
+        """
+        indexes = self.indexes_of(osmids)
+        xs = self._array('xs')[indexes].tolist()
+        ys = self._array('ys')[indexes].tolist()
+        return [Point(x, y, 0) for x, y in zip(xs, ys)]
+
+    def latlon_for(self, osmid):
+        index = self.indexes_of([osmid])[0]
+        return LatLon(float(self._array('lats')[index]), float(self._array('lons')[index]))
+
+    def ids(self):
+        return self._array('ids')
+
+    def lats(self):
+        return self._array('lats')
+
+    def lons(self):
+        return self._array('lons')
+
+    def xs(self):
+        return self._array('xs')
+
+    def ys(self):
+        return self._array('ys')
+
+    def _array(self, name):
+        self.freeze()
+        return self._arrays[name]
+
+    def _preallocate(self):
+        """
+        Create the array files with room for all the wanted nodes, in id
+        order, and keep track of the ones that get their coordinates
+        """
+        count = len(self._wanted_ids)
+        self._preallocated = [np.lib.format.open_memmap(self._path_for(name), mode='w+', dtype=dtype, shape=(count,))
+                              for name, dtype in zip(self.ARRAY_NAMES, self.ARRAY_DTYPES)]
+        self._preallocated[0][:] = self._wanted_ids
+        self._filled = np.zeros(count, dtype=bool)
+
+    def _compact_preallocated(self):
+        """
+        Move the added nodes to the start of the preallocated arrays, a
+        chunk at a time, and answer the read-only arrays trimmed to them
+        """
+        count = 0
+        for start in xrange(0, len(self._filled), self.CHUNK_SIZE):
+            filled = self._filled[start:start + self.CHUNK_SIZE]
+            filled_count = int(np.count_nonzero(filled))
+            for array in self._preallocated:
+                array[count:count + filled_count] = array[start:start + self.CHUNK_SIZE][filled]
+            count += filled_count
+        for array in self._preallocated:
+            array.flush()
+        self._preallocated = None
+        self._filled = None
+        return map(lambda name: np.load(self._path_for(name), mmap_mode='r')[:count], self.ARRAY_NAMES)
+
+    def _memory_mapped(self, name, array):
+        path = self._path_for(name)
+        np.save(path, array)
+        return np.load(path, mmap_mode='r')
+
+    def _path_for(self, name):
+        try:
+            os.makedirs(self._directory)
+        except OSError:
+            pass
+        return os.path.join(self._directory, name + '.npy')
+
+    @classmethod
+    def _includes(cls, sorted_ids, ids):
+        """
+        Answer a boolean array telling which of the ids are in the (sorted)
+        array
+        """
+        if len(sorted_ids) == 0:
+            return np.zeros(len(ids), dtype=bool)
+        indexes = np.minimum(np.searchsorted(sorted_ids, ids), len(sorted_ids) - 1)
+        return sorted_ids[indexes] == ids
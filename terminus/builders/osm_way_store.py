@@ -0,0 +1,213 @@
+"""
+Copyright (C) 2017 Open Source Robotics Foundation
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import numpy as np
+
+
+class OsmWayFilter(object):
+    """Tells which ways of an OSM map are kept while parsing it: the ones
+    whose value for the given tag is one of the given values (e.g. the
+    `highway` ways of some types). Only the selecting tag and the other kept
+    tags of those ways are needed later on.
+    """
+
+    def __init__(self, tag, values, kept_tags=()):
+        self._tag = tag
+        self._values = set(values)
+        self._kept_tags = set([tag]) | set(kept_tags)
+
+    def tag(self):
+        return self._tag
+
+    def kept_tags(self):
+        return sorted(self._kept_tags)
+
+    def selects(self, tags):
+        return tags.get(self._tag, None) in self._values
+
+    def filter_tags(self, tags):
+        """
+        Drop in place the tags that are not needed: all of them for the
+        ways that are not selected. Meant to be used as the ways tag filter
+        of the OSM parser, so unselected ways are discarded as early as
+        possible
+        """
+        if not self.selects(tags):
+            tags.clear()
+            return
+        for key in tags.keys():
+            if key not in self._kept_tags:
+                del tags[key]
+
+
+class OsmWayStore(object):
+    """Keeps the ways selected by an OsmWayFilter in a few NumPy arrays: the
+    way ids, all their node refs one after the other along with the offset
+    where the refs of each way start, and, for each kept tag, the index of
+    its value in a table of the values seen (or -1 if the way doesn't have
+    it). Unselected ways are never stored.
+
+    Ways are added in batches, as handed by the OSM parser. Once `freeze`
+    is called (or the ways are first queried) they are sorted by id and no
+    more can be added.
+    """
+
+    def __init__(self, way_filter):
+        self._filter = way_filter
+        self._tags = way_filter.kept_tags()
+        self._tag_values = dict((tag, []) for tag in self._tags)
+        self._tag_value_indexes = dict((tag, {}) for tag in self._tags)
+        self._batches = []
+        self._arrays = None
+
+    def add_ways(self, ways):
+        """
+        Add a batch of (osm id, tags, refs) tuples. Meant to be used as the
+        ways callback of the OSM parser
+        """
+        if self._arrays is not None:
+            raise ValueError("Can't add ways to a frozen store")
+        ids = []
+        refs = []
+        lengths = []
+        tag_codes = dict((tag, []) for tag in self._tags)
+        for osmid, tags, way_refs in ways:
+            if not self._filter.selects(tags):
+                continue
+            ids.append(osmid)
+            refs.extend(way_refs)
+            lengths.append(len(way_refs))
+            for tag in self._tags:
+                tag_codes[tag].append(self._tag_code(tag, tags.get(tag, None)))
+        if not ids:
+            return
+        batch = {'ids': np.array(ids, dtype=np.int64),
+                 'refs': np.array(refs, dtype=np.int64),
+                 'lengths': np.array(lengths, dtype=np.int64)}
+        for tag in self._tags:
+            batch['tag:' + tag] = np.array(tag_codes[tag], dtype=np.int32)
+        self._batches.append(batch)
+
+    def freeze(self):
+        if self._arrays is not None:
+            return
+        names = ['ids', 'refs', 'lengths'] + map(lambda tag: 'tag:' + tag, self._tags)
+        if self._batches:
+            arrays = dict((name, np.concatenate(map(lambda batch: batch[name], self._batches))) for name in names)
+        else:
+            arrays = dict((name, np.empty(0, dtype=np.int64)) for name in names)
+        self._batches = None
+
+        # Sort the ways by id, moving their refs along
+        order = np.argsort(arrays['ids'], kind='mergesort')
+        starts = np.concatenate(([0], np.cumsum(arrays['lengths'])[:-1])).astype(np.int64)
+        lengths = arrays['lengths'][order]
+        refs = [arrays['refs'][start:start + length] for start, length in zip(starts[order], lengths)]
+        arrays['refs'] = np.concatenate(refs) if refs else np.empty(0, dtype=np.int64)
+        for name in names:
+            if name != 'refs':
+                arrays[name] = arrays[name][order]
+        arrays['offsets'] = np.concatenate(([0], np.cumsum(lengths))).astype(np.int64)
+        self._arrays = arrays
+
+    def __len__(self):
+        return len(self._array('ids'))
+
+    def __iter__(self):
+        """
+        Iterate the (osm id, tags, refs) of the ways, sorted by id. Tags
+        are rebuilt as a dict with the kept tags only
+        """
+        ids = self._array('ids')
+        for index in xrange(len(ids)):
+            yield (int(ids[index]), self.tags_at(index), self.refs_at(index))
+
+    def ids(self):
+        return self._array('ids')
+
+    def refs(self):
+        """
+        Answer the node refs of all the ways, one way after the other
+        """
+        return self._array('refs')
+
+    def refs_at(self, index):
+        offsets = self._array('offsets')
+        return self._array('refs')[offsets[index]:offsets[index + 1]].tolist()
+
+    def tags_at(self, index):
+        tags = {}
+        for tag in self._tags:
+            code = self._array('tag:' + tag)[index]
+            if code >= 0:
+                tags[tag] = self._tag_values[tag][code]
+        return tags
+
+    def first_node_ids(self):
+        """
+        Answer the id of the first node of each way, in the order of the
+        ways
+        """
+        return self._array('refs')[self._array('offsets')[:-1]]
+
+    def node_ids(self):
+        """
+        Answer the sorted ids of all the nodes referenced by the ways
+        """
+        return np.unique(self._array('refs'))
+
+    def shared_node_ids(self):
+        """
+        Answer the sorted ids of the nodes referenced by more than one way
+        """
+        way_indexes = np.repeat(np.arange(len(self)), np.diff(self._array('offsets')))
+        # A way may go through a node more than once, count it once
+        pairs = np.unique(np.rec.fromarrays([self._array('refs'), way_indexes]))
+        node_ids, counts = np.unique(pairs['f0'], return_counts=True)
+        return node_ids[counts > 1]
+
+    def split_at(self, node_ids):
+        """
+        Split the ways at the given nodes, unless they are their ends, and
+        answer the way index, start and end of each piece, in way order, as
+        three arrays. Starts and ends are positions in `refs`, both included,
+        so consecutive pieces of a way share the node it was split at
+        """
+        refs = self._array('refs')
+        offsets = self._array('offsets')
+        lengths = np.diff(offsets)
+        is_first = np.zeros(len(refs), dtype=bool)
+        is_first[offsets[:-1][lengths > 0]] = True
+        is_last = np.zeros(len(refs), dtype=bool)
+        is_last[offsets[1:][lengths > 0] - 1] = True
+        is_cut = np.in1d(refs, node_ids) & ~is_first & ~is_last
+        starts = np.flatnonzero(is_first | is_cut)
+        ends = np.flatnonzero(is_cut | is_last)
+        way_indexes = np.repeat(np.arange(len(self)), lengths)[starts]
+        return way_indexes, starts, ends
+
+    def _tag_code(self, tag, value):
+        if value is None:
+            return -1
+        indexes = self._tag_value_indexes[tag]
+        if value not in indexes:
+            indexes[value] = len(self._tag_values[tag])
+            self._tag_values[tag].append(value)
+        return indexes[value]
+
+    def _array(self, name):
+        self.freeze()
+        return self._arrays[name]
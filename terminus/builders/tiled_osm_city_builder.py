@@ -0,0 +1,243 @@
+"""
+Copyright (C) 2017 Open Source Robotics Foundation
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import itertools
+import multiprocessing
+
+import numpy as np
+
+from geometry.point import Point
+from geometry.path import Path
+from geometry import fixed_point
+
+from models.city import City
+from models.road import Road
+from models.street import Street
+from models.trunk import Trunk
+
+from builders.osm_city_builder import OsmCityBuilder
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+def _build_tile(task):
+    """
+    Build the pieces of ways of a tile task, as handed by
+    TiledOsmCityBuilder, and answer the (piece index, paths) of each one,
+    where paths are the node centers of the roads the piece makes once
+    trimmed to the map bounds (one for each time it goes in the map), with
+    its redundant nodes trimmed
+    """
+    bounding_box, pieces, intersection_points = task
+    city = City()
+    piece_roads = []
+    for piece_index, is_reversed, coordinates in pieces:
+        points = map(lambda (x, y): Point(x, y, 0), coordinates)
+        roads = []
+        for path in Path.polyline_from_points(points).trim_to_fit(bounding_box):
+            if path.is_empty():
+                continue
+            vertices = path.vertices()
+            if is_reversed:
+                vertices.reverse()
+            road = Street()
+            road.add_control_points(vertices)
+            city.add_road(road)
+            roads.append(road)
+        piece_roads.append((piece_index, roads))
+
+    for x, y in intersection_points:
+        city.add_intersection_at(Point(x, y, 0))
+    city.trim_roads()
+
+    tile_paths = []
+    for piece_index, roads in piece_roads:
+        paths = map(lambda road: map(lambda node: node.center.to_tuple(), road.nodes()), roads)
+        tile_paths.append((piece_index, paths))
+    return tile_paths
+
+
+class TiledOsmCityBuilder(OsmCityBuilder):
+    """Builds the same city as OsmCityBuilder, splitting the work in a grid
+    of tiles over the map bounds that are built in a pool of worker
+    processes.
+
+    Ways are split at the nodes they share with other ways, and each piece
+    belongs to the tile its first node falls in. The pieces that cross the
+    tile border go along with the coordinates of their nodes past it, so
+    every worker gets the pieces of one tile, the coordinates of their nodes
+    and the intersections around them, and nothing else: the workers are
+    started before the map is parsed. A worker trims the pieces to the map
+    bounds and their redundant nodes. Pieces end at intersections, which are
+    never trimmed, so the nodes of a piece are the same they would be in
+    the whole road.
+
+    The pieces of each way are then stitched back together, in the original
+    way order, where they meet inside the map. Intersections are registered
+    before adding the roads, so the roads that meet across tiles share
+    RoadIntersectionNodes without looking for the roads at each one.
+    """
+
+    def __init__(self, osm_map, tiles=4, workers=None, nodes_directory=None,
+                 way_filter=None, concurrency=None):
+        super(TiledOsmCityBuilder, self).__init__(osm_map, nodes_directory,
+                                                  way_filter, concurrency)
+        # Number of tiles along each side of the map
+        self.tiles = tiles
+        self.workers = workers
+        self._pool = None
+
+    def _buid_city(self):
+        if self.workers is not None and self.workers <= 1:
+            return super(TiledOsmCityBuilder, self)._buid_city()
+        # Fork the workers while the map is not parsed yet, so they only
+        # hold the tile they are building
+        self._pool = multiprocessing.Pool(self.workers)
+        try:
+            return super(TiledOsmCityBuilder, self)._buid_city()
+        finally:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+
+    def _populate_city(self, city):
+        self._shared_node_ids = self.osm_ways.shared_node_ids()
+        indexes = self.osm_coords.indexes_of(self._shared_node_ids)
+        self._shared_node_xs = self.osm_coords.xs()[indexes]
+        self._shared_node_ys = self.osm_coords.ys()[indexes]
+        self._split_ways_in_pieces()
+        self._pieces_by_tile = self._split_pieces_in_tiles()
+
+        logger.debug("Building {0} pieces of ways in {1} tiles".format(len(self._piece_ways), len(self._pieces_by_tile)))
+
+        if self._pool is None:
+            tiles_paths = map(_build_tile, self._tile_tasks())
+        else:
+            tiles_paths = self._pool.imap(_build_tile, self._tile_tasks())
+        paths_by_piece = {}
+        for tile_paths in tiles_paths:
+            paths_by_piece.update(tile_paths)
+
+        # All the intersections are there before the roads, which are
+        # joined to them as they are added
+        for point in self.osm_coords.points_for(self._shared_node_ids):
+            city.add_intersection_at(point)
+
+        piece_indexes = np.flatnonzero(self._piece_selected).tolist()
+        pieces_by_way = itertools.groupby(piece_indexes, lambda index: int(self._piece_ways[index]))
+        for way_index, way_piece_indexes in pieces_by_way:
+            is_one_way, is_reversed, is_trunk = self._way_kinds[way_index]
+            paths = self._stitch(map(lambda index: paths_by_piece[index], way_piece_indexes), is_reversed)
+            osmid = int(self.osm_ways.ids()[way_index])
+            for name, centers in zip(self._way_road_names(osmid, len(paths)), paths):
+                if is_trunk:
+                    road = Trunk(name='OSM_' + name)
+                else:
+                    road = Street(name='OSM_' + name)
+                # Redundant nodes are already trimmed
+                road.add_control_points(map(lambda center: Point(*center), centers))
+                city.add_road(road)
+
+    def _split_ways_in_pieces(self):
+        self._piece_ways, self._piece_starts, self._piece_ends = self.osm_ways.split_at(self._shared_node_ids)
+        self._way_kinds = {}
+        selected_ways = []
+        for way_index in xrange(len(self.osm_ways)):
+            tags = self.osm_ways.tags_at(way_index)
+            if self.way_filter.selects(tags):
+                self._way_kinds[way_index] = self._way_kind(tags)
+                selected_ways.append(way_index)
+        self._piece_selected = np.in1d(self._piece_ways, selected_ways)
+
+    def _split_pieces_in_tiles(self):
+        """
+        Answer the indexes of the selected pieces of each tile, in way
+        order. Pieces starting outside the map go to the closest tile
+        """
+        indexes = self.osm_coords.indexes_of(self.osm_ways.refs()[self._piece_starts])
+        xs = self.osm_coords.xs()[indexes]
+        ys = self.osm_coords.ys()[indexes]
+        box = self.bounding_box
+        columns = self._tile_positions(xs, box.origin.x, box.corner.x)
+        rows = self._tile_positions(ys, box.origin.y, box.corner.y)
+        tile_of_piece = np.where(self._piece_selected, rows * self.tiles + columns, -1)
+        return [np.flatnonzero(tile_of_piece == tile) for tile in range(self.tiles * self.tiles)]
+
+    def _tile_tasks(self):
+        """
+        Yield, for each tile, the (bounding box, pieces, intersection points)
+        task a worker builds: the (piece index, is reversed, node
+        coordinates) of the pieces of the tile, including the nodes past
+        its border, and the intersections around them
+        """
+        refs = self.osm_ways.refs()
+        for piece_indexes in self._pieces_by_tile:
+            pieces = []
+            tile_xs = []
+            tile_ys = []
+            for piece_index in piece_indexes.tolist():
+                indexes = self.osm_coords.indexes_of(refs[self._piece_starts[piece_index]:self._piece_ends[piece_index] + 1])
+                xs = self.osm_coords.xs()[indexes]
+                ys = self.osm_coords.ys()[indexes]
+                is_reversed = self._way_kinds[self._piece_ways[piece_index]][1]
+                pieces.append((piece_index, is_reversed, zip(xs.tolist(), ys.tolist())))
+                tile_xs.append(xs)
+                tile_ys.append(ys)
+            yield (self.bounding_box, pieces, self._intersections_around(tile_xs, tile_ys))
+
+    def _intersections_around(self, xs, ys):
+        """
+        Answer the coordinates of the intersections that can join the nodes
+        with the given coordinates: every road node lays within the box of
+        the nodes of its piece, so only the ones in there
+        """
+        if len(xs) == 0 or len(self._shared_node_ids) == 0:
+            return []
+        xs = np.concatenate(xs)
+        ys = np.concatenate(ys)
+        shared_xs = self._shared_node_xs
+        shared_ys = self._shared_node_ys
+        margin = Road.CONTROL_POINT_TOLERANCE * 10
+        inside = (shared_xs >= xs.min() - margin) & (shared_xs <= xs.max() + margin) & \
+            (shared_ys >= ys.min() - margin) & (shared_ys <= ys.max() + margin)
+        return zip(shared_xs[inside].tolist(), shared_ys[inside].tolist())
+
+    def _stitch(self, pieces_paths, is_reversed):
+        """
+        Answer the node centers of the roads of a way given the paths of its
+        pieces, joining the ones that meet. Paths go in the direction of
+        the road, but the pieces follow the way
+        """
+        paths = []
+        for piece_paths in pieces_paths:
+            for centers in piece_paths:
+                if is_reversed:
+                    centers = centers[::-1]
+                if paths and fixed_point.same_point(Point(*paths[-1][-1]), Point(*centers[0]), 7):
+                    paths[-1].extend(centers[1:])
+                else:
+                    paths.append(list(centers))
+        if is_reversed:
+            paths = map(lambda centers: centers[::-1], paths)
+        return paths
+
+    def _tile_positions(self, coordinates, low, high):
+        size = (high - low) / float(self.tiles)
+        if size <= 0:
+            return np.zeros(len(coordinates), dtype=np.int64)
+        positions = np.floor((coordinates - low) / size).astype(np.int64)
+        return np.clip(positions, 0, self.tiles - 1)
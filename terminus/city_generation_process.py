@@ -21,21 +21,34 @@ from generators.sdf_generator_gazebo_8 import SDFGeneratorGazebo8
 from generators.street_plot_generator import StreetPlotGenerator
 from generators.opendrive_generator import OpenDriveGenerator
 from models.city_statistics import CityStatistics
+from models.junction_resolver import JunctionResolver
+from models.lane_geometry_builder import LaneGeometryBuilder
+from models.lane_geometry_cache import LaneGeometryCache
+from models.lane_geometry_pool import LaneGeometryPool
+from models.polyline_geometry import PolylineGeometry
+from models.lines_and_arcs_geometry import LinesAndArcsGeometry
 
 import logging
+import shutil
 import subprocess
 import os
+import tempfile
 
 
 class CityGenerationProcess(object):
 
     def __init__(self, builder, rndf_origin, path, debug_on=False,
-                 base_name='city', logger=None):
+                 base_name='city', logger=None, workers=1, cache_path=None,
+                 cache_size=None, geometry_budget=None):
         self.builder = builder
         self.rndf_origin = rndf_origin
         self.path = path
         self.base_name = base_name
         self.debug_on = debug_on
+        self.workers = workers
+        self.cache_path = cache_path
+        self.cache_size = cache_size
+        self.geometry_budget = geometry_budget
         if logger is None:
             self.logger = self._create_default_logger()
         else:
@@ -45,7 +58,43 @@ class CityGenerationProcess(object):
         self.logger.info("Building city using {0}".format(self.builder.name()))
 
         city = self.builder.get_city()
-
+        self.generate(city)
+
+    def generate(self, city):
+        """
+        Generate all the output files for the given city. The city can be
+        edited and generated again: only the geometries affected by the
+        edits are computed again
+        """
+        city.discard_stale_geometries()
+
+        if self.cache_path is None:
+            cache = None
+        else:
+            cache = LaneGeometryCache(self.cache_path, self.cache_size)
+
+        if self.geometry_budget is None:
+            self._prepare_geometries(city, cache, [PolylineGeometry, LinesAndArcsGeometry])
+            self._write_files(city, cache)
+            return
+
+        # Keep the lane geometries under the budget, computing them road by
+        # road as the generators write them and evicting them once written.
+        # Evicted geometries are spilled to the cache, or to a temporary one
+        spill_directory = None
+        if cache is None:
+            spill_directory = tempfile.mkdtemp(prefix='terminus-geometries-')
+            cache = LaneGeometryCache(spill_directory)
+        city.set_geometry_pool(LaneGeometryPool(self.geometry_budget, cache))
+        try:
+            self._write_files(city, cache)
+        finally:
+            self.logger.info(city.geometry_pool())
+            city.set_geometry_pool(None)
+            if spill_directory is not None:
+                shutil.rmtree(spill_directory, ignore_errors=True)
+
+    def _write_files(self, city, cache):
         # Make sure the path exists
         try:
             os.makedirs(self.path)
@@ -62,10 +111,12 @@ class CityGenerationProcess(object):
             self.logger.info("====================================")
 
         if self.debug_on:
+            self._prepare_geometries(city, cache, [PolylineGeometry, LinesAndArcsGeometry])
             self._run_generator(StreetPlotGenerator(city),
                                 'Generating street plots',
                                 self.base_name)
 
+        self._prepare_geometries(city, cache, [PolylineGeometry])
         self._run_generator(RNDFGenerator(city, self.rndf_origin),
                             'Generating RNDF file',
                             self.base_name + '.rndf')
@@ -114,6 +165,7 @@ class CityGenerationProcess(object):
         #                     'Generating OpenDrive file',
         #                     self.base_name + '.xodr')
 
+        self._prepare_geometries(city, cache, [LinesAndArcsGeometry])
         self._run_generator(MonolaneGenerator(city),
                             'Generating monolane file',
                             self.base_name + '_monolane.yaml')
@@ -133,10 +185,40 @@ class CityGenerationProcess(object):
                 self.logger.warn(command)
                 self.logger.warn(output)
 
+    def _prepare_geometries(self, city, cache, geometry_classes):
+        """
+        Compute the lane geometries of the given classes that are not in
+        memory yet, along with their junctions if there are workers or a
+        cache to take advantage of. Otherwise junctions are lazily resolved,
+        one at a time, by the generators that need them.
+
+        Under a geometry budget nothing is computed in advance: the
+        generators build (or restore from the cache) the geometries of each
+        road as they write it, and evict them once written
+        """
+        if city.geometry_pool() is not None:
+            return
+        builder = LaneGeometryBuilder(city, geometry_classes, self.workers, cache)
+        if builder.pending_geometries_count() > 0:
+            self.logger.info("Computing {0} lane geometries using {1} workers".format(builder.pending_geometries_count(), self.workers))
+            builder.run()
+
+        if self.workers > 1 or cache is not None:
+            for geometry_class in geometry_classes:
+                resolver = JunctionResolver(city, geometry_class, self.workers, cache)
+                if resolver.junctions():
+                    self.logger.info("Resolving {0} junctions using {1} workers".format(geometry_class.__name__, self.workers))
+                    resolver.run()
+                    if cache is not None:
+                        self.logger.info(cache)
+
     def _run_generator(self, generator, log_message, path_extension):
         self.logger.info(log_message)
         destination_file = self.path + path_extension
         generator.write_to(destination_file)
+        # Whatever the generator needed is already written, so the lane
+        # geometries can be evicted if over budget
+        generator.city.enforce_geometry_budget()
 
     def _create_default_logger(self):
         logger = logging.getLogger('')
@@ -22,6 +22,7 @@ from geometry.point import Point
 from geometry.line_segment import LineSegment
 from geometry.arc import Arc
 from geometry.path import Path
+from geometry.snapping_map import SnappingMap
 from file_generator import FileGenerator
 from monolane_id_mapper import MonolaneIdMapper
 from models.lines_and_arcs_geometry import LinesAndArcsGeometry
@@ -39,8 +40,10 @@ class MonolaneGenerator(FileGenerator):
         # First run the id mapper
         self.monolane_id_mapper = MonolaneIdMapper(city)
         self.monolane_id_mapper.run()
-        # Map points and connections to avoid overlapping issues
-        self.connected_points = {}
+        # Map points and connections to avoid overlapping issues. Waypoints
+        # are kept by key (see `_waypoint_key`) and connected points by lane
+        # and heading, so the lane geometries can be evicted once written
+        self.connected_points = SnappingMap(0.5)
         self.connections_per_waypoint = OrderedDict()
         self.waypoints_per_connection = OrderedDict()
         self.monolane = {
@@ -65,30 +68,41 @@ class MonolaneGenerator(FileGenerator):
         self._build_lane_points(lane)
         self._build_lane_connections(lane)
 
+    def end_road(self, road):
+        # The lanes of the road are written, so their geometries can be
+        # evicted if over budget. Point ids are looked up again if needed
+        self.monolane_id_mapper.forget_waypoints()
+        self.city.enforce_geometry_budget()
+
+    def end_street(self, street):
+        self.end_road(street)
+
+    def end_trunk(self, trunk):
+        self.end_road(trunk)
+
+    def _waypoint_key(self, waypoint):
+        return (id(waypoint.lane()), self.monolane_id_mapper.id_for(waypoint))
+
     def _register_intersection_connection(self, waypoint, monolane_connection_id):
-        waypoint_id = id(waypoint)
-        key = (waypoint_id, waypoint)
+        key = self._waypoint_key(waypoint)
         if key not in self.connections_per_waypoint:
             self.connections_per_waypoint[key] = []
         self.connections_per_waypoint[key].append(monolane_connection_id)
 
         if monolane_connection_id not in self.waypoints_per_connection:
             self.waypoints_per_connection[monolane_connection_id] = []
-        self.waypoints_per_connection[monolane_connection_id].append(waypoint)
+        self.waypoints_per_connection[monolane_connection_id].append(key)
 
     def _build_groups(self):
         group_index = 0
         while self.connections_per_waypoint:
-            (waypoint_id, waypoint) = next(self.connections_per_waypoint.iterkeys())
-            group_connections = self._build_recursive_connections_starting(waypoint)
+            key = next(self.connections_per_waypoint.iterkeys())
+            group_connections = self._build_recursive_connections_starting(key)
             if group_connections:
                 group_index += 1
                 self.monolane['maliput_monolane_builder']['groups'][str(group_index)] = list(set(group_connections))
 
-    def _build_recursive_connections_starting(self, waypoint):
-        waypoint_id = id(waypoint)
-        key = (waypoint_id, waypoint)
-
+    def _build_recursive_connections_starting(self, key):
         if key not in self.connections_per_waypoint:
             return []
 
@@ -99,8 +113,8 @@ class MonolaneGenerator(FileGenerator):
             return []
 
         for connection_id in connections:
-            for waypoint_to_traverse in self.waypoints_per_connection[connection_id]:
-                connections.extend(self._build_recursive_connections_starting(waypoint_to_traverse))
+            for key_to_traverse in self.waypoints_per_connection[connection_id]:
+                connections.extend(self._build_recursive_connections_starting(key_to_traverse))
         return connections
 
     def _build_lane_points(self, lane):
@@ -221,21 +235,21 @@ class MonolaneGenerator(FileGenerator):
                     end = waypoints[index + 1]
                     monolane_connection = self._connect(element, start, end)
                     if monolane_connection is not None:
-                        start_point = start.center().rounded_to(0)
-                        end_point = end.center().rounded_to(0)
-                        self.connected_points[start_point] = start
-                        self.connected_points[end_point] = end
+                        start_point = start.center()
+                        end_point = end.center()
+                        self.connected_points[start_point] = (start.lane(), start.heading())
+                        self.connected_points[end_point] = (end.lane(), end.heading())
                         self._write_connection(monolane_connection, start, end)
         else:
             monolane_connection = self._connect(primitive, connection.start_waypoint(), connection.end_waypoint())
 
             if monolane_connection is not None:
                 start = connection.start_waypoint()
-                start_point = start.center().rounded_to(0)
+                start_point = start.center()
                 end = connection.end_waypoint()
-                end_point = end.center().rounded_to(0)
-                self.connected_points[start_point] = start
-                self.connected_points[end_point] = end
+                end_point = end.center()
+                self.connected_points[start_point] = (start.lane(), start.heading())
+                self.connected_points[end_point] = (end.lane(), end.heading())
                 self._write_connection(monolane_connection, start, end)
 
     def _connect(self, primitive, start, end):
@@ -261,36 +275,36 @@ class MonolaneGenerator(FileGenerator):
 
         if monolane_connection is not None:
             start = connection.start_waypoint()
-            start_point = start.center().rounded_to(0)
+            start_point = start.center()
             end = connection.end_waypoint()
-            end_point = end.center().rounded_to(0)
+            end_point = end.center()
 
             if start_point in self.connected_points:
-                existing_waypoint = self.connected_points[start_point]
-                if existing_waypoint.lane() is not start.lane() and \
-                   abs(existing_waypoint.heading() - start.heading()) > 1e-5:
+                existing_lane, existing_heading = self.connected_points[start_point]
+                if existing_lane is not start.lane() and \
+                   abs(existing_heading - start.heading()) > 1e-5:
                     old_start_point = start.center()
                     start.move_along(path, 0.02)
-                    start_point = start.center().rounded_to(0)
+                    start_point = start.center()
                     self._store_waypoint(start)
                     if 'length' in monolane_connection:
                         monolane_connection['length'] -= 0.02
                     logger.warn("Moving overlapping waypoint from {0} to {1}".format(old_start_point, start.center()))
 
             if end_point in self.connected_points:
-                existing_waypoint = self.connected_points[end_point]
-                if existing_waypoint.lane() is not end.lane() and \
-                   abs(existing_waypoint.heading() - end.heading()) > 1e-5:
+                existing_lane, existing_heading = self.connected_points[end_point]
+                if existing_lane is not end.lane() and \
+                   abs(existing_heading - end.heading()) > 1e-5:
                     old_end_point = end.center()
                     end.move_along(path, -0.02)
-                    end_point = end.center().rounded_to(0)
+                    end_point = end.center()
                     self._store_waypoint(end)
                     if 'length' in monolane_connection:
                         monolane_connection['length'] -= 0.02
                     logger.warn("Moving overlapping waypoint from {0} to {1}".format(old_end_point, end.center()))
 
-            self.connected_points[start_point] = start
-            self.connected_points[end_point] = end
+            self.connected_points[start_point] = (start.lane(), start.heading())
+            self.connected_points[end_point] = (end.lane(), end.heading())
 
             self._write_connection(monolane_connection, start, end)
 
@@ -19,25 +19,46 @@ from models.lines_and_arcs_geometry import LinesAndArcsGeometry
 
 
 class MonolaneIdMapper(CityVisitor):
+    """Generates the ids of the monolane points, out of the road name, the
+    lane number and the position of the waypoint in the lane (followed by
+    the intermediate waypoints of its out connections). The waypoints of a
+    lane are only mapped when one of them is first looked up, and can be
+    forgotten (see `forget_waypoints`) so the mapper doesn't keep the lane
+    geometries alive"""
     # TODO: Code is almost the same as the RNDF id mapper. Refactor.
 
     def run(self):
         self.lane_id = 0
-        self.waypoint_id = 0
-        self.object_to_id_level_1 = {}
-        self.object_to_id_level_2 = {}
-        self.id_to_object = {}
+        self.lane_to_id = {}
+        self.id_to_lane = {}
+        self.forget_waypoints()
         super(MonolaneIdMapper, self).run()
 
     def id_for(self, object):
-        return self.object_to_id_level_1[id(object)]
+        ids_by_object_id, ids_by_waypoint = self._waypoint_ids_for(object.lane())
+        try:
+            return ids_by_object_id[id(object)]
+        except KeyError:
+            # An equal waypoint from a previous build of the lane geometry
+            return ids_by_waypoint[object]
 
     def formatted_id_for(self, object):
         id = self.id_for(object)
         return "{0}_{1}_{2}".format(id[0], id[1], id[2])
 
     def object_for(self, id):
-        return self.id_to_object[id]
+        road_id = id[0]
+        if road_id.startswith('CONNECTION_'):
+            road_id = road_id[len('CONNECTION_'):]
+        lane = self.id_to_lane[(road_id, id[1])]
+        return next(waypoint for waypoint in self._waypoints_for(lane) if self.id_for(waypoint) == id)
+
+    def forget_waypoints(self):
+        """
+        Drop the waypoints mapped so far. They are mapped again, out of the
+        current lane geometries, when looked up
+        """
+        self._lane_waypoint_ids = {}
 
     def map_road(self, road):
         self.road_id = road.name
@@ -51,25 +72,37 @@ class MonolaneIdMapper(CityVisitor):
 
     def start_lane(self, lane):
         self.lane_id = self.lane_id + 1
-
-        # Create a UID for each waypoint
-        self.waypoint_id = 0
-        for waypoint in lane.waypoints_for(LinesAndArcsGeometry):
-            self.waypoint_id = self.waypoint_id + 1
-            waypoint_uid = (self.road_id, self.lane_id, self.waypoint_id)
-            self._register(waypoint_uid, waypoint)
-
-        # For the out connections that involve complex paths, register the
-        # intermediate waypoints if any
+        self.lane_to_id[id(lane)] = (self.road_id, self.lane_id)
+        self.id_to_lane[(self.road_id, self.lane_id)] = lane
+
+    def _waypoints_for(self, lane):
+        """
+        Answer the waypoints of the lane followed by the intermediate ones of
+        its out connections, that are numbered after them
+        """
+        waypoints = list(lane.waypoints_for(LinesAndArcsGeometry))
         for connection in lane.out_connections_for(LinesAndArcsGeometry):
-            for waypoint in connection.intermediate_waypoints():
-                self.waypoint_id = self.waypoint_id + 1
-                waypoint_uid = ('CONNECTION_' + self.road_id, self.lane_id, self.waypoint_id)
-                self._register(waypoint_uid, waypoint)
-
-    def _register(self, object_id, object):
-        """We do some caching by id, to avoid computing hashes if they are
-        expensive, but keep the hash-based dict as a fallback"""
-        self.object_to_id_level_1[id(object)] = object_id
-        self.object_to_id_level_2[object] = object_id
-        self.id_to_object[object_id] = object
+            waypoints.extend(connection.intermediate_waypoints())
+        return waypoints
+
+    def _waypoint_ids_for(self, lane):
+        lane_waypoints = lane.waypoints_for(LinesAndArcsGeometry)
+        waypoints_and_ids = self._lane_waypoint_ids.get(id(lane), None)
+        if waypoints_and_ids is None or waypoints_and_ids[0] is not lane_waypoints:
+            road_id, lane_id = self.lane_to_id[id(lane)]
+            ids_by_object_id = {}
+            ids_by_waypoint = {}
+            # Create a UID for each waypoint
+            for index, waypoint in enumerate(self._waypoints_for(lane)):
+                if index < len(lane_waypoints):
+                    waypoint_id = (road_id, lane_id, index + 1)
+                else:
+                    # For the out connections that involve complex paths,
+                    # register the intermediate waypoints if any
+                    waypoint_id = ('CONNECTION_' + road_id, lane_id, index + 1)
+                ids_by_object_id[id(waypoint)] = waypoint_id
+                # Equal waypoints are answered the id of the first one
+                ids_by_waypoint.setdefault(waypoint, waypoint_id)
+            waypoints_and_ids = (lane_waypoints, ids_by_object_id, ids_by_waypoint)
+            self._lane_waypoint_ids[id(lane)] = waypoints_and_ids
+        return waypoints_and_ids[1:]
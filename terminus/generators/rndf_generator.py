@@ -32,10 +32,15 @@ class RNDFGenerator(FileGenerator):
     def __init__(self, city, origin):
         super(RNDFGenerator, self).__init__(city)
         self.origin = origin
+        self.projector = origin.enu_projector()
         self.id_mapper = RNDFIdMapper(city)
+        # (waypoints, latlons) of the lanes of the road being written, by
+        # lane id
+        self._latlons_by_lane = {}
 
     def start_document(self):
         self.id_mapper.run()
+        self._latlons_by_lane = {}
 
     def end_city(self, city):
         self._wrap_document_with_contents_for(city)
@@ -59,6 +64,11 @@ class RNDFGenerator(FileGenerator):
     def end_road(self, road):
         self._append_to_document("""
         end_segment""")
+        # The lanes of the road are written, so their geometries can be
+        # evicted if over budget. Waypoint ids are looked up again if needed
+        self.id_mapper.forget_waypoints()
+        self._latlons_by_lane = {}
+        self.city.enforce_geometry_budget()
 
     def end_street(self, street):
         self.end_road(street)
@@ -101,8 +111,23 @@ class RNDFGenerator(FileGenerator):
         return waypoint_connections
 
     def translate_point(self, point):
-        center = (point.y, point.x)
-        return self.origin.translate(center)
+        return self.projector.to_latlon(point)
+
+    def waypoints_with_latlons_for(self, lane):
+        """
+        Answer (waypoint, latlon) pairs for the waypoints of the lane, all
+        translated in a single batch the first time they are needed while
+        writing the road
+        """
+        waypoints = self.waypoints_for(lane)
+        if not waypoints:
+            return []
+        cached_waypoints, latlons = self._latlons_by_lane.get(id(lane), (None, None))
+        if cached_waypoints is not waypoints:
+            centers = map(lambda waypoint: waypoint.center(), waypoints)
+            latlons = self.projector.to_latlons(centers)
+            self._latlons_by_lane[id(lane)] = (waypoints, latlons)
+        return zip(waypoints, latlons)
 
     # TODO: Put {{inner_contents}} on a different line while keeping RNDF
     # proper format.
@@ -122,8 +147,7 @@ class RNDFGenerator(FileGenerator):
         {% for waypoint_connection in generator.waypoint_connections_for(model) %}
         exit\t{{waypoint_connection[0]}}\t{{waypoint_connection[1]}}
         {% endfor %}
-        {% for waypoint in generator.waypoints_for(model) %}
-        {% set latlon = generator.translate_point(waypoint.center()) %}
+        {% for waypoint, latlon in generator.waypoints_with_latlons_for(model) %}
         {% set lat = latlon.lat %}
         {% set lon = latlon.lon %}
         {{generator.id_for(waypoint)}}\t{{'{0:0.6f}'.format(lat)}}\t{{'{0:0.6f}'.format(lon)}}
@@ -16,12 +16,18 @@ limitations under the License.
 
 from city_visitor import CityVisitor
 from models.polyline_geometry import PolylineGeometry
+from models.waypoint import Waypoint
 
 
 class RNDFIdMapper(CityVisitor):
     """Simple city visitor that generates the RNDF ids for segments,
     lanes and waypoints. Ids and objects are stored in two dictionaries,
-    so we can later perform lookups in either way"""
+    so we can later perform lookups in either way.
+
+    A waypoint id is made of the id of its lane and its position in it, so
+    the waypoints of a lane are only mapped when one of them is first looked
+    up, and can be forgotten (see `forget_waypoints`) so the mapper doesn't
+    keep the lane geometries alive"""
 
     # Note: For the time being we treat streets and trunks in the same way,
     # hence generating a single lane for any of them. This will change in the
@@ -29,22 +35,34 @@ class RNDFIdMapper(CityVisitor):
 
     def run(self):
         self.segment_id = 0
-        self.waypoint_id = 0
         self.lane_id = 0
         self.object_to_id_level_1 = {}
         self.object_to_id_level_2 = {}
         self.id_to_object = {}
+        self.forget_waypoints()
         super(RNDFIdMapper, self).run()
 
     def id_for(self, object):
+        if isinstance(object, Waypoint):
+            return self._id_for_waypoint(object)
         try:
             return self.object_to_id_level_1[id(object)]
         except KeyError:
             return self.object_to_id_level_2[object]
 
     def object_for(self, id):
+        if id.count('.') == 2:
+            lane_id, waypoint_id = id.rsplit('.', 1)
+            return self.object_for(lane_id).waypoints_for(PolylineGeometry)[int(waypoint_id) - 1]
         return self.id_to_object[id]
 
+    def forget_waypoints(self):
+        """
+        Drop the waypoints mapped so far. They are mapped again, out of the
+        current lane geometries, when looked up
+        """
+        self._waypoint_indexes = {}
+
     def map_road(self, road):
         self.segment_id = self.segment_id + 1
         self.lane_id = 0
@@ -60,11 +78,25 @@ class RNDFIdMapper(CityVisitor):
         self.lane_id = self.lane_id + 1
         rndf_lane_id = str(self.segment_id) + '.' + str(self.lane_id)
         self._register(rndf_lane_id, lane)
-        self.waypoint_id = 0
-        for waypoint in lane.waypoints_for(PolylineGeometry):
-            self.waypoint_id = self.waypoint_id + 1
-            rndf_waypoint_id = rndf_lane_id + '.' + str(self.waypoint_id)
-            self._register(rndf_waypoint_id, waypoint)
+
+    def _id_for_waypoint(self, waypoint):
+        lane = waypoint.lane()
+        waypoints = lane.waypoints_for(PolylineGeometry)
+        waypoints_and_indexes = self._waypoint_indexes.get(id(lane), None)
+        if waypoints_and_indexes is None or waypoints_and_indexes[0] is not waypoints:
+            indexes_by_object_id = {}
+            indexes_by_waypoint = {}
+            for index, lane_waypoint in enumerate(waypoints):
+                indexes_by_object_id[id(lane_waypoint)] = index
+                # Equal waypoints are answered the index of the first one
+                indexes_by_waypoint.setdefault(lane_waypoint, index)
+            waypoints_and_indexes = (waypoints, indexes_by_object_id, indexes_by_waypoint)
+            self._waypoint_indexes[id(lane)] = waypoints_and_indexes
+        index = waypoints_and_indexes[1].get(id(waypoint), None)
+        if index is None:
+            # An equal waypoint from a previous build of the lane geometry
+            index = waypoints_and_indexes[2][waypoint]
+        return self.id_for(lane) + '.' + str(index + 1)
 
     def _register(self, rndf_id, object):
         """We do some caching by id, to avoid computing hashes if they are
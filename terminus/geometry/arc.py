@@ -20,9 +20,14 @@ from geometry.circle import Circle
 from geometry.point import Point
 # Avoid module circular dependencies
 import geometry.line_segment
+import geometry.bounding_box
 
 
 class Arc(object):
+    """A circular arc. Arcs are not modified once created, so the quantities
+    derived from their parameters (center, circle, length) are computed
+    lazily, once.
+    """
 
     def __init__(self, start_point, theta, radius, angular_length):
         """
@@ -38,6 +43,10 @@ class Arc(object):
         self._radius = float(radius)
         self._angular_length = angular_length
         self._end_point = self._compute_point_at(angular_length)
+        self._center = None
+        self._center_to_start = None
+        self._circle = None
+        self._length = None
 
     @classmethod
     def from_points_in_circle(cls, start_point, end_point, circle):
@@ -82,20 +91,50 @@ class Arc(object):
         """
         Answers the point that is the center of the circular arc
         """
-        theta_in_radians = math.radians(self._theta)
-        direction_multiplier = math.copysign(1, self._angular_length)
-        vector = Point(-self._radius * direction_multiplier * math.sin(theta_in_radians),
-                       self._radius * direction_multiplier * math.cos(theta_in_radians))
-        return self._start_point + vector
+        if self._center is None:
+            theta_in_radians = math.radians(self._theta)
+            direction_multiplier = math.copysign(1, self._angular_length)
+            vector = Point(-self._radius * direction_multiplier * math.sin(theta_in_radians),
+                           self._radius * direction_multiplier * math.cos(theta_in_radians))
+            self._center = self._start_point + vector
+        return self._center
 
     def circle(self):
-        return Circle(self.center_point(), self.radius())
+        if self._circle is None:
+            self._circle = Circle(self.center_point(), self.radius())
+        return self._circle
 
     def length(self):
         """
         The length of the perimeter of the arc
         """
-        return abs(math.pi * self._radius * self._angular_length / 180.0)
+        if self._length is None:
+            self._length = abs(math.pi * self._radius * self._angular_length / 180.0)
+        return self._length
+
+    def bounding_box(self):
+        """
+        Answer the smallest box that contains the arc: the one defined by its
+        end points and the extreme points of the circle the arc goes through
+        """
+        center = self.center_point()
+        points = [self.start_point(), self.end_point()]
+        for vector in [Point(self._radius, 0), Point(0, self._radius), Point(-self._radius, 0), Point(0, -self._radius)]:
+            extreme_point = center + vector
+            if self.includes_point(extreme_point):
+                points.append(extreme_point)
+        origin = reduce(lambda point, other: point.min(other), points)
+        corner = reduce(lambda point, other: point.max(other), points)
+        return geometry.bounding_box.BoundingBox(origin, corner)
+
+    def bounding_circle(self):
+        """
+        Answer a circle containing the arc, centered in its middle point. As
+        no point of the arc is farther than half its length from there, that
+        is used as radius.
+        """
+        length = self.length()
+        return Circle(self.point_at_offset(length / 2.0), length / 2.0)
 
     def _clip_angle_to_360(self, angle):
         return angle % 360
@@ -175,19 +214,22 @@ class Arc(object):
         parametrize with a given buffer to contemplate rounding errors
         """
         center = self.center_point()
-        center_start = self._start_point - center
+        center_start = self._center_to_start_vector()
         center_point = point - center
         if abs(center_point.norm() - self._radius) > buffer:
             return False
+        # Tolerance over the angles, for the buffer to be a distance along
+        # the arc
+        angular_buffer = math.degrees(buffer / self._radius)
         angle_between_vectors = center_start.angle(center_point)
-        if abs(angle_between_vectors) < buffer:
+        if abs(angle_between_vectors) < angular_buffer:
             # this solves some problems that come from approximate calculations
             return True
         if self._angular_length >= 0:
-            return buffer >= self._clip_angle_to_360(angle_between_vectors) - self._angular_length
+            return angular_buffer >= self._clip_angle_to_360(angle_between_vectors) - self._angular_length
         else:
-            return self._angular_length - (self._clip_angle_to_360(angle_between_vectors) - 360) < buffer or \
-                abs(angle_between_vectors) < buffer
+            return self._angular_length - (self._clip_angle_to_360(angle_between_vectors) - 360) < angular_buffer or \
+                abs(angle_between_vectors) < angular_buffer
 
     def extend(self, distance):
         """
@@ -214,7 +256,7 @@ class Arc(object):
         return abs(math.pi * self._radius * angle / 180.0)
 
     def points_at_linear_offset(self, reference_point, offset):
-        circle1 = Circle(self.center_point(), self.radius())
+        circle1 = self.circle()
         circle2 = Circle(reference_point, abs(offset))
         intersections = circle1.intersection(circle2)
         if circle1.almost_equal_to(circle2):
@@ -287,15 +329,19 @@ class Arc(object):
     def _angular_offset_for_point(self, point):
         if not self.includes_point(point):
             raise ValueError("{0} is not included in arc {1}".format(point, self))
-        center = self.center_point()
-        center_start = self._start_point - center
-        center_point = point - center
-        if abs(center_start.angle(center_point)) < 1e-7:
+        center_point = point - self.center_point()
+        angle = self._center_to_start_vector().angle(center_point)
+        if abs(angle) < 1e-7:
             return 0
         if self.angular_length() >= 0:
-            return self._clip_angle_to_360(center_start.angle(center_point))
+            return self._clip_angle_to_360(angle)
         else:
-            return self._clip_angle_to_360(center_start.angle(center_point)) - 360
+            return self._clip_angle_to_360(angle) - 360
+
+    def _center_to_start_vector(self):
+        if self._center_to_start is None:
+            self._center_to_start = self._start_point - self.center_point()
+        return self._center_to_start
 
     def is_valid_path_connection(self):
         return round(self.radius(), 7) > 4.1
@@ -0,0 +1,302 @@
+"""
+Copyright (C) 2017 Open Source Robotics Foundation
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import numpy as np
+
+from geometry.point import Point
+from geometry.arc import Arc
+from geometry.line_segment import LineSegment
+from geometry.path import Path
+
+
+class ArrayPath(object):
+    """An array-backed version of a Path: instead of a list of LineSegment
+    and Arc objects, it keeps the description of each element in a set of
+    NumPy arrays (one item per element), so queries can be answered with
+    vector operations over all the elements at once. Convert from and to
+    a regular Path using `from_path` and `to_path`.
+    """
+
+    LINE_SEGMENT = 0
+    ARC = 1
+
+    def __init__(self, kinds, start_points, end_points, start_headings, lengths, radii, angular_lengths):
+        """
+        kinds: LINE_SEGMENT or ARC, for each element
+        start_points, end_points: (n, 3) arrays with the elements end points
+        start_headings: the heading (in degrees) at the start of each element
+        lengths: the length of each element
+        radii, angular_lengths: the arc parameters (zero for line segments)
+        """
+        self._kinds = np.asarray(kinds, dtype=np.int8)
+        self._start_points = np.asarray(start_points, dtype=np.float64).reshape(-1, 3)
+        self._end_points = np.asarray(end_points, dtype=np.float64).reshape(-1, 3)
+        self._start_headings = np.asarray(start_headings, dtype=np.float64)
+        self._lengths = np.asarray(lengths, dtype=np.float64)
+        self._radii = np.asarray(radii, dtype=np.float64)
+        self._angular_lengths = np.asarray(angular_lengths, dtype=np.float64)
+        self._offsets = np.concatenate(([0.0], np.cumsum(self._lengths)))
+        self._arcs = self._kinds == ArrayPath.ARC
+        self._segments = np.logical_not(self._arcs)
+        self._centers = self._compute_centers()
+
+    @classmethod
+    def from_path(cls, path):
+        kinds = []
+        start_points = []
+        end_points = []
+        start_headings = []
+        lengths = []
+        radii = []
+        angular_lengths = []
+        for element in path.elements():
+            if isinstance(element, LineSegment):
+                kinds.append(cls.LINE_SEGMENT)
+                radii.append(0.0)
+                angular_lengths.append(0.0)
+            elif isinstance(element, Arc):
+                kinds.append(cls.ARC)
+                radii.append(element.radius())
+                angular_lengths.append(element.angular_length())
+            else:
+                raise ValueError("{0} is not supported by ArrayPath".format(element))
+            start_points.append(element.start_point().to_tuple())
+            end_points.append(element.end_point().to_tuple())
+            start_headings.append(element.start_heading())
+            lengths.append(element.length())
+        return cls(kinds, start_points, end_points, start_headings, lengths, radii, angular_lengths)
+
+    def to_path(self):
+        elements = []
+        for index in range(self.elements_count()):
+            start_point = Point.from_tuple(self._start_points[index].tolist())
+            if self._kinds[index] == ArrayPath.ARC:
+                elements.append(Arc(start_point,
+                                    float(self._start_headings[index]),
+                                    float(self._radii[index]),
+                                    float(self._angular_lengths[index])))
+            else:
+                end_point = Point.from_tuple(self._end_points[index].tolist())
+                elements.append(LineSegment(start_point, end_point))
+        return Path(elements)
+
+    def elements_count(self):
+        return len(self._kinds)
+
+    def kinds(self):
+        return self._kinds
+
+    def lengths(self):
+        return self._lengths
+
+    def element_offsets(self):
+        """
+        Answer the offset where each element starts, plus the path length as
+        the last item.
+        """
+        return self._offsets
+
+    def length(self):
+        return float(self._offsets[-1])
+
+    def points_at_offsets(self, offsets):
+        """
+        Vectorized version of `Path.point_at_offset`: returns a (n, 3) array
+        with the point of the path at each of the given offsets.
+        """
+        offsets = np.atleast_1d(np.asarray(offsets, dtype=np.float64))
+        if offsets.size and offsets.max() > self._offsets[-1]:
+            message = "Provided offset ({0}) is greater that path length ({1})".format(offsets.max(), self.length())
+            raise ValueError(message)
+        indexes = np.searchsorted(self._offsets, offsets, side='left') - 1
+        indexes = np.clip(indexes, 0, self.elements_count() - 1)
+        remaining = np.minimum(offsets - self._offsets[indexes], self._lengths[indexes])
+        return self._points_at(indexes, remaining)
+
+    def point_at_offset(self, offset):
+        return Point.from_tuple(self.points_at_offsets([offset])[0].tolist())
+
+    def elements_including_point(self, point, buffer=1e-7):
+        """
+        Answer a boolean array telling which elements include the given point.
+        Same criteria as `LineSegment.includes_point` and `Arc.includes_point`.
+        """
+        target = np.array(point.to_tuple(), dtype=np.float64)
+        included = np.zeros(self.elements_count(), dtype=bool)
+
+        # Line segments
+        directions = self._end_points - self._start_points
+        to_point = target - self._start_points
+        cross_norms = np.linalg.norm(np.cross(directions, to_point), axis=1)
+        dots = np.einsum('ij,ij->i', directions, to_point)
+        lengths = np.linalg.norm(directions, axis=1)
+        included_in_segment = (cross_norms <= buffer * lengths) & (dots >= -buffer * lengths) & \
+            (dots <= (lengths + buffer) * lengths)
+        # Degenerate segments only include points around their start
+        empty = lengths == 0.0
+        if empty.any():
+            included_in_segment[empty] = np.linalg.norm(to_point[empty], axis=1) <= buffer
+        included[self._segments] = included_in_segment[self._segments]
+
+        # Arcs
+        if self._arcs.any():
+            centers = self._centers[self._arcs]
+            radii = self._radii[self._arcs]
+            angular_lengths = self._angular_lengths[self._arcs]
+            center_to_start = self._start_points[self._arcs] - centers
+            center_to_point = target - centers
+            on_circle = np.abs(np.linalg.norm(center_to_point, axis=1) - radii) <= buffer
+            angular_buffers = np.degrees(buffer / radii)
+            angles = self._angles_between(center_to_start, center_to_point)
+            clipped_angles = np.mod(angles, 360)
+            counter_clockwise = angular_buffers >= clipped_angles - angular_lengths
+            clockwise = angular_lengths - (clipped_angles - 360) < angular_buffers
+            in_range = np.where(angular_lengths >= 0, counter_clockwise, clockwise)
+            included[self._arcs] = on_circle & ((np.abs(angles) < angular_buffers) | in_range)
+
+        return included
+
+    def includes_point(self, point, buffer=1e-7):
+        return bool(self.elements_including_point(point, buffer).any())
+
+    def find_circle_intersection(self, circle):
+        """
+        Vectorized version of `Path.find_intersection` for circles. Returns the
+        intersection points sorted by element; when an element is crossed twice
+        the order of both points may differ from the one returned by Path.
+        """
+        center = np.array(circle.center().to_tuple(), dtype=np.float64)
+        radius = circle.radius()
+        candidates = []
+
+        # Line segments: solve |start + u * direction - center| = radius
+        directions = self._end_points - self._start_points
+        local_starts = self._start_points - center
+        a = np.einsum('ij,ij->i', directions, directions)
+        b = 2 * (directions[:, 0] * local_starts[:, 0] + directions[:, 1] * local_starts[:, 1])
+        c = np.einsum('ij,ij->i', local_starts, local_starts) - radius ** 2
+        delta = b ** 2 - 4 * a * c
+        valid = self._segments & (delta >= 0) & (a > 0)
+        sqrt_delta = np.sqrt(np.where(valid, delta, 0.0))
+        safe_a = np.where(valid, a, 1.0)
+        for sign in [1, -1]:
+            u = (-b + sign * sqrt_delta) / (2 * safe_a)
+            points = self._start_points + directions * u[:, np.newaxis]
+            # A tangent segment yields the same point twice
+            mask = valid if sign == 1 else valid & (delta > 0)
+            candidates.append((np.nonzero(mask)[0], points[mask]))
+
+        # Arcs: intersect the supporting circles
+        centers_delta = center - self._centers
+        distances = np.hypot(centers_delta[:, 0], centers_delta[:, 1])
+        valid = self._arcs & (distances > 0) & \
+            (distances <= self._radii + radius) & (distances >= np.abs(self._radii - radius))
+        safe_distances = np.where(valid, distances, 1.0)
+        along = (self._radii ** 2 - radius ** 2 + distances ** 2) / (2 * safe_distances)
+        across = np.sqrt(np.maximum(self._radii ** 2 - along ** 2, 0.0))
+        unit = centers_delta / safe_distances[:, np.newaxis]
+        base = self._centers + unit * along[:, np.newaxis]
+        perpendicular = np.column_stack((-unit[:, 1], unit[:, 0], np.zeros(len(unit))))
+        for sign in [1, -1]:
+            points = base + perpendicular * (sign * across)[:, np.newaxis]
+            mask = valid if sign == 1 else valid & (across > 0)
+            candidates.append((np.nonzero(mask)[0], points[mask]))
+
+        indexes = np.concatenate([index for index, _ in candidates])
+        points = np.concatenate([point for _, point in candidates]).reshape(-1, 3)
+        order = np.argsort(indexes, kind='mergesort')
+
+        intersections = []
+        for index, coordinates in zip(indexes[order].tolist(), points[order].tolist()):
+            point = Point.from_tuple(coordinates)
+            if self._element_at(index).includes_point(point):
+                intersections.append(point)
+        return intersections
+
+    def line_interpolation_points(self, step=1):
+        """
+        Vectorized version of `Path.line_interpolation_points`. Line segments
+        contribute their end points and arcs a point every `step` meters.
+        """
+        if self.elements_count() == 0:
+            return []
+        # Same criteria used in Arc.line_interpolation_points: a point every
+        # `step` meters plus an extra one if the end point is far enough.
+        counts = np.maximum(np.floor((self._lengths - step) / step) + 1, 0).astype(int)
+        extra = self._lengths - counts * step > step / 2
+        counts = np.where(self._arcs, counts + extra, 1)
+
+        indexes = np.repeat(np.arange(self.elements_count()), counts)
+        starts = np.repeat(np.cumsum(counts) - counts, counts)
+        remaining = (np.arange(len(indexes)) - starts) * float(step)
+        coordinates = self._points_at(indexes, remaining)
+        coordinates[~self._arcs[indexes]] = self._start_points[indexes[~self._arcs[indexes]]]
+        points = map(lambda tuple: Point.from_tuple(tuple), coordinates.tolist())
+        points.append(Point.from_tuple(self._end_points[-1].tolist()))
+        return points
+
+    def _points_at(self, indexes, remaining):
+        start_points = self._start_points[indexes]
+        headings = self._start_headings[indexes]
+        # Line segments
+        directions = self._end_points[indexes] - start_points
+        lengths = self._lengths[indexes]
+        safe_lengths = np.where(lengths > 0, lengths, 1.0)
+        segment_points = start_points + directions / safe_lengths[:, np.newaxis] * remaining[:, np.newaxis]
+        # LineSegment.point_at_offset answers 2D points
+        segment_points[:, 2] = 0.0
+        # Arcs
+        radii = self._radii[indexes]
+        safe_radii = np.where(radii > 0, radii, 1.0)
+        angular_offsets = np.copysign(remaining, self._angular_lengths[indexes]) * 180 / (np.pi * safe_radii)
+        theta = np.radians(headings)
+        angles = theta + np.radians(angular_offsets)
+        multipliers = np.copysign(1, angular_offsets)
+        arc_points = start_points.copy()
+        arc_points[:, 0] += radii * multipliers * (np.sin(angles) - np.sin(theta))
+        arc_points[:, 1] += radii * multipliers * (np.cos(theta) - np.cos(angles))
+        return np.where((self._kinds[indexes] == ArrayPath.ARC)[:, np.newaxis], arc_points, segment_points)
+
+    def _compute_centers(self):
+        theta = np.radians(self._start_headings)
+        multipliers = np.copysign(1, self._angular_lengths)
+        centers = self._start_points.copy()
+        centers[:, 0] -= self._radii * multipliers * np.sin(theta)
+        centers[:, 1] += self._radii * multipliers * np.cos(theta)
+        centers[self._segments] = 0.0
+        return centers
+
+    def _angles_between(self, vectors, other_vectors):
+        """
+        Same as Point.angle, for each pair of vectors
+        """
+        angles = np.degrees(np.arctan2(other_vectors[:, 1], other_vectors[:, 0]) -
+                            np.arctan2(vectors[:, 1], vectors[:, 0]))
+        angles = np.where(angles <= -180, angles + 360, angles)
+        return np.where(angles > 180, angles - 360, angles)
+
+    def _element_at(self, index):
+        start_point = Point.from_tuple(self._start_points[index].tolist())
+        if self._kinds[index] == ArrayPath.ARC:
+            return Arc(start_point, float(self._start_headings[index]),
+                       float(self._radii[index]), float(self._angular_lengths[index]))
+        return LineSegment(start_point, Point.from_tuple(self._end_points[index].tolist()))
+
+    def __len__(self):
+        return self.elements_count()
+
+    def __repr__(self):
+        return "ArrayPath({0} elements)".format(self.elements_count())
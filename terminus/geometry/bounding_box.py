@@ -15,7 +15,8 @@ limitations under the License.
 """
 
 from geometry.point import Point
-from geometry.line_segment import LineSegment
+# Avoid module circular dependencies
+import geometry.line_segment
 
 
 class BoundingBox(object):
@@ -43,6 +44,14 @@ class BoundingBox(object):
     def includes_point(self, point):
         return (self.origin <= point) and (point <= self.corner)
 
+    def intersects(self, other):
+        """
+        Answer if both boxes overlap when projected in the xy plane (boxes
+        that just touch are considered as overlapping)
+        """
+        return self.origin.x <= other.corner.x and other.origin.x <= self.corner.x and \
+            self.origin.y <= other.corner.y and other.origin.y <= self.corner.y
+
     def merge(self, other):
         merge_origin = self.origin.min(other.origin)
         merge_corner = self.corner.max(other.corner)
@@ -73,10 +82,10 @@ class BoundingBox(object):
 
     def perimeter(self):
         return [
-            LineSegment(self.top_left(), self.top_right()),
-            LineSegment(self.top_right(), self.bottom_right()),
-            LineSegment(self.bottom_right(), self.bottom_left()),
-            LineSegment(self.bottom_left(), self.top_left())
+            geometry.line_segment.LineSegment(self.top_left(), self.top_right()),
+            geometry.line_segment.LineSegment(self.top_right(), self.bottom_right()),
+            geometry.line_segment.LineSegment(self.bottom_right(), self.bottom_left()),
+            geometry.line_segment.LineSegment(self.bottom_left(), self.top_left())
         ]
 
     def _normalize(self):
@@ -63,6 +63,29 @@ class Ecef(object):
         lat_in_degrees = math.degrees(lat_in_radians)
         return latlon.LatLon(lat_in_degrees, lon_in_degrees)
 
+    @classmethod
+    def arrays_to_latlon(cls, xs, ys, zs):
+        """
+        Vectorized version of `to_latlon`. Given three sequences with the x, y
+        and z ECEF coordinates, returns two NumPy arrays with the latitudes
+        and longitudes (in degrees) of the points. Note that, unlike
+        `to_latlon`, the values are not wrapped in LatLon objects.
+        """
+        xs = np.asarray(xs, dtype=np.float64)
+        ys = np.asarray(ys, dtype=np.float64)
+        zs = np.asarray(zs, dtype=np.float64)
+        lons_in_degrees = np.degrees(np.arctan2(ys, xs))
+        xy_norms = np.sqrt(xs ** 2 + ys ** 2)
+        a = Ecef.equatorial_radius()
+        b = Ecef.polar_radius()
+        p = Ecef.second_eccectricity_parameter()
+        e = Ecef.first_eccentricity_parameter()
+        angles = np.arctan((zs * a) / (xy_norms * b))
+        lats_in_radians = np.arctan((zs + ((p ** 2) * b * (np.sin(angles) ** 3))) /
+                                    (xy_norms - (e ** 2) * a * (np.cos(angles) ** 3)))
+        lats_in_degrees = np.degrees(lats_in_radians)
+        return lats_in_degrees, lons_in_degrees
+
     def to_global(self, origin):
         # this doesn't work at the poles because longitude is not uniquely defined there
         sin_lon = origin._sin_lon()
@@ -18,6 +18,7 @@ import math
 import numpy as np
 import latlon
 import ecef
+from geometry.point import Point
 
 
 class Enu(object):
@@ -45,3 +46,85 @@ class Enu(object):
         enu_vector = np.array([[self.e], [self.n], [self.u]])
         ecef_vector = np.dot(global_to_ecef_matrix, enu_vector)
         return ecef.Ecef(ecef_vector[0][0], ecef_vector[1][0], ecef_vector[2][0])
+
+
+class EnuProjector(object):
+    """
+    Projects (lat, lon) coordinates on the plane that is tangent to the Earth
+    at a given origin. Building the projector computes the origin ECEF position
+    and the rotation matrix once, so that whole batches of coordinates can be
+    converted with a single NumPy pass instead of going through an `Ecef` and
+    an `Enu` object for each one of them.
+    """
+
+    def __init__(self, origin):
+        # this doesn't work at the poles because longitude is not uniquely defined there
+        self._origin = origin
+        origin_in_ecef = origin.to_ecef()
+        self._origin_in_ecef = np.array([[origin_in_ecef.x],
+                                         [origin_in_ecef.y],
+                                         [origin_in_ecef.z]])
+        sin_lon = origin._sin_lon()
+        sin_lat = origin._sin_lat()
+        cos_lon = origin._cos_lon()
+        cos_lat = origin._cos_lat()
+        self._ecef_to_global_matrix = np.array([[-sin_lon, cos_lon, 0.0],
+                                                [-cos_lon * sin_lat, -sin_lon * sin_lat, cos_lat],
+                                                [cos_lon * cos_lat, sin_lon * cos_lat, sin_lat]])
+        self._global_to_ecef_matrix = np.array([[-sin_lon, -cos_lon * sin_lat, cos_lon * cos_lat],
+                                                [cos_lon, - sin_lon * sin_lat, sin_lon * cos_lat],
+                                                [0, cos_lat, sin_lat]])
+
+    def origin(self):
+        return self._origin
+
+    def to_enu_arrays(self, lats, lons):
+        """
+        Given two sequences of latitudes and longitudes, returns three NumPy
+        arrays with the east, north and up coordinates (in meters) of each
+        point relative to the origin.
+        """
+        lats, lons = latlon.LatLon.normalized_arrays(lats, lons)
+        x, y, z = latlon.LatLon.arrays_to_ecef(lats, lons)
+        local_vectors_in_ecef = np.vstack((x, y, z)) - self._origin_in_ecef
+        enu_vectors = np.dot(self._ecef_to_global_matrix, local_vectors_in_ecef)
+        return enu_vectors[0], enu_vectors[1], enu_vectors[2]
+
+    def to_points(self, lats, lons):
+        """
+        Given two sequences of latitudes and longitudes, returns a list of
+        `Point`s with the projected (east, north) coordinates.
+        """
+        easts, norths, _ = self.to_enu_arrays(lats, lons)
+        return [Point(east, north, 0) for east, north in zip(easts.tolist(), norths.tolist())]
+
+    def to_point(self, lat_lon):
+        return self.to_points([lat_lon.lat], [lat_lon.lon])[0]
+
+    def to_latlon_arrays(self, easts, norths, ups=None):
+        """
+        Inverse of `to_enu_arrays`. Given sequences with the east, north and
+        (optionally) up coordinates of some points relative to the origin,
+        returns two NumPy arrays with their latitudes and longitudes.
+        """
+        easts = np.asarray(easts, dtype=np.float64)
+        norths = np.asarray(norths, dtype=np.float64)
+        if ups is None:
+            ups = np.zeros(len(easts))
+        enu_vectors = np.vstack((easts, norths, np.asarray(ups, dtype=np.float64)))
+        ecef_vectors = np.dot(self._global_to_ecef_matrix, enu_vectors) + self._origin_in_ecef
+        return ecef.Ecef.arrays_to_latlon(ecef_vectors[0], ecef_vectors[1], ecef_vectors[2])
+
+    def to_latlons(self, points):
+        """
+        Given a sequence of `Point`s in the tangent plane, returns the list of
+        LatLon objects they map to. As in `LatLon.translate`, the points are
+        assumed to lay on the plane (i.e. their z coordinate is ignored).
+        """
+        easts = [point.x for point in points]
+        norths = [point.y for point in points]
+        lats, lons = self.to_latlon_arrays(easts, norths)
+        return [latlon.LatLon(lat, lon) for lat, lon in zip(lats.tolist(), lons.tolist())]
+
+    def to_latlon(self, point):
+        return self.to_latlons([point])[0]
@@ -0,0 +1,122 @@
+"""
+Copyright (C) 2017 Open Source Robotics Foundation
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+# Optional fixed-point coordinates mode.
+#
+# When enabled, model coordinates (road node centers, waypoint centers and
+# path vertices) are snapped to integer multiples of a fixed resolution, e.g.
+# whole nanometres, as soon as they are created. Two points that stand for
+# the same place then have exactly the same coordinates, so they can be
+# compared and hashed exactly (through their integer coordinates) instead of
+# rounding them first. Geometry computations still use floats.
+#
+# The mode is global and disabled by default. It must be enabled before the
+# city is built, as points created before are not snapped.
+#
+# Geometry elements consider points at most 1e-7 away from them to be on
+# them, however long they are, so the resolution must be well below that:
+# snapping to e.g. micrometres would move points off the paths they were
+# computed from.
+
+from contextlib import contextmanager
+
+from geometry.point import Point
+
+NANOMETRES = 1e-9
+# Coarsest resolution that keeps snapped points within the geometry tolerance
+MAX_RESOLUTION = 1e-8
+
+_resolution = None
+# Resolution units per metre
+_scale = None
+
+
+def enable(resolution=NANOMETRES):
+    global _resolution, _scale
+    if not 0 < resolution <= MAX_RESOLUTION:
+        raise ValueError("Resolution must be positive and at most {0}, {1} given".format(MAX_RESOLUTION, resolution))
+    _resolution = float(resolution)
+    _scale = 1.0 / _resolution
+    # Prefer dividing by an exact integer (e.g. 1e9 instead of 999999999.99...)
+    if abs(_scale - round(_scale)) < 1e-6:
+        _scale = round(_scale)
+
+
+def disable():
+    global _resolution, _scale
+    _resolution = None
+    _scale = None
+
+
+def is_enabled():
+    return _resolution is not None
+
+
+def resolution():
+    return _resolution
+
+
+@contextmanager
+def enabled(resolution=NANOMETRES):
+    """
+    Enable the mode while running the body of a with statement
+    """
+    previous_resolution = _resolution
+    enable(resolution)
+    try:
+        yield
+    finally:
+        if previous_resolution is None:
+            disable()
+        else:
+            enable(previous_resolution)
+
+
+def to_fixed(value):
+    """
+    Answer the value as an integer number of resolution units
+    """
+    return int(round(value * _scale))
+
+
+def fixed_coordinates(point):
+    return (to_fixed(point.x), to_fixed(point.y), to_fixed(point.z))
+
+
+def snapped(point):
+    """
+    Answer the point snapped to the fixed-point grid. If the mode is disabled
+    the same point is answered
+    """
+    if _resolution is None:
+        return point
+    x, y, z = fixed_coordinates(point)
+    snapped_point = Point(x / _scale, y / _scale, z / _scale)
+    if snapped_point == point:
+        return point
+    return snapped_point
+
+
+def same_point(point, other, decimals):
+    """
+    Answer whether both points stand for the same place. In fixed-point mode
+    they are the same if they snap to the same integer coordinates, the
+    exact relation used to hash and compare snapped points and nodes.
+    Otherwise the points are rounded to the given decimals
+    """
+    if _resolution is None:
+        return point.almost_equal_to(other, decimals)
+    return point == other or fixed_coordinates(point) == fixed_coordinates(other)
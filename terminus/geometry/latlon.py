@@ -67,6 +67,43 @@ class LatLon(object):
     def __repr__(self):
         return 'LatLon(%s, %s)' % (self.lat, self.lon)
 
+    @classmethod
+    def normalized_arrays(cls, lats, lons):
+        """
+        Vectorized version of the normalization performed on creation. Given
+        two sequences of latitudes and longitudes, returns two NumPy arrays
+        with the normalized values.
+        """
+        lats = np.mod(np.asarray(lats, dtype=np.float64), 360)
+        lons = np.mod(np.asarray(lons, dtype=np.float64), 360)
+
+        lons = np.where(lons <= 180, lons, lons - 360)
+
+        flipped = (lats > 90) & (lats <= 270)
+        antimeridian_lons = np.where(lons >= 0, lons - 180, lons + 180)
+        lons = np.where(flipped, antimeridian_lons, lons)
+        lats = np.where(flipped, 180 - lats, np.where(lats > 270, lats - 360, lats))
+
+        lons = np.where((lats == 90) | (lats == -90), 0.0, lons)
+        return lats, lons
+
+    @classmethod
+    def arrays_to_ecef(cls, lats, lons):
+        """
+        Vectorized version of `to_ecef`. Given two sequences of (already
+        normalized) latitudes and longitudes, returns the x, y and z ECEF
+        coordinates as three NumPy arrays.
+        """
+        lats_in_radians = np.radians(lats)
+        lons_in_radians = np.radians(lons)
+        sin_lats = np.sin(lats_in_radians)
+        cos_lats = np.cos(lats_in_radians)
+        curvatures = ecef.Ecef.equatorial_radius() / np.sqrt(1 - ecef.Ecef.first_eccentricity_parameter() ** 2 * sin_lats ** 2)
+        x = curvatures * cos_lats * np.cos(lons_in_radians)
+        y = curvatures * cos_lats * np.sin(lons_in_radians)
+        z = ((ecef.Ecef.polar_radius() ** 2) / (ecef.Ecef.equatorial_radius() ** 2)) * curvatures * sin_lats
+        return x, y, z
+
     def sum(self, other):
         return LatLon(self.lat + other.lat, self.lon + other.lon)
 
@@ -81,6 +118,13 @@ class LatLon(object):
         z = ((ecef.Ecef.polar_radius() ** 2) / (ecef.Ecef.equatorial_radius() ** 2)) * self.curvature() * self._sin_lat()
         return ecef.Ecef(x, y, z)
 
+    def enu_projector(self):
+        """
+        Returns a projector to convert coordinates in bulk from and to the
+        plane that is tangent to the Earth on this LatLon point.
+        """
+        return enu.EnuProjector(self)
+
     def translate(self, delta_lat_lon):
         """
         Given LatLon point and a delta_lat_lon tuple, returns a LatLon point
@@ -21,13 +21,22 @@ from geometry.point import Point
 # Avoid module circular dependencies
 import geometry.arc
 import geometry.circle
+import geometry.bounding_box
 
 
 class LineSegment(object):
+    """A segment from point a to point b. Segments are not modified once
+    created, so the quantities derived from their end points are computed
+    lazily, once.
+    """
 
     def __init__(self, point_a, point_b):
         self.a = point_a
         self.b = point_b
+        self._direction = None
+        self._length = None
+        self._unit_direction = None
+        self._heading = None
 
     @classmethod
     def from_tuples(cls, t1, t2):
@@ -41,22 +50,31 @@ class LineSegment(object):
         return cls(point, point + Point(dx, dy))
 
     def includes_point(self, point, buffer=1e-7):
-        # First check if the a->b and a->point are collinear. If they are,
-        # the cross product should be zero (with some buffer for errors)
-        cross_product = (self.b - self.a).cross_product(point - self.a)
-        if cross_product.norm() > buffer:
+        """
+        Answer if the point is at most `buffer` away from the segment, to
+        contemplate rounding errors
+        """
+        direction = self.direction_vector()
+        length = direction.norm()
+        start_to_point = point - self.a
+        if length == 0.0:
+            return start_to_point.norm() <= buffer
+
+        # First check the distance from the point to the a->b line. The norm
+        # of the cross product is that distance times the length of a->b
+        cross_product = direction.cross_product(start_to_point)
+        if cross_product.norm() > buffer * length:
             return False
 
-        # If the dot product between a->b and a->point is negative then
-        # point lays outside the a---b boundaries
-        dot_product = (self.b - self.a).dot_product(point - self.a)
-        if dot_product + buffer < 0.0:
+        # The dot product is the position of the point projected over a->b,
+        # again times its length. If it is negative the point lays before a
+        dot_product = direction.dot_product(start_to_point)
+        if dot_product < -buffer * length:
             return False
 
-        # Finally if it is greater than the a->b squared distance it also lays
-        # out of bounds
-        distance = self.a.squared_distance_to(self.b)
-        if dot_product - distance > buffer:
+        # Finally if it is greater than the a->b squared distance it lays
+        # after b
+        if dot_product > (length + buffer) * length:
             return False
 
         return True
@@ -68,10 +86,35 @@ class LineSegment(object):
         return self.b
 
     def direction_vector(self):
-        return self.b - self.a
+        if self._direction is None:
+            self._direction = self.b - self.a
+        return self._direction
 
     def length(self):
-        return self.direction_vector().norm()
+        if self._length is None:
+            self._length = self.direction_vector().norm()
+        return self._length
+
+    def unit_direction(self):
+        """
+        Answer the (dx, dy) components of the direction of the segment on the
+        XY plane, normalized
+        """
+        if self._unit_direction is None:
+            dx = self.b.x - self.a.x
+            dy = self.b.y - self.a.y
+            linelen = math.hypot(dx, dy)
+            self._unit_direction = (dx / linelen, dy / linelen)
+        return self._unit_direction
+
+    def bounding_box(self):
+        return geometry.bounding_box.BoundingBox(self.a.min(self.b), self.a.max(self.b))
+
+    def bounding_circle(self):
+        """
+        Answer the smallest circle containing the segment
+        """
+        return geometry.circle.Circle(self.a.mid_point(self.b), self.length() / 2.0)
 
     def translate_by(self, point):
         return LineSegment(self.start_point() + point, self.end_point() + point)
@@ -255,12 +298,9 @@ class LineSegment(object):
         """
         if offset > self.length():
             raise ValueError("Offset ({0})is greater than segment length ({1})".format(offset, self.length()))
-        dx = self.b.x - self.a.x
-        dy = self.b.y - self.a.y
-        linelen = math.hypot(dx, dy)
-
-        return Point(self.a.x + dx / linelen * offset,
-                     self.a.y + dy / linelen * offset)
+        unit_dx, unit_dy = self.unit_direction()
+        return Point(self.a.x + unit_dx * offset,
+                     self.a.y + unit_dy * offset)
 
     def points_at_linear_offset(self, reference_point, offset):
         circle = geometry.circle.Circle(reference_point, abs(offset))
@@ -278,7 +318,9 @@ class LineSegment(object):
         return LineSegment(self.a, self.b)
 
     def start_heading(self):
-        return math.degrees(self.a.yaw(self.b))
+        if self._heading is None:
+            self._heading = math.degrees(self.a.yaw(self.b))
+        return self._heading
 
     def end_heading(self):
         # Heading doesn't change in a line segment
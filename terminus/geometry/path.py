@@ -14,9 +14,14 @@ See the License for the specific language governing permissions and
 limitations under the License.
 """
 
+import bisect
+import numpy as np
+
 from geometry.point import Point
 from geometry.circle import Circle
 from geometry.line_segment import LineSegment
+from geometry.uniform_grid import UniformGrid
+from geometry import fixed_point
 
 
 class Path(object):
@@ -28,6 +33,10 @@ class Path(object):
         self._elements = []
         if elements:
             self._elements.extend(elements)
+        self._offsets = None
+        self._lengths = None
+        self._bounding_circles = None
+        self._grid = None
 
     @classmethod
     def polyline_from_points(cls, points):
@@ -78,19 +87,35 @@ class Path(object):
         return self.start_point() == self.end_point()
 
     def length(self):
-        return sum(map(lambda element: element.length(), self.elements()))
+        return self._element_offsets()[-1]
 
     def remove_first_element(self):
+        self._invalidate_offsets()
         return self._elements.pop(0)
 
     def replace_first_element(self, new_element):
+        self._invalidate_offsets()
         self._elements[0] = new_element
 
+    def replace_element(self, index, new_elements):
+        """
+        Replace the element at the given index with a sequence of elements
+        covering the same stretch of the path
+        """
+        self._invalidate_offsets()
+        self._elements[index:index + 1] = new_elements
+
     def add_element(self, element):
         if self.not_empty() and \
-           not self.end_point().almost_equal_to(element.start_point(), 7):
+           not fixed_point.same_point(self.end_point(), element.start_point(), 7):
             raise ValueError("{0} start point doesn't match path last point {1}".format(element, self.end_point()))
         self._elements.append(element)
+        if self._offsets is not None:
+            length = element.length()
+            self._lengths.append(length)
+            self._offsets.append(self._offsets[-1] + length)
+        self._bounding_circles = None
+        self._grid = None
 
     def reversed(self):
         copied_elements = list(self._elements).reverse()
@@ -99,7 +124,7 @@ class Path(object):
     def vertices(self):
         points = map(lambda element: element.start_point(), self._elements)
         points.append(self.end_point())
-        return points
+        return map(fixed_point.snapped, points)
 
     def is_valid_path_connection(self):
         return all(element.is_valid_path_connection() for element in self._elements)
@@ -155,6 +180,7 @@ class Path(object):
             index += 1
         new_primitives.append(previous_primitive)
         self._elements = new_primitives
+        self._invalidate_offsets()
 
     def trim_to_fit(self, bounding_box):
         paths = [Path()]
@@ -168,51 +194,41 @@ class Path(object):
                 split = element.trim_to_fit(bounding_box)
                 for sub_element in split:
                     if current_path.not_empty() and \
-                       not current_path.end_point().almost_equal_to(sub_element.start_point(), 7):
+                       not fixed_point.same_point(current_path.end_point(), sub_element.start_point(), 7):
                         current_path = Path()
                         paths.append(current_path)
                     current_path.add_element(sub_element)
         return paths
 
     def heading_at_offset(self, offset):
-        # TODO: Refactor with point_at_offset
-        remaining_distance = offset
-        for element in self.elements():
-            if element.length() < remaining_distance:
-                remaining_distance -= element.length()
-            else:
-                return element.heading_at_offset(remaining_distance)
-        message = "Provided offset ({0}) is greater that path length ({1})".format(offset, self.length())
-        raise ValueError(message)
+        index, remaining_distance = self._locate_offset(offset)
+        return self.element_at(index).heading_at_offset(remaining_distance)
 
     def heading_at_point(self, point, start_offset=0.0):
-        # TODO: Improve performance
-        offset = self.offset_for_point(point, start_offset)
-        return self.heading_at_offset(offset)
+        # Ask the element directly, so the result doesn't depend on the
+        # lengths of the elements before it
+        index, element_offset = self._locate_point(point, start_offset)
+        return self.element_at(index).heading_at_offset(element_offset)
 
     def point_at_offset(self, offset):
-        remaining_distance = offset
-        for element in self.elements():
-            if element.length() < remaining_distance:
-                remaining_distance -= element.length()
-            else:
-                return element.point_at_offset(remaining_distance)
-        message = "Provided offset ({0}) is greater that path length ({1})".format(offset, self.length())
-        raise ValueError(message)
+        index, remaining_distance = self._locate_offset(offset)
+        return self.element_at(index).point_at_offset(remaining_distance)
 
     def offset_for_point(self, point, start_offset=0.0):
-        accumulated_distance = 0
-        for element in self.elements():
-            if element.includes_point(point):
-                matching_offset = accumulated_distance + element.offset_for_point(point)
-                if matching_offset >= start_offset:
-                    return matching_offset
-                else:
-                    accumulated_distance += element.length()
-            else:
-                accumulated_distance += element.length()
-        message = "Point {0} does not exist in path {1}".format(point, self)
-        raise ValueError(message)
+        """
+        Answer the offset of the first occurrence of point in the path that is
+        not before start_offset. As the elements that end before start_offset
+        are not even checked, it can also be used as a hint to make sequential
+        queries on the same path cheap.
+        """
+        index, element_offset = self._locate_point(point, start_offset)
+        return self._element_offsets()[index] + element_offset
+
+    def element_index_at_offset(self, offset):
+        return self._locate_offset(offset)[0]
+
+    def element_start_offset(self, index):
+        return self._element_offsets()[index]
 
     def line_interpolation_points(self):
         points = []
@@ -230,26 +246,129 @@ class Path(object):
         # this as a placeholder for the future. Fail loud if other is not a circle.
         if isinstance(other, Circle):
             intersections = []
-            for element in self._elements:
-                intersections.extend(element.find_intersection(other))
+            for index in self.element_indexes_near_circle(other):
+                intersections.extend(self._elements[index].find_intersection(other))
             return intersections
         else:
             raise ValueError("Intersection between {0} and {1} not supported".format(self, other))
 
+    def element_indexes_near_circle(self, circle, tolerance=1e-5):
+        """
+        Answer, in path order, the indexes of the elements that may intersect
+        the given circle. Only the elements whose bounding box reaches the
+        box around the circle are checked (see _element_grid), and they are
+        discarded using their bounding circles: an element whose bounding
+        circle doesn't reach the circumference can't intersect it.
+        """
+        reach = circle.radius() + tolerance
+        candidates = self._element_grid().items_near(circle.center(), reach)
+        if not candidates:
+            return []
+        candidates = np.array(candidates)
+        centers, radii = self._element_bounding_circles()
+        distances = np.linalg.norm(centers[candidates] - circle.center().to_tuple(), axis=1)
+        near = np.abs(distances - circle.radius()) <= radii[candidates] + tolerance
+        return candidates[near].tolist()
+
     def split_in(self, waypoints):
         primitives = []
         waypoint_index = 0
         for element in self.elements():
             current_center = waypoints[waypoint_index].center()
             pairs = []
-            while not current_center.almost_equal_to(element.end_point(), 7):
+            while not fixed_point.same_point(current_center, element.end_point(), 7):
                 waypoint_index += 1
                 next_center = waypoints[waypoint_index].center()
                 pairs.append((current_center, next_center))
                 current_center = next_center
-            primitives.extend(element.split_into(pairs))
+            if len(pairs) == 1 and pairs[0] == (element.start_point(), element.end_point()):
+                # Nothing to split, keep the element as it is
+                primitives.append(element)
+            else:
+                primitives.extend(element.split_into(pairs))
         return Path(primitives)
 
+    def _element_offsets(self):
+        """
+        Answer the prefix sum of the elements lengths: the n-th item is the
+        offset where the n-th element starts and the last one is the length
+        of the whole path. Lazily computed and discarded when the elements
+        change.
+        """
+        if self._offsets is None:
+            lengths = []
+            offsets = [0]
+            for element in self._elements:
+                length = element.length()
+                lengths.append(length)
+                offsets.append(offsets[-1] + length)
+            self._lengths = lengths
+            self._offsets = offsets
+        return self._offsets
+
+    def _invalidate_offsets(self):
+        self._offsets = None
+        self._lengths = None
+        self._bounding_circles = None
+        self._grid = None
+
+    def _element_grid(self):
+        """
+        Answer a UniformGrid with the index of each element, using cells as
+        big as the average element. Lazily computed and discarded when the
+        elements change.
+        """
+        if self._grid is None:
+            boxes = map(lambda element: element.bounding_box(), self._elements)
+            self._grid = UniformGrid.from_items(range(len(boxes)), boxes, UniformGrid.cell_size_for(boxes))
+        return self._grid
+
+    def _element_bounding_circles(self):
+        """
+        Answer the centers (as a (n, 3) array) and the radii of the elements
+        bounding circles. Lazily computed and discarded when the elements
+        change.
+        """
+        if self._bounding_circles is None:
+            circles = map(lambda element: element.bounding_circle(), self._elements)
+            centers = np.array(map(lambda circle: circle.center().to_tuple(), circles), dtype=np.float64).reshape(-1, 3)
+            radii = np.array(map(lambda circle: circle.radius(), circles), dtype=np.float64)
+            self._bounding_circles = (centers, radii)
+        return self._bounding_circles
+
+    def _locate_offset(self, offset):
+        """
+        Answer the index of the element that contains the given offset and
+        the remaining distance to travel from the start of that element.
+        """
+        offsets = self._element_offsets()
+        index = bisect.bisect_left(offsets, offset, 1) - 1
+        if index >= self.elements_count():
+            message = "Provided offset ({0}) is greater that path length ({1})".format(offset, self.length())
+            raise ValueError(message)
+        # Avoid overflowing the element due to floating point math
+        remaining_distance = min(offset - offsets[index], self._lengths[index])
+        return (index, remaining_distance)
+
+    def _locate_point(self, point, start_offset=0.0):
+        """
+        Answer the index of the element where the first occurrence of point
+        that is not before start_offset lays, and the offset of the point in
+        that element.
+        """
+        offsets = self._element_offsets()
+        # Start one element earlier than the one containing start_offset,
+        # so points laying in a boundary between elements are not missed
+        start_index = max(bisect.bisect_right(offsets, start_offset) - 2, 0)
+        for index in range(start_index, self.elements_count()):
+            element = self._elements[index]
+            if element.includes_point(point):
+                element_offset = element.offset_for_point(point)
+                if offsets[index] + element_offset >= start_offset:
+                    return (index, element_offset)
+        message = "Point {0} does not exist in path {1}".format(point, self)
+        raise ValueError(message)
+
     def __iter__(self):
         return iter(self._elements)
 
@@ -20,10 +20,20 @@ from numbers import Number
 
 
 class Point(object):
+    """A point (or vector) in 3D space.
+
+    Points are created in huge numbers, so they don't have a per-instance
+    dictionary, and are meant to be immutable: the hash is only computed the
+    first time it is needed.
+    """
+
+    __slots__ = ('x', 'y', 'z', '_hash')
+
     def __init__(self, x, y, z=0):
         self.x = float(x)
         self.y = float(y)
         self.z = float(z)
+        self._hash = None
 
     @classmethod
     def from_shapely(cls, shapely_point):
@@ -120,7 +130,10 @@ class Point(object):
         return math.atan2(diff.y, diff.x)
 
     def almost_equal_to(self, other, decimals):
-        return self.rounded_to(decimals) == other.rounded_to(decimals)
+        # Same as comparing the rounded points, without creating them
+        return round(self.x, decimals) == round(other.x, decimals) and \
+            round(self.y, decimals) == round(other.y, decimals) and \
+            round(self.z, decimals) == round(other.z, decimals)
 
     def rounded_to(self, decimals):
         return Point(round(self.x, decimals),
@@ -140,7 +153,12 @@ class Point(object):
         return not self.__eq__(other)
 
     def __hash__(self):
-        return hash((hash(self.x) << 4) + hash(self.y) + (hash(self.z) ^ 0xFFFFFF))
+        if self._hash is None:
+            self._hash = hash((hash(self.x) << 4) + hash(self.y) + (hash(self.z) ^ 0xFFFFFF))
+        return self._hash
+
+    def __reduce__(self):
+        return (Point, (self.x, self.y, self.z))
 
     def __repr__(self):
         return "Point({0}, {1}, {2})".format(self.x, self.y, self.z)
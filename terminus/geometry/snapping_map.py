@@ -0,0 +1,165 @@
+"""
+Copyright (C) 2017 Open Source Robotics Foundation
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import itertools
+import math
+from collections import OrderedDict
+
+
+class SnappingMap(object):
+    """A dictionary keyed by points, where looking up a point finds the entry
+    whose key is closer than a tolerance in each of the axes (the closest one
+    if there are many).
+
+    Keys are registered in a grid of cubic cells twice as big as the
+    tolerance, indexed by their integer coordinates, so a lookup only needs
+    to probe the (at most eight) cells around the point instead of scanning
+    all the keys. Unlike rounding points to build dictionary keys, points
+    that are close but fall on different sides of a rounding boundary still
+    match.
+
+    Entries keep their insertion order. Setting the value of a point that
+    matches an existing key replaces the value of that entry, keeping its
+    original key.
+    """
+
+    def __init__(self, tolerance):
+        if tolerance <= 0:
+            raise ValueError("Tolerance must be positive, {0} given".format(tolerance))
+        self._tolerance = float(tolerance)
+        self._cell_size = 2.0 * self._tolerance
+        self._cells = {}
+        self._entries = OrderedDict()
+        self._next_entry_id = itertools.count()
+
+    def tolerance(self):
+        return self._tolerance
+
+    def get(self, point, default=None):
+        entry_id = self._find(point)
+        if entry_id is None:
+            return default
+        return self._entries[entry_id][1]
+
+    def setdefault(self, point, default=None):
+        entry_id = self._find(point)
+        if entry_id is None:
+            self._add(point, default)
+            return default
+        return self._entries[entry_id][1]
+
+    def pop(self, point, *default):
+        entry_id = self._find(point)
+        if entry_id is None:
+            if default:
+                return default[0]
+            raise KeyError(point)
+        key, value = self._entries.pop(entry_id)
+        self._remove_from_cell(key, entry_id)
+        return value
+
+    def key_for(self, point):
+        """
+        Answer the key of the entry matched by the given point, or None if
+        there is none
+        """
+        entry_id = self._find(point)
+        if entry_id is None:
+            return None
+        return self._entries[entry_id][0]
+
+    def keys(self):
+        return map(lambda entry: entry[0], self._entries.itervalues())
+
+    def values(self):
+        return map(lambda entry: entry[1], self._entries.itervalues())
+
+    def items(self):
+        return map(tuple, self._entries.itervalues())
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __contains__(self, point):
+        return self._find(point) is not None
+
+    def __getitem__(self, point):
+        entry_id = self._find(point)
+        if entry_id is None:
+            raise KeyError(point)
+        return self._entries[entry_id][1]
+
+    def __setitem__(self, point, value):
+        entry_id = self._find(point)
+        if entry_id is None:
+            self._add(point, value)
+        else:
+            self._entries[entry_id][1] = value
+
+    def __delitem__(self, point):
+        self.pop(point)
+
+    def __repr__(self):
+        return "SnappingMap({0}, {1} entries)".format(self._tolerance, len(self))
+
+    def _add(self, point, value):
+        entry_id = next(self._next_entry_id)
+        self._entries[entry_id] = [point, value]
+        self._cells.setdefault(self._cell_of(point.x, point.y, point.z), []).append(entry_id)
+
+    def _remove_from_cell(self, point, entry_id):
+        cell = self._cell_of(point.x, point.y, point.z)
+        entry_ids = self._cells[cell]
+        entry_ids.remove(entry_id)
+        if not entry_ids:
+            del self._cells[cell]
+
+    def _cell_of(self, x, y, z):
+        size = self._cell_size
+        return (int(math.floor(x / size)), int(math.floor(y / size)), int(math.floor(z / size)))
+
+    def _cell_range(self, value):
+        # As cells are twice as big as the tolerance, the values around a
+        # coordinate span one or two cells (three at most when the division
+        # rounds both ends away from a cell in the middle)
+        size = self._cell_size
+        low = int(math.floor((value - self._tolerance) / size))
+        high = int(math.floor((value + self._tolerance) / size))
+        if low == high:
+            return (low,)
+        return range(low, high + 1)
+
+    def _find(self, point):
+        x, y, z = point.x, point.y, point.z
+        tolerance = self._tolerance
+        best_entry_id = None
+        best_distance = None
+        for cell in itertools.product(self._cell_range(x), self._cell_range(y), self._cell_range(z)):
+            for entry_id in self._cells.get(cell, ()):
+                key = self._entries[entry_id][0]
+                dx = abs(key.x - x)
+                dy = abs(key.y - y)
+                dz = abs(key.z - z)
+                if dx <= tolerance and dy <= tolerance and dz <= tolerance:
+                    distance = dx * dx + dy * dy + dz * dz
+                    if best_entry_id is None or distance < best_distance or \
+                       (distance == best_distance and entry_id < best_entry_id):
+                        best_entry_id = entry_id
+                        best_distance = distance
+        return best_entry_id
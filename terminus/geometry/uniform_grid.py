@@ -0,0 +1,116 @@
+"""
+Copyright (C) 2017 Open Source Robotics Foundation
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import math
+
+from geometry.point import Point
+from geometry.bounding_box import BoundingBox
+
+
+class UniformGrid(object):
+    """A spatial index that splits the xy plane in square cells of a fixed
+    size. Each item is registered in all the cells its bounding box touches,
+    so region queries only need to look at the items in the cells the region
+    covers instead of scanning all of them.
+    """
+
+    def __init__(self, cell_size):
+        if cell_size <= 0:
+            raise ValueError("Cell size must be positive, {0} given".format(cell_size))
+        self._cell_size = float(cell_size)
+        self._items = []
+        self._boxes = []
+        self._cells = {}
+
+    @classmethod
+    def from_items(cls, items, boxes, cell_size):
+        grid = cls(cell_size)
+        grid.add_all(items, boxes)
+        return grid
+
+    @classmethod
+    def cell_size_for(cls, boxes):
+        """Answer the average size of the given boxes (and at least 1), so
+        most of them span few cells"""
+        if not boxes:
+            return 1.0
+        sizes = map(lambda box: max(box.width(), box.height()), boxes)
+        return max(sum(sizes) / len(sizes), 1.0)
+
+    def cell_size(self):
+        return self._cell_size
+
+    def cells_count(self):
+        return len(self._cells)
+
+    def add(self, item, bounding_box):
+        index = len(self._items)
+        self._items.append(item)
+        self._boxes.append(bounding_box)
+        for cell in self._cells_covering(bounding_box):
+            self._cells.setdefault(cell, []).append(index)
+
+    def add_all(self, items, boxes):
+        if len(items) != len(boxes):
+            raise ValueError("Expected one bounding box per item")
+        for item, bounding_box in zip(items, boxes):
+            self.add(item, bounding_box)
+
+    def items(self):
+        return self._items
+
+    def items_in_box(self, bounding_box):
+        """
+        Answer the items whose bounding box overlaps the given one, in the same
+        order they were added
+        """
+        candidates = set()
+        for cell in self._occupied_cells_covering(bounding_box):
+            candidates.update(self._cells[cell])
+        return [self._items[index] for index in sorted(candidates) if self._boxes[index].intersects(bounding_box)]
+
+    def items_near(self, point, distance):
+        """
+        Answer the items whose bounding box is at most `distance` meters away
+        from the given point (measured in each axis)
+        """
+        delta = Point(distance, distance)
+        return self.items_in_box(BoundingBox(point - delta, point + delta))
+
+    def _cells_covering(self, bounding_box):
+        min_x, min_y = self._cell_for(bounding_box.origin)
+        max_x, max_y = self._cell_for(bounding_box.corner)
+        for x in range(min_x, max_x + 1):
+            for y in range(min_y, max_y + 1):
+                yield (x, y)
+
+    def _occupied_cells_covering(self, bounding_box):
+        """
+        Answer the cells with items that the given box touches. Big boxes may
+        cover many more cells than there are occupied ones, so in that case
+        only the occupied cells are checked
+        """
+        min_x, min_y = self._cell_for(bounding_box.origin)
+        max_x, max_y = self._cell_for(bounding_box.corner)
+        if (max_x - min_x + 1) * (max_y - min_y + 1) <= len(self._cells):
+            return filter(lambda cell: cell in self._cells, self._cells_covering(bounding_box))
+        return filter(lambda (x, y): min_x <= x <= max_x and min_y <= y <= max_y, self._cells.keys())
+
+    def _cell_for(self, point):
+        return (int(math.floor(point.x / self._cell_size)), int(math.floor(point.y / self._cell_size)))
+
+    def __len__(self):
+        return len(self._items)
@@ -14,10 +14,16 @@ See the License for the specific language governing permissions and
 limitations under the License.
 """
 
+import bisect
+import itertools
+from collections import OrderedDict
+
 from city_model import CityModel
 from datetime import date
 from road_intersection_node import RoadIntersectionNode
 from geometry.bounding_box import BoundingBox
+from geometry.snapping_map import SnappingMap
+from geometry import fixed_point
 from road import Road
 from building import Building
 from block import Block
@@ -34,6 +40,17 @@ class City(CityModel):
         self.buildings = []
         self.intersections = {}
         self._metadata = {}
+        # Roads and intersections edited since the last time stale geometries
+        # were discarded
+        self._dirty_roads = OrderedDict()
+        self._stale_intersections = OrderedDict()
+        # Roads by control point, each one along with its position in the
+        # roads collection, so intersections can be registered without going
+        # through all the roads
+        self._roads_by_control_point = SnappingMap(Road.CONTROL_POINT_TOLERANCE)
+        self._road_positions = {}
+        self._next_road_position = itertools.count()
+        self._geometry_pool = None
 
     def put_metadata(self, key, value):
         self._metadata[key] = value
@@ -46,12 +63,64 @@ class City(CityModel):
 
     def add_road(self, road):
         self.roads.append(road)
+        self._road_positions[id(road)] = next(self._next_road_position)
+        for node in road.nodes():
+            self._register_control_point(road, node.center)
+        road.added_to_city(self)
+        self._mark_road_as_dirty(road)
+        if self._geometry_pool is not None:
+            for lane in road.lanes():
+                lane.set_geometry_pool(self._geometry_pool)
         # We assume there will be globally way more intersections than nodes
         # in a street
         for node in road.nodes():
             if node.center in self.intersections:
                 intersection = self.intersections[node.center]
-                road.replace_node_at(node.center, intersection)
+                self.replace_node_at(road, node.center, intersection)
+
+    def remove_road(self, road):
+        # Roads are compared by contents, so look for this very one
+        index = next((index for index, other in enumerate(self.roads) if other is road), None)
+        if index is None:
+            raise ValueError("{0} is not in the city".format(road))
+        del self.roads[index]
+        for node in road.nodes():
+            self._unregister_control_point(road, node.center)
+        del self._road_positions[id(road)]
+        road.removed_from_city(self)
+        for node in road.nodes():
+            if node.is_intersection():
+                self._mark_intersection_as_stale(node)
+                if any(involved_road is road for involved_road in node.involved_roads()):
+                    node.removed_from(road)
+        for lane in road.lanes():
+            lane.discard_geometries()
+        self._dirty_roads.pop(id(road), None)
+
+    def replace_node_at(self, road, point, new_node):
+        """
+        Replace the road node at the given point (see Road.node_at_point),
+        keeping track of the geometries that are no longer valid
+        """
+        old_node = road.node_at_point(point)
+        if old_node is None:
+            raise ValueError("{0} has no node at {1}".format(road, point))
+        if old_node.is_intersection():
+            self._mark_intersection_as_stale(old_node)
+        road.replace_node_at(point, new_node)
+        if id(road) in self._road_positions:
+            self._register_control_point(road, new_node.center)
+        self._mark_road_as_dirty(road)
+
+    def control_point_added(self, road, point):
+        """
+        Keep track of a control point added to a road of the city, joining
+        the road to the intersection at that point, if any
+        """
+        self._register_control_point(road, point)
+        self._mark_road_as_dirty(road)
+        if point in self.intersections:
+            self.replace_node_at(road, point, self.intersections[point])
 
     def roads_count(self):
         return len(self.roads)
@@ -60,7 +129,11 @@ class City(CityModel):
         # Based on current tests, having a 1 deg angle tolerance seems to
         # give good results
         for road in self.roads:
+            node_count = road.node_count()
             road.trim_redundant_nodes(1.0)
+            if road.node_count() != node_count:
+                self._mark_road_as_dirty(road)
+        self._rebuild_control_point_index()
 
     def add_block(self, block):
         self.blocks.append(block)
@@ -69,14 +142,15 @@ class City(CityModel):
         self.buildings.append(building)
 
     def add_intersection_at(self, point):
+        point = fixed_point.snapped(point)
         if point not in self.intersections:
             intersection = RoadIntersectionNode(point)
             # Register intersection
             self.intersections[point] = intersection
             # Add to it existing roads that include that point
-            for road in self.roads:
+            for road in self._roads_at_control_point(point):
                 if road.includes_control_point(point):
-                    road.replace_node_at(point, intersection)
+                    self.replace_node_at(road, point, intersection)
 
     def intersections_count(self):
         return len(self.intersections)
@@ -101,5 +175,99 @@ class City(CityModel):
             building.accept(generator)
         generator.end_city(self)
 
+    def dirty_roads(self):
+        return self._dirty_roads.values()
+
+    def stale_intersections(self):
+        return self._stale_intersections.values()
+
+    def discard_stale_geometries(self):
+        """
+        Forget the lane geometries and junctions that are no longer valid
+        after the roads added, removed or changed (through the city) since
+        the last call, so they are computed again when needed. The geometries
+        of the lanes that didn't change are kept: only the junctions they
+        share with the changed ones are undone.
+        """
+        stale_intersections = self._stale_intersections
+        dirty_lanes = set()
+        for road in self._dirty_roads.values():
+            dirty_lanes.update(road.lanes())
+            for node in road.nodes():
+                if node.is_intersection():
+                    stale_intersections[id(node)] = node
+
+        for node in stale_intersections.values():
+            for lane in node.involved_lanes():
+                if lane not in dirty_lanes:
+                    lane.unresolve_intersection(node)
+
+        for lane in dirty_lanes:
+            lane.discard_geometries()
+
+        self._dirty_roads = OrderedDict()
+        self._stale_intersections = OrderedDict()
+
+    def set_geometry_pool(self, geometry_pool):
+        """
+        Keep the lane geometries of the city roads under the budget of the
+        given LaneGeometryPool (see `enforce_geometry_budget`). None stops
+        tracking them
+        """
+        self._geometry_pool = geometry_pool
+        for road in self.roads:
+            for lane in road.lanes():
+                lane.set_geometry_pool(geometry_pool)
+
+    def geometry_pool(self):
+        return self._geometry_pool
+
+    def enforce_geometry_budget(self):
+        """
+        Evict lane geometries until they fit in the budget of the geometry
+        pool, if any. Only safe once the output that needed them is written,
+        e.g. after each road (see LaneGeometryPool)
+        """
+        if self._geometry_pool is not None:
+            self._geometry_pool.enforce_budget()
+
+    def _roads_at_control_point(self, point):
+        """
+        Answer the roads that may include the given control point, in the
+        order they were added to the city. Roads may have been changed after
+        being added, so they still need to be checked
+        """
+        entries = self._roads_by_control_point.get(point, [])
+        return map(lambda entry: entry[1], entries)
+
+    def _register_control_point(self, road, point):
+        position = self._road_positions[id(road)]
+        entries = self._roads_by_control_point.setdefault(point, [])
+        positions = map(lambda entry: entry[0], entries)
+        if position not in positions:
+            entries.insert(bisect.bisect(positions, position), (position, road))
+
+    def _rebuild_control_point_index(self):
+        self._roads_by_control_point = SnappingMap(Road.CONTROL_POINT_TOLERANCE)
+        for road in self.roads:
+            for node in road.nodes():
+                self._register_control_point(road, node.center)
+
+    def _unregister_control_point(self, road, point):
+        position = self._road_positions[id(road)]
+        entries = filter(lambda entry: entry[0] != position, self._roads_by_control_point.get(point, []))
+        if entries:
+            self._roads_by_control_point[point] = entries
+        else:
+            self._roads_by_control_point.pop(point, None)
+
+    def _mark_road_as_dirty(self, road):
+        # Roads (and nodes) are compared by contents, which may change, so
+        # keep track of them by identity
+        self._dirty_roads[id(road)] = road
+
+    def _mark_intersection_as_stale(self, node):
+        self._stale_intersections[id(node)] = node
+
     def _box_list_from_list(self, list):
         return map(lambda x: x.bounding_box(), list)
@@ -16,9 +16,9 @@ limitations under the License.
 import math
 from collections import OrderedDict
 
-from geometry.circle import Circle
 from geometry.point import Point
 from geometry.path import Path
+from geometry.snapping_map import SnappingMap
 
 from waypoint import Waypoint
 from waypoint_connection import WaypointConnection
@@ -32,12 +32,52 @@ class JunctionNotSatisfied(Exception):
     pass
 
 
-class JunctionBuilder(object):
+class RadiusTooSmall(JunctionNotSatisfied):
+    pass
+
+
+class RadiusTooBig(JunctionNotSatisfied):
+    pass
 
-    def __init__(self, road_node, mapped_intersection_center, geometry_class):
+
+class JunctionBuilder(object):
+    """Connects the lanes that meet in a road node. Each pair of lanes is
+    connected between the points where they cross a circle centered in the
+    node, so the radius of that circle sets the shape of the connection.
+
+    Radii are taken from a fixed list (RADII), preferring the smallest one
+    that is not below PREFERRED_RADIUS or, if none works, the biggest one
+    below it. Small radii give tight connections that may not be valid
+    paths (see Arc.is_valid_path_connection), while big radii may not find
+    the lanes crossing the circle at all. So the radii that work for a
+    pair of lanes usually form an interval, and the preferred one is found
+    by bisecting the list instead of trying the radii one by one. When the
+    outcomes don't look like an interval, the radii are tried one by one.
+    A radius that works for all the pairs is looked for first; if there
+    isn't any, each pair gets its own.
+    """
+
+    RADII = [x / 2.0 for x in range(1, 31)]  # [0.5, 1.0, ..., 15.0]
+    PREFERRED_RADIUS = 5.0
+
+    # How a circle of a given radius works for connecting a pair of lanes
+    FITS = 'fits'
+    TOO_SMALL = 'too small'
+    TOO_BIG = 'too big'
+
+    def __init__(self, road_node, mapped_intersection_center, geometry_class, element_index=None):
         self._road_node = road_node
         self._mapped_intersection_center = mapped_intersection_center
         self._geometry_class = geometry_class
+        # An optional LaneElementIndex of the city, to find the lane elements
+        # around the junction without going through the whole lane paths
+        self._element_index = element_index
+        self._element_indexes_by_radius = {}
+        # The crossings between lanes and junction circles, and how each
+        # radius tried worked for each pair of lanes
+        self._crossings = {}
+        self._attempts = {}
+        self._lane_pairs = None
 
     def lanes(self):
         return self._road_node.involved_lanes()
@@ -49,12 +89,40 @@ class JunctionBuilder(object):
         return self._road_node.center
 
     def add_connections_to_lanes(self):
+        self.apply_connections(self.build_connections())
+
+    def build_connections(self):
+        """
+        Compute the connections between the lanes of the junction, without
+        modifying any of the lanes
+        """
         lane_pairs = self._create_lane_pairs()
-        try:
-            connections = self._fulfill_intersection_with_single_length(lane_pairs)
-        except JunctionNotSatisfied:
-            connections = self._fulfill_intersection_with_adaptive_approach(lane_pairs)
+        if not lane_pairs:
+            return []
+        # Try to connect all the pairs with the same radius
+        radius = self._search_radius(self._joint_outcome)
+        if radius is not None:
+            attempt = self._attempt_at(radius)
+            return map(lambda pair: attempt[pair][2], lane_pairs)
+
+        connections = []
+        for pair in lane_pairs:
+            # Look for a radius giving a valid connection for the pair or, if
+            # there is none, any connection at all
+            radius = self._search_radius(lambda radius: self._attempt_at(radius)[pair][0])
+            if radius is None:
+                radius = self._search_radius(lambda radius: self._attempt_at(radius)[pair][1])
+            if radius is None:
+                logger.warn("Missing connection between {0} and {1}".format(pair[0], pair[1]))
+            else:
+                connections.append(self._attempt_at(radius)[pair][2])
+        return connections
 
+    def apply_connections(self, connections):
+        """
+        Add the given connections to their waypoints and mark the junction as
+        resolved in all the involved lanes
+        """
         waypoints_by_lane = OrderedDict()
 
         for lane in self.lanes():
@@ -80,10 +148,14 @@ class JunctionBuilder(object):
                 waypoints_by_lane[entry_waypoint.lane()][hash(entry_waypoint)] = entry_waypoint
 
         for lane, waypoints in waypoints_by_lane.iteritems():
-            geometry = lane._lane_geometry(self._geometry_class)
-            geometry.resolve_intersection(self._road_node, set(waypoints.values()))
+            geometry = lane.geometry_for(self._geometry_class)
+            lane_connections = filter(lambda connection: connection.start_waypoint().lane() is lane or
+                                      connection.end_waypoint().lane() is lane, connections)
+            geometry.resolve_intersection(self._road_node, set(waypoints.values()), lane_connections)
 
     def _create_lane_pairs(self):
+        if self._lane_pairs is not None:
+            return self._lane_pairs
         lane_pairs = OrderedDict()
         node = self._road_node
         entry_lanes = []
@@ -101,76 +173,199 @@ class JunctionBuilder(object):
             for entry_lane in entry_lanes:
                 if exit_lane.road() is not entry_lane.road():
                     lane_pairs[(exit_lane, entry_lane)] = None
-        return lane_pairs
-
-    def _fulfill_intersection_with_single_length(self, lane_pairs):
-        radius_candidates = [5.0, 5.5, 6.0, 4.5, 6.5, 7.0]
-        for radius in radius_candidates:
-            try:
-                lane_pairs_copy = lane_pairs.copy()
-                return self._fulfill_intersections_with_circle_of_radius(radius, lane_pairs)
-            except JunctionNotSatisfied:
-                pass
-        raise JunctionNotSatisfied()
-
-    def _fulfill_intersections_with_circle_of_radius(self, radius, lane_pairs):
-        return self._create_lane_intersections(radius, lane_pairs).values()
-
-    def _create_lane_intersections(self, radius, lane_pairs, strict=True):
-        intersections = OrderedDict()
-        mapped_intersection_center = self.mapped_intersection_center()
-        intersection_center = self.intersection_center()
-        circle = Circle(intersection_center, radius)
-        node = self._road_node
-        for lane in self.lanes():
-            path = lane.path_for(self._geometry_class)
-            path_intersections = path.find_intersection(circle)
-
-            indexed_intersections = OrderedDict()
+        self._lane_pairs = lane_pairs.keys()
+        return self._lane_pairs
+
+    def _search_radius(self, outcome_for):
+        """
+        Answer the preferred radius for which the given function answers
+        FITS, or None. The function answers how a radius works (FITS,
+        TOO_SMALL or TOO_BIG), or None if it can't work but no other radius
+        will either.
+        """
+        radii = self.RADII
+        start = radii.index(self.PREFERRED_RADIUS)
+        outcome = outcome_for(radii[start])
+        if outcome == self.FITS:
+            return radii[start]
+        if outcome == self.TOO_SMALL:
+            # Look for the smallest radius that fits among the bigger ones
+            fitting = self._fitting_index_between(outcome_for, start, len(radii) - 1, self.TOO_SMALL)
+        elif outcome == self.TOO_BIG:
+            # Look for the biggest radius that fits among the smaller ones
+            fitting = self._fitting_index_between(outcome_for, start, 0, self.TOO_BIG)
+        else:
+            return None
+        if fitting is None:
+            # The outcomes are not an interval around the radii that fit
+            # (if any), so try them one by one
+            return self._scan_radii(outcome_for, start)
+        return radii[self._bisect(outcome_for, start, fitting)]
+
+    def _scan_radii(self, outcome_for, start):
+        """
+        Answer the first radius that fits trying the bigger ones than the
+        one at the given index, from the smallest, and then the smaller
+        ones, from the biggest, or None
+        """
+        radii = self.RADII
+        for index in range(start + 1, len(radii)) + range(start - 1, -1, -1):
+            if outcome_for(radii[index]) == self.FITS:
+                return radii[index]
+        return None
+
+    def _fitting_index_between(self, outcome_for, start, end, start_outcome):
+        """
+        Given the index of a radius that doesn't fit (with the given outcome)
+        and the index of the last radius to check in the direction it fails,
+        answer the index of some radius that fits in between, or None if
+        there is none or the outcomes are not the ones expected around an
+        interval of radii that fit
+        """
+        if start == end:
+            return None
+        outcome = outcome_for(self.RADII[end])
+        if outcome == self.FITS:
+            return end
+        if outcome != self._opposite(start_outcome):
+            return None
+        # The radii that fit, if any, are between a radius that fails on one
+        # side and one that fails on the other side
+        while abs(end - start) > 1:
+            middle = (start + end) / 2
+            outcome = outcome_for(self.RADII[middle])
+            if outcome == self.FITS:
+                return middle
+            elif outcome == start_outcome:
+                start = middle
+            elif outcome == self._opposite(start_outcome):
+                end = middle
+            else:
+                return None
+        return None
+
+    def _bisect(self, outcome_for, failing, fitting):
+        """
+        Answer the index of the radius that fits closest to the failing one,
+        given the index of a radius that fits
+        """
+        while abs(fitting - failing) > 1:
+            middle = (failing + fitting) / 2
+            if outcome_for(self.RADII[middle]) == self.FITS:
+                fitting = middle
+            else:
+                failing = middle
+        return fitting
+
+    def _opposite(self, outcome):
+        if outcome == self.TOO_SMALL:
+            return self.TOO_BIG
+        return self.TOO_SMALL
+
+    def _joint_outcome(self, radius):
+        """
+        Answer how the given radius works to connect all the lane pairs at
+        once. If it is too small for some pair and too big for another one,
+        no radius works for all of them
+        """
+        outcomes = set(map(lambda (strict_outcome, _, __): strict_outcome, self._attempt_at(radius).values()))
+        if outcomes == set([self.FITS]):
+            return self.FITS
+        outcomes.discard(self.FITS)
+        if len(outcomes) == 1:
+            return outcomes.pop()
+        return None
+
+    def _attempt_at(self, radius):
+        """
+        Try to connect all the lane pairs with the circle of the given
+        radius. Answer, for each pair, how the radius works to get a valid
+        connection, how it works to get any connection, and the connection
+        (if any)
+        """
+        if radius not in self._attempts:
+            # New waypoints are created on each attempt, as they will hold
+            # the connections of that attempt
+            intersections = {}
+            for lane in self.lanes():
+                crossings = self._lane_crossings_at(lane, radius)
+                intersections[lane] = self._get_waypoints_for_intersections(lane, crossings)
+            attempt = OrderedDict()
+            for exit_lane, entry_lane in self._create_lane_pairs():
+                attempt[(exit_lane, entry_lane)] = self._connect(intersections[exit_lane], intersections[entry_lane])
+            self._attempts[radius] = attempt
+        return self._attempts[radius]
+
+    def _connect(self, exit_intersections, entry_intersections):
+        try:
+            exit_waypoint = self._get_exit_waypoint_from_intersections(exit_intersections)
+            entry_waypoint = self._get_entry_waypoint_from_intersections(entry_intersections)
+        except RadiusTooSmall:
+            return (self.TOO_SMALL, self.TOO_SMALL, None)
+        except RadiusTooBig:
+            return (self.TOO_BIG, self.TOO_BIG, None)
+
+        if exit_waypoint.center().almost_equal_to(entry_waypoint.center(), 5):
+            return (self.TOO_SMALL, self.TOO_SMALL, None)
+
+        primitive = self._geometry_class.connect(exit_waypoint, entry_waypoint)
+        if not primitive:
+            return (self.TOO_SMALL, self.TOO_SMALL, None)
+        connection = WaypointConnection(exit_waypoint, entry_waypoint, primitive)
+        # Tighter connections are needed with smaller radii
+        if not primitive.is_valid_path_connection():
+            return (self.TOO_SMALL, self.FITS, connection)
+        return (self.FITS, self.FITS, connection)
+
+    def _lane_crossings_at(self, lane, radius):
+        """
+        Answer the points where the lane crosses the junction circle of the
+        given radius, each one with the lane heading there and the existing
+        lane waypoint at that point (if any).
+        """
+        key = (lane, radius)
+        if key not in self._crossings:
+            mapped_intersection_center = self.mapped_intersection_center()
+            geometry = lane.geometry_for(self._geometry_class)
+            element_indexes = self._element_indexes_around(lane, radius)
+            path_intersections = geometry.intersections_around(self._road_node, radius, element_indexes)
+
+            indexed_intersections = SnappingMap(1e-7)
             for intersection in path_intersections:
                 point = intersection.closest_point_to(mapped_intersection_center)
-                rounded_point = point.rounded_to(7)
-                indexed_intersections[rounded_point] = point
-            path_intersections = indexed_intersections.values()
-            intersections[lane] = self._get_waypoints_for_intersections(lane, path_intersections)
-
-        for (exit_lane, entry_lane) in lane_pairs.keys():
-            exit_waypoint = None
-            entry_waypoint = None
-            try:
-                exit_waypoint = self._get_exit_waypoint_from_intersections(intersections[exit_lane])
-                entry_waypoint = self._get_entry_waypoint_from_intersections(intersections[entry_lane])
-            # TODO: Improve this way of handling errors
-            except RuntimeError as error:
-                if strict:
-                    raise JunctionNotSatisfied()
-
-            if exit_waypoint and entry_waypoint:
-
-                if exit_waypoint.center().almost_equal_to(entry_waypoint.center(), 5):
-                    raise JunctionNotSatisfied()
-
-                primitive = self._geometry_class.connect(exit_waypoint, entry_waypoint)
-
-                if strict and (not primitive or not primitive.is_valid_path_connection()):
-                    raise JunctionNotSatisfied()
-
-                if primitive:
-                    lane_pairs[(exit_lane, entry_lane)] = WaypointConnection(exit_waypoint, entry_waypoint, primitive)
-
-        return lane_pairs
-
-    def _get_waypoints_for_intersections(self, lane, points):
-        new_waypoints = OrderedDict()
+                indexed_intersections[point] = point
+
+            crossings = []
+            for point in indexed_intersections.values():
+                waypoint = geometry.waypoint_at_point(point)
+                if waypoint:
+                    crossings.append((point, None, waypoint))
+                else:
+                    crossings.append((point, geometry.base_heading_at_point(point, element_indexes), None))
+            self._crossings[key] = crossings
+        return self._crossings[key]
+
+    def _element_indexes_around(self, lane, radius):
+        """
+        Answer the indexes of the lane base path elements that may cross the
+        junction circle of the given radius, or None if there is no element
+        index to ask
+        """
+        if self._element_index is None:
+            return None
+        if radius not in self._element_indexes_by_radius:
+            # Leave some room for crossings found slightly off the circle
+            indexes_by_lane = self._element_index.element_indexes_near(self.intersection_center(), radius + 1e-5)
+            self._element_indexes_by_radius[radius] = indexes_by_lane
+        return self._element_indexes_by_radius[radius].get(lane, [])
+
+    def _get_waypoints_for_intersections(self, lane, crossings):
         waypoints = []
-        for point in points:
-            geometry = lane._lane_geometry(self._geometry_class)
-            path = lane.path_for(self._geometry_class)
-            waypoint = geometry.waypoint_at_point(point)
+        for point, heading, waypoint in crossings:
+            # New waypoints are created on each attempt, as they will hold the
+            # connections of that attempt
             if not waypoint:
-                heading = path.heading_at_point(point)
                 waypoint = Waypoint(lane, point, heading, self._road_node)
-                new_waypoints[(lane, point.rounded_to(5))] = waypoint
             waypoints.append(waypoint)
         return waypoints
 
@@ -179,60 +374,19 @@ class JunctionBuilder(object):
             heading_vector = waypoint.heading_vector()
             waypoint_to_intersection = self.mapped_intersection_center() - waypoint.center()
             if waypoint_to_intersection.norm_squared() < 1e-2:
-                raise RuntimeError("Too close")
+                raise RadiusTooSmall("Too close")
             angle = heading_vector.angle(waypoint_to_intersection)
             if abs(angle) < 90.0:
                 return waypoint
-        raise RuntimeError("Expecting to find intersection")
+        raise RadiusTooBig("Expecting to find intersection")
 
     def _get_entry_waypoint_from_intersections(self, intersections):
         for waypoint in intersections:
             heading_vector = waypoint.heading_vector()
             waypoint_to_intersection = self.mapped_intersection_center() - waypoint.center()
             if waypoint_to_intersection.norm_squared() < 1e-2:
-                raise RuntimeError("Too close")
+                raise RadiusTooSmall("Too close")
             angle = heading_vector.angle(waypoint_to_intersection)
             if abs(angle) >= 90.0:
                 return waypoint
-        raise RuntimeError("Expecting to find intersection")
-
-    def _fulfill_intersection_with_adaptive_approach(self, lane_pairs):
-        up = [x / 2.0 for x in range(10, 31)]  # [5.0, 5.5, 6.0, ...]
-        down = [x / 2.0 for x in reversed(range(1, 10))]  # [4.5, 4.0, ...]
-        radius_candidates = up + down
-        lane_pairs_copy = lane_pairs.copy()
-
-        for radius in radius_candidates:
-            lane_pairs_copy = self._fill_missing_connections(radius, lane_pairs_copy, True)
-
-        for radius in radius_candidates:
-            lane_pairs_copy = self._fill_missing_connections(radius, lane_pairs_copy, False)
-
-        connections = []
-
-        for (exit_lane, entry_lane), connection in lane_pairs_copy.iteritems():
-            if connection:
-                connections.append(connection)
-            else:
-                logger.warn("Missing connection between {0} and {1}".format(exit_lane, entry_lane))
-
-        return connections
-
-    def _fill_missing_connections(self, radius, lane_pairs, strict):
-        missing_connections = OrderedDict()
-        for lanes, connection in lane_pairs.iteritems():
-            if connection is None:
-                missing_connections[lanes] = None
-
-        if not missing_connections:
-            return lane_pairs
-
-        try:
-            new_connections = self._create_lane_intersections(radius, missing_connections, strict)
-            for lanes, connection in new_connections.iteritems():
-                if connection is not None:
-                    lane_pairs[lanes] = connection
-            return lane_pairs
-
-        except JunctionNotSatisfied:
-            return lane_pairs
+        raise RadiusTooBig("Expecting to find intersection")
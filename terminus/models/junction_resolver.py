@@ -0,0 +1,246 @@
+"""
+Copyright (C) 2017 Open Source Robotics Foundation
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import multiprocessing
+
+from junction_builder import JunctionBuilder
+from lane_element_index import LaneElementIndex
+from lane_geometry_cache import LaneGeometryCache, road_digest
+from waypoint import Waypoint
+from waypoint_connection import WaypointConnection
+
+# The resolver whose junctions are being solved by the worker processes. As
+# workers are forked, they get a copy of the whole city through it without
+# having to pickle it.
+_active_resolver = None
+
+
+def _describe_junction_connections(index):
+    return _active_resolver._describe_connections(index)
+
+
+class JunctionResolver(object):
+    """Resolves all the pending junctions of a city for a given geometry
+    class, in the same order they would be lazily resolved when visiting the
+    lanes of each road.
+
+    Junctions are built on the lanes base paths (see LaneGeometry.base_path),
+    so building one doesn't depend on the others: all of them can be built at
+    once in a pool of worker processes. The resulting connections are then
+    added to the lanes in the original order, so the city ends up exactly as
+    if the junctions were resolved one at a time.
+
+    If a LaneGeometryCache is given, the connections of the junctions found
+    in it are restored instead of built, and the ones built are stored in it.
+    """
+
+    def __init__(self, city, geometry_class, workers=1, cache=None):
+        self._city = city
+        self._geometry_class = geometry_class
+        self._workers = workers
+        self._cache = cache
+        self._road_digests = {}
+        self._lane_references = self._build_lane_references()
+        self._junctions = self._pending_junctions()
+        # Built when the first junction is, see _lane_element_index
+        self._element_index = None
+
+    def junctions(self):
+        """
+        Answer the (road node, mapped intersection center) of each pending
+        junction, in resolution order
+        """
+        return self._junctions
+
+    def run(self):
+        if self._cache is not None:
+            self._run_with_cache()
+        elif self._workers <= 1 or len(self._junctions) <= 1:
+            for index in range(len(self._junctions)):
+                self._builder_for(index).add_connections_to_lanes()
+        else:
+            indexes = range(len(self._junctions))
+            for index, description in zip(indexes, self._describe_all_connections(indexes)):
+                self._apply_description(index, description)
+
+    def _run_with_cache(self):
+        descriptions = {}
+        missing_indexes = []
+        for index in range(len(self._junctions)):
+            cached_description = self._cache.get(self._cache_key(index))
+            if cached_description is None:
+                missing_indexes.append(index)
+            else:
+                descriptions[index] = self._from_cached_description(index, cached_description)
+
+        if self._workers <= 1 or len(missing_indexes) <= 1:
+            built_descriptions = map(self._describe_connections, missing_indexes)
+        else:
+            built_descriptions = self._describe_all_connections(missing_indexes)
+        for index, description in zip(missing_indexes, built_descriptions):
+            self._cache.put(self._cache_key(index), self._to_cached_description(index, description))
+            descriptions[index] = description
+
+        for index in range(len(self._junctions)):
+            self._apply_description(index, descriptions[index])
+
+    def _apply_description(self, index, description):
+        # Applying connections doesn't look for lane elements, so don't ask
+        # for the element index
+        node, mapped_intersection_center = self._junctions[index]
+        builder = JunctionBuilder(node, mapped_intersection_center, self._geometry_class)
+        builder.apply_connections(self._restore_connections(index, description))
+
+    def _describe_all_connections(self, indexes):
+        global _active_resolver
+        _active_resolver = self
+        # Build the index before forking, so workers share it
+        self._lane_element_index()
+        pool = multiprocessing.Pool(self._workers)
+        try:
+            # Send the junctions in a few big chunks, as each one is cheap
+            chunk_size = max(1, len(indexes) / (self._workers * 4))
+            return pool.map(_describe_junction_connections, indexes, chunk_size)
+        finally:
+            pool.close()
+            pool.join()
+            _active_resolver = None
+
+    def _builder_for(self, index):
+        node, mapped_intersection_center = self._junctions[index]
+        return JunctionBuilder(node, mapped_intersection_center, self._geometry_class,
+                               self._lane_element_index())
+
+    def _lane_element_index(self):
+        if self._element_index is None:
+            self._element_index = LaneElementIndex(self._city, self._geometry_class)
+        return self._element_index
+
+    def _pending_junctions(self):
+        # Mimic what happens when the lanes are visited in order: the first
+        # lane that reaches a junction resolves it for all the involved lanes
+        unresolved_by_lane = {}
+        for road in self._city.roads:
+            for lane in road.lanes():
+                geometry = lane.geometry_for(self._geometry_class)
+                unresolved_by_lane[lane] = geometry.unresolved_intersections()
+
+        junctions = []
+        for road in self._city.roads:
+            for lane in road.lanes():
+                geometry = lane.geometry_for(self._geometry_class)
+                for node in list(unresolved_by_lane[lane]):
+                    junctions.append((node, geometry.mapped_node_center(node)))
+                    for involved_lane in set(node.involved_lanes()):
+                        unresolved_by_lane[involved_lane].remove(node)
+        return junctions
+
+    def _build_lane_references(self):
+        references = {}
+        for road_index, road in enumerate(self._city.roads):
+            for lane_index, lane in enumerate(road.lanes()):
+                references[lane] = (road_index, lane_index)
+        return references
+
+    def _lane_at(self, reference):
+        road_index, lane_index = reference
+        return self._city.roads[road_index].lane_at(lane_index)
+
+    def _describe_connections(self, index):
+        """
+        Build the connections of a junction and answer a picklable description
+        of them. Waypoints that already exist in the lanes are referenced by
+        their center; new ones are described by a token (shared among the
+        connections using the same waypoint), their center and heading.
+        """
+        connections = self._builder_for(index).build_connections()
+        tokens = {}
+        description = []
+        for connection in connections:
+            start = self._describe_waypoint(connection.start_waypoint(), tokens)
+            end = self._describe_waypoint(connection.end_waypoint(), tokens)
+            description.append((start, end, connection.primitive()))
+        return description
+
+    def _describe_waypoint(self, waypoint, tokens):
+        lane = waypoint.lane()
+        reference = self._lane_references[lane]
+        geometry = lane.geometry_for(self._geometry_class)
+        if geometry.waypoint_at_point(waypoint.center()) is waypoint:
+            return (reference, None, waypoint.center(), None)
+        token = tokens.setdefault(id(waypoint), len(tokens))
+        return (reference, token, waypoint.center(), waypoint.heading())
+
+    def _restore_connections(self, index, description):
+        node = self._junctions[index][0]
+        new_waypoints = {}
+        connections = []
+        for start, end, primitive in description:
+            start_waypoint = self._restore_waypoint(start, node, new_waypoints)
+            end_waypoint = self._restore_waypoint(end, node, new_waypoints)
+            connections.append(WaypointConnection(start_waypoint, end_waypoint, primitive))
+        return connections
+
+    def _restore_waypoint(self, description, node, new_waypoints):
+        reference, token, center, heading = description
+        lane = self._lane_at(reference)
+        if token is None:
+            return lane.geometry_for(self._geometry_class).waypoint_at_point(center)
+        if token not in new_waypoints:
+            new_waypoints[token] = Waypoint(lane, center, heading, node)
+        return new_waypoints[token]
+
+    def _cache_key(self, index):
+        # The connections of a junction only depend on the roads that go
+        # through it
+        node = self._junctions[index][0]
+        digests = map(self._road_digest, node.involved_roads())
+        return LaneGeometryCache.key_for('junction connections',
+                                         self._geometry_class.__name__,
+                                         node.center.to_tuple(),
+                                         digests)
+
+    def _road_digest(self, road):
+        if id(road) not in self._road_digests:
+            self._road_digests[id(road)] = road_digest(road)
+        return self._road_digests[id(road)]
+
+    def _to_cached_description(self, index, description):
+        # City wide lane references are only meaningful for this city, so
+        # make them relative to the roads involved in the junction
+        roads = self._junctions[index][0].involved_roads()
+        positions = {}
+        for position, road in enumerate(roads):
+            positions.setdefault(id(road), position)
+        return self._map_references(description,
+                                    lambda (road_index, lane_index): (positions[id(self._city.roads[road_index])], lane_index))
+
+    def _from_cached_description(self, index, description):
+        roads = self._junctions[index][0].involved_roads()
+        return self._map_references(description,
+                                    lambda (position, lane_index): (self._road_index_of(roads[position]), lane_index))
+
+    def _road_index_of(self, road):
+        lane = road.lane_at(0)
+        return self._lane_references[lane][0]
+
+    def _map_references(self, description, mapping):
+        mapped_description = []
+        for start, end, primitive in description:
+            mapped_start = (mapping(start[0]),) + start[1:]
+            mapped_end = (mapping(end[0]),) + end[1:]
+            mapped_description.append((mapped_start, mapped_end, primitive))
+        return mapped_description
@@ -32,6 +32,7 @@ class Lane(object):
         self._offset = offset
         self._reversed = reversed
         self._cached_geometries = {}
+        self._geometry_pool = None
 
     def is_reversed(self):
         return self._reversed
@@ -61,6 +62,13 @@ class Lane(object):
     def road_nodes_count(self):
         return len(self.road_nodes())
 
+    def geometry_for(self, geometry_class):
+        """
+        Answer the LaneGeometry of the given class, building it (or restoring
+        it from the geometry pool) if needed
+        """
+        return self._lane_geometry(geometry_class)
+
     def waypoints_for(self, geometry_class):
         return self._lane_geometry(geometry_class).waypoints()
 
@@ -89,8 +97,66 @@ class Lane(object):
     def ends_on(self, road_node):
         return self.road_nodes()[-1] == road_node
 
+    def has_geometry(self, geometry_class):
+        return geometry_class in self._cached_geometries
+
+    def install_geometry(self, geometry):
+        """
+        Use the given (already built) geometry instead of building it on
+        first access
+        """
+        self._cached_geometries[geometry.species()] = geometry
+        if self._geometry_pool is not None:
+            self._geometry_pool.touch(self, geometry.species())
+
+    def built_geometry(self, geometry_class):
+        """
+        Answer the geometry of the given class if it is in memory, or None
+        """
+        return self._cached_geometries.get(geometry_class, None)
+
+    def drop_geometry(self, geometry_class):
+        """
+        Forget the geometry of the given class, so it is built (or restored)
+        again when needed, and answer it
+        """
+        return self._cached_geometries.pop(geometry_class)
+
+    def set_geometry_pool(self, geometry_pool):
+        """
+        Track the use of the lane geometries in the given LaneGeometryPool,
+        and ask it for the geometries it evicted
+        """
+        self._geometry_pool = geometry_pool
+        if geometry_pool is not None:
+            for geometry_class in self._cached_geometries:
+                geometry_pool.touch(self, geometry_class)
+
+    def unresolve_intersection(self, road_node, geometry_class=None):
+        """
+        Undo the junction at the given road node in all the geometries built
+        so far, or only in the one of the given class
+        """
+        if geometry_class is None:
+            geometries = self._cached_geometries.values()
+        else:
+            geometries = filter(None, [self.built_geometry(geometry_class)])
+        for geometry in geometries:
+            geometry.unresolve_intersection(road_node)
+
+    def discard_geometries(self):
+        self._cached_geometries = {}
+        if self._geometry_pool is not None:
+            self._geometry_pool.forget(self)
+
     def _lane_geometry(self, geometry_class):
         if geometry_class not in self._cached_geometries:
-            geometry = geometry_class(self)
+            geometry = None
+            if self._geometry_pool is not None:
+                geometry = self._geometry_pool.reload(self, geometry_class)
+            if geometry is None:
+                geometry = geometry_class(self)
             self._cached_geometries[geometry_class] = geometry
+        if self._geometry_pool is not None:
+            self._geometry_pool.touch(self, geometry_class)
         return self._cached_geometries[geometry_class]
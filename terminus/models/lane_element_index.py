@@ -0,0 +1,100 @@
+"""
+Copyright (C) 2017 Open Source Robotics Foundation
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+from geometry.uniform_grid import UniformGrid
+
+
+class LaneElementEntry(object):
+    """An element (line segment or arc) of the path of a lane, together with
+    its position in that path"""
+
+    def __init__(self, road, lane, element_index, element):
+        self._road = road
+        self._lane = lane
+        self._element_index = element_index
+        self._element = element
+
+    def road(self):
+        return self._road
+
+    def lane(self):
+        return self._lane
+
+    def element_index(self):
+        return self._element_index
+
+    def element(self):
+        return self._element
+
+    def __repr__(self):
+        return "LaneElementEntry({0}, {1}, {2})".format(self._lane, self._element_index, self._element)
+
+
+class LaneElementIndex(object):
+    """A spatial index over the path elements of all the lanes in a city, for
+    a given geometry class (e.g. PolylineGeometry or LinesAndArcsGeometry).
+    Answers which lane elements lie around a point or inside a box without
+    scanning every lane path.
+
+    The base paths of the lanes (see LaneGeometry.base_path) are indexed, as
+    they don't change when junctions are resolved.
+    """
+
+    def __init__(self, city, geometry_class, cell_size=None):
+        self._city = city
+        self._geometry_class = geometry_class
+        entries = self._collect_entries()
+        boxes = map(lambda entry: entry.element().bounding_box(), entries)
+        if cell_size is None:
+            cell_size = UniformGrid.cell_size_for(boxes)
+        self._grid = UniformGrid.from_items(entries, boxes, cell_size)
+
+    def city(self):
+        return self._city
+
+    def geometry_class(self):
+        return self._geometry_class
+
+    def entries(self):
+        return self._grid.items()
+
+    def entries_count(self):
+        return len(self._grid)
+
+    def elements_in_box(self, bounding_box):
+        return self._grid.items_in_box(bounding_box)
+
+    def elements_near(self, point, distance):
+        return self._grid.items_near(point, distance)
+
+    def element_indexes_near(self, point, distance):
+        """
+        Answer a dictionary with the indexes of the elements near the given
+        point (see `elements_near`) for each lane, in path order
+        """
+        indexes_by_lane = {}
+        for entry in self.elements_near(point, distance):
+            indexes_by_lane.setdefault(entry.lane(), []).append(entry.element_index())
+        return indexes_by_lane
+
+    def _collect_entries(self):
+        entries = []
+        for road in self._city.roads:
+            for lane in road.lanes():
+                path = lane.geometry_for(self._geometry_class).base_path()
+                for index, element in enumerate(path.elements()):
+                    entries.append(LaneElementEntry(road, lane, index, element))
+        return entries
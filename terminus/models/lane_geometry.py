@@ -14,8 +14,15 @@ See the License for the specific language governing permissions and
 limitations under the License.
 """
 
+import bisect
+import numpy as np
+
 from geometry.point import Point
+from geometry.circle import Circle
 from geometry.path import Path
+from geometry.array_path import ArrayPath
+from geometry.snapping_map import SnappingMap
+from geometry import fixed_point
 
 from junction_builder import JunctionBuilder
 from waypoint import Waypoint
@@ -28,15 +35,79 @@ logger = logging.getLogger(__name__)
 
 class LaneGeometry(object):
 
+    # Approximate memory used by each path element, waypoint and connection
+    # (see estimated_size)
+    ELEMENT_SIZE = 600
+    WAYPOINT_SIZE = 300
+    CONNECTION_SIZE = 200
+
     def __init__(self, lane):
         self._lane = lane
         self._node_centers_mapping = self._map_node_centers()
         self._path, self._waypoints = self._build_path_and_waypoints(lane)
         self._center_to_waypoint = self._build_waypoint_table()
+        self._built_waypoints = self._waypoints
         self._simplify_path()
+        self._base_path = self._path
+        self._base_array_path = ArrayPath.from_path(self._path)
         self._waypoints = self._remove_redundant_waypoints()
+        self._complete_setup()
+
+    @classmethod
+    def restore(cls, lane, description):
+        """
+        Create the geometry of the lane out of a description answered by
+        `describe`, without computing it again
+        """
+        mapped_centers, elements, built_waypoints, kept_indexes = description
+        road_nodes = lane.road_nodes()
+        geometry = cls.__new__(cls)
+        geometry._lane = lane
+        geometry._node_centers_mapping = dict(zip(road_nodes, mapped_centers))
+        geometry._path = Path(elements)
+        geometry._base_array_path = None
+        geometry._waypoints = []
+        for center, heading, node_index in built_waypoints:
+            geometry._waypoints.append(Waypoint(lane, center, heading, road_nodes[node_index]))
+        geometry._center_to_waypoint = geometry._build_waypoint_table()
+        geometry._built_waypoints = geometry._waypoints
+        geometry._waypoints = map(lambda index: geometry._built_waypoints[index], kept_indexes)
+        geometry._complete_setup()
+        return geometry
+
+    def describe(self):
+        """
+        Answer a compact, picklable description of the geometry as it was
+        built (i.e. before resolving any junction). See `restore`
+        """
+        road_nodes = self.road_nodes()
+        mapped_centers = map(lambda node: self._node_centers_mapping[node], road_nodes)
+        built_waypoints = []
+        for waypoint in self._built_waypoints:
+            node_index = next(index for index, node in enumerate(road_nodes) if node is waypoint.road_node())
+            built_waypoints.append((waypoint.center(), waypoint.heading(), node_index))
+        indexes = dict((id(waypoint), index) for index, waypoint in enumerate(self._built_waypoints))
+        kept_indexes = map(lambda waypoint: indexes[id(waypoint)], self._base_waypoints)
+        return (mapped_centers, self.base_path().elements(), built_waypoints, kept_indexes)
+
+    def _complete_setup(self):
+        self._base_path = self._path
+        self._base_waypoints = list(self._waypoints)
+        # Offsets of the base waypoints in the base path, computed when
+        # first needed
+        self._base_waypoint_offsets = None
+        # (road node, waypoints, connections) of each junction resolved so
+        # far, in resolution order
+        self._resolved_junctions = []
         self._unresolved_intersections = self._create_unresolved_intersections()
-        self._inner_connections = self._build_inner_connections()
+        self._base_inner_connections = self._build_inner_connections()
+        self._reset_to_base()
+
+    def _reset_to_base(self):
+        self._path = self._base_path
+        self._waypoints = list(self._base_waypoints)
+        self._waypoint_offsets = None
+        self._inner_connections = list(self._base_inner_connections)
 
     def species(self):
         return self.__class__
@@ -50,6 +121,14 @@ class LaneGeometry(object):
     def path(self):
         return self._path
 
+    def base_path(self):
+        """
+        Answer the path as it was before resolving any junction. Junctions
+        are always built on it, so the result of each one doesn't depend on
+        the order they are resolved.
+        """
+        return self._base_path
+
     def waypoints(self):
         if not self._are_all_intersections_resolved():
             self._resolve_intersections()
@@ -60,8 +139,58 @@ class LaneGeometry(object):
             self._resolve_intersections()
         return self._inner_connections
 
+    def unresolved_intersections(self):
+        return list(self._unresolved_intersections)
+
+    def mapped_node_center(self, road_node):
+        """
+        Answer the point in the lane that corresponds to the given road node
+        """
+        return self._node_centers_mapping[road_node]
+
+    def intersections_around(self, road_node, radius, element_indexes=None):
+        """
+        Answer the points where the base path crosses the circle of the given
+        radius centered in the road node. Only the elements around the node
+        are checked: the given element indexes (e.g. taken from a
+        LaneElementIndex) or, if none given, the ones whose bounding circle
+        reaches the circle
+        """
+        circle = Circle(road_node.center, radius)
+        if element_indexes is None:
+            return self.base_path().find_intersection(circle)
+        intersections = []
+        for index in element_indexes:
+            intersections.extend(self.base_path().element_at(index).find_intersection(circle))
+        return intersections
+
+    def base_heading_at_point(self, point, element_indexes=None):
+        """
+        Answer the heading of the base path at the given point. If element
+        indexes are given, the elements with those indexes (in path order)
+        are checked first
+        """
+        if element_indexes is not None:
+            for index in element_indexes:
+                element = self.base_path().element_at(index)
+                if element.includes_point(point):
+                    return element.heading_at_offset(element.offset_for_point(point))
+        return self.base_path().heading_at_point(point)
+
+    def estimated_size(self):
+        """
+        Answer a rough estimate of the memory used by the geometry, in bytes,
+        out of the number of path elements, waypoints and connections it
+        holds
+        """
+        elements_count = self._base_path.elements_count() + self._path.elements_count()
+        waypoints_count = len(self._built_waypoints) + len(self._waypoints)
+        return elements_count * self.ELEMENT_SIZE + \
+            waypoints_count * self.WAYPOINT_SIZE + \
+            len(self._inner_connections) * self.CONNECTION_SIZE
+
     def waypoint_at_point(self, point):
-        return self._center_to_waypoint.get(point.rounded_to(5), None)
+        return self._center_to_waypoint.get(point, None)
 
     def _map_node_centers(self):
         road_nodes = self.road_nodes()
@@ -72,49 +201,147 @@ class LaneGeometry(object):
         path = Path.polyline_from_points(points).offset_by(offset)
         return dict(zip(road_nodes, path.vertices()))
 
-    def resolve_intersection(self, road_node, waypoints):
+    def resolve_intersection(self, road_node, waypoints, connections=()):
         # Mark as resolved
         self._unresolved_intersections.remove(road_node)
-
-        # Add new waypoints
-        new_waypoints = waypoints - set(self._waypoints)
-        new_waypoints = sorted(new_waypoints,
-                               key=lambda waypoint: self.path().offset_for_point(waypoint.center()))
-
-        new_waypoints_clone = list(new_waypoints)
-
-        # We need to manually sort to account for overlapping waypoints
-        # TODO: Review this
-        waypoints_index = 0
-        merged_waypoints = []
-        current_waypoint_offset = 0.0
-        while new_waypoints:
-            new_waypoint = new_waypoints.pop(0)
-            new_waypoint_offset = self.path().offset_for_point(new_waypoint.center())
-
-            current_waypoint = self._waypoints[waypoints_index]
-            current_waypoint_offset = self.path().offset_for_point(current_waypoint.center(), current_waypoint_offset)
-
-            while current_waypoint_offset < new_waypoint_offset:
-                merged_waypoints.append(current_waypoint)
-                waypoints_index += 1
-                current_waypoint = self._waypoints[waypoints_index]
-                current_waypoint_offset = self.path().offset_for_point(current_waypoint.center(), current_waypoint_offset)
-
-            merged_waypoints.append(new_waypoint)
-
-        while waypoints_index < len(self._waypoints):
-            current_waypoint = self._waypoints[waypoints_index]
-            merged_waypoints.append(current_waypoint)
-            waypoints_index += 1
-
-        self._waypoints = merged_waypoints
-
-        # Accommodate new waypoints in path
-        self._path = self._path.split_in(self._waypoints)
-
-        # Rebuild inner connections
-        self._inner_connections = self._build_inner_connections()
+        self._resolved_junctions.append((road_node, list(waypoints), list(connections)))
+        self._add_waypoints(waypoints)
+
+    def _add_waypoints(self, waypoints):
+        """
+        Merge the given waypoints into the lane ones, by their offset in the
+        path. Only the path elements that get new waypoints are split, and
+        only their inner connections are rebuilt
+        """
+        if self._waypoint_offsets is None:
+            self._waypoint_offsets = list(self._base_offsets())
+        new_waypoints = []
+        for waypoint in set(waypoints):
+            offset = self._base_offset_for(waypoint.center())
+            if not self._includes_waypoint_at(waypoint, offset):
+                new_waypoints.append((offset, waypoint))
+        if not new_waypoints:
+            return
+        new_waypoints.sort(key=lambda (offset, waypoint): offset)
+
+        # The base path is shared with the junctions, never split it
+        if self._path is self._base_path:
+            self._path = Path(self._base_path.elements())
+
+        # Group the new waypoints by the element they fall in. Waypoints at
+        # the same offset than an existing one go before it
+        splits = {}
+        last_element_index = self._path.elements_count() - 1
+        for offset, waypoint in new_waypoints:
+            position = bisect.bisect_left(self._waypoint_offsets, offset)
+            element_index = min(max(position - 1, 0), last_element_index)
+            splits.setdefault(element_index, []).append((position, offset, waypoint))
+
+        # Start from the end, so the indexes of the elements yet to split
+        # don't change
+        for element_index in sorted(splits, reverse=True):
+            self._split_element(element_index, splits[element_index])
+
+    def _split_element(self, element_index, insertions):
+        """
+        Split the path element at the given index with the given (position,
+        offset, waypoint) insertions, sorted by offset
+        """
+        start_index = element_index
+        end_index = element_index + 1
+        start = (self._waypoint_offsets[start_index], self._waypoints[start_index])
+        end = (self._waypoint_offsets[end_index], self._waypoints[end_index])
+        run = [(offset, waypoint) for position, offset, waypoint in insertions if position <= start_index]
+        run.append(start)
+        run.extend((offset, waypoint) for position, offset, waypoint in insertions if position == end_index)
+        run.append(end)
+        run.extend((offset, waypoint) for position, offset, waypoint in insertions if position > end_index)
+
+        run_waypoints = map(lambda (offset, waypoint): waypoint, run)
+        centers = map(lambda waypoint: waypoint.center(), run_waypoints)
+        primitives = self._path.element_at(element_index).split_into(zip(centers, centers[1:]))
+        connections = map(lambda (start_waypoint, end_waypoint, primitive): WaypointConnection(start_waypoint, end_waypoint, primitive),
+                          zip(run_waypoints, run_waypoints[1:], primitives))
+
+        self._path.replace_element(element_index, primitives)
+        self._inner_connections[element_index:element_index + 1] = connections
+        self._waypoints[start_index:end_index + 1] = run_waypoints
+        self._waypoint_offsets[start_index:end_index + 1] = map(lambda (offset, waypoint): offset, run)
+
+    def _includes_waypoint_at(self, waypoint, offset):
+        # Equal waypoints have (almost) the same center, so only the ones
+        # around the offset need to be checked
+        offsets = self._waypoint_offsets
+        first_index = bisect.bisect_left(offsets, offset - 1e-6)
+        last_index = bisect.bisect_right(offsets, offset + 1e-6)
+        return any(self._waypoints[index] == waypoint for index in range(first_index, last_index))
+
+    def _base_offsets(self):
+        """
+        Answer the offsets of the base waypoints in the base path
+        """
+        if self._base_waypoint_offsets is None:
+            offsets = []
+            element_index = 0
+            for waypoint in self._base_waypoints:
+                element_index, offset = self._locate_in_base_path(waypoint.center(), element_index)
+                offsets.append(offset)
+            self._base_waypoint_offsets = offsets
+        return self._base_waypoint_offsets
+
+    def _base_offset_for(self, point):
+        location = self._locate_in_base_path(point)
+        if location is None:
+            raise ValueError("Point {0} does not exist in path {1}".format(point, self._base_path))
+        return location[1]
+
+    def _locate_in_base_path(self, point, start_index=0):
+        """
+        Answer the index of the first base path element from start_index on
+        that includes the point and the offset of the point in the path, or
+        None if there is no such element. Candidate elements are found with
+        a vectorized check over the whole path (with a slightly bigger
+        buffer), so only those need to be checked one by one
+        """
+        if self._base_array_path is None:
+            self._base_array_path = ArrayPath.from_path(self._base_path)
+        candidates = self._base_array_path.elements_including_point(point, 2e-7)[start_index:]
+        for index in np.flatnonzero(candidates) + start_index:
+            element = self._base_path.element_at(index)
+            if element.includes_point(point):
+                return (index, self._base_path.element_start_offset(index) + element.offset_for_point(point))
+        return None
+
+    def unresolve_intersection(self, road_node):
+        """
+        Undo the resolution of the junction at the given road node, removing
+        the connections it added to the lane waypoints and bringing the lane
+        back to the state it would be in had the junction never been resolved
+        """
+        resolved_junctions = self._resolved_junctions
+        if not any(node is road_node for node, _, _ in resolved_junctions):
+            return
+        for node, _, connections in resolved_junctions:
+            if node is road_node:
+                self._remove_connections(connections)
+
+        # Start over from the base geometry and add back the waypoints of the
+        # remaining junctions, all at once
+        self._resolved_junctions = filter(lambda junction: junction[0] is not road_node, resolved_junctions)
+        self._reset_to_base()
+        self._unresolved_intersections = self._create_unresolved_intersections()
+        remaining_waypoints = set()
+        for node, waypoints, _ in self._resolved_junctions:
+            self._unresolved_intersections.remove(node)
+            remaining_waypoints.update(waypoints)
+        self._add_waypoints(remaining_waypoints)
+
+    def _remove_connections(self, connections):
+        for connection in connections:
+            if connection.start_waypoint().lane() is self._lane:
+                connection.start_waypoint().remove_out_connection(connection)
+            if connection.end_waypoint().lane() is self._lane:
+                connection.end_waypoint().remove_in_connection(connection)
 
     @classmethod
     def _new_waypoint(cls, lane, primitive, node, use_start=True):
@@ -131,9 +358,9 @@ class LaneGeometry(object):
         self._path.simplify()
 
     def _build_waypoint_table(self):
-        center_to_waypoint = {}
+        center_to_waypoint = SnappingMap(1e-5)
         for waypoint in self._waypoints:
-            center_to_waypoint[waypoint.center().rounded_to(5)] = waypoint
+            center_to_waypoint[waypoint.center()] = waypoint
         return center_to_waypoint
 
     def _build_inner_connections(self):
@@ -148,24 +375,20 @@ class LaneGeometry(object):
 
     def _remove_redundant_waypoints(self):
         # Some waypoints may no longer be included in the path geometry
-        # due to simplification approximating the geometry. If so, remove them
-        in_waypoints = []
-        for waypoint in self._waypoints:
-            waypoint_center = waypoint.center()
-            if self._path.includes_point(waypoint_center):
-                in_waypoints.append(waypoint)
-
-        # Now remove the waypoints that lay in between the geometry
+        # due to simplification approximating the geometry, and others may
+        # now lay in between the ends of an element. Remove them, walking
+        # the waypoints and the elements at the same time
         trimmed_waypoints = []
         element_index = 0
-        for waypoint in in_waypoints:
+        for waypoint in self._waypoints:
             waypoint_center = waypoint.center()
+            location = self._locate_in_base_path(waypoint_center, element_index)
+            if location is None:
+                continue
+            element_index = location[0]
             current_element = self._path.element_at(element_index)
-            while not current_element.includes_point(waypoint_center):
-                element_index += 1
-                current_element = self._path.element_at(element_index)
-            if current_element.start_point() == waypoint_center or \
-               current_element.end_point() == waypoint_center:
+            if fixed_point.snapped(current_element.start_point()) == waypoint_center or \
+               fixed_point.snapped(current_element.end_point()) == waypoint_center:
                 trimmed_waypoints.append(waypoint)
         return trimmed_waypoints
 
@@ -185,6 +408,6 @@ class LaneGeometry(object):
         lane = self.lane()
         # We will be removing items as we iterate, so make a copy
         for node in list(self._unresolved_intersections):
-            mapped_intersection_point = self._node_centers_mapping[node]
+            mapped_intersection_point = self.mapped_node_center(node)
             builder = JunctionBuilder(node, mapped_intersection_point, self.species())
             builder.add_connections_to_lanes()
@@ -0,0 +1,134 @@
+"""
+Copyright (C) 2017 Open Source Robotics Foundation
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import multiprocessing
+
+from lane_geometry_cache import lane_geometry_key, road_digest
+
+# The builder whose geometries are being computed by the worker processes. As
+# workers are forked, they get a copy of the whole city through it without
+# having to pickle it.
+_active_builder = None
+
+
+def _describe_lane_geometry(task):
+    return _active_builder._describe_geometry(task)
+
+
+class LaneGeometryBuilder(object):
+    """Computes the geometries (base paths and waypoints) of all the lanes of a
+    city for the given geometry classes, and installs them in the lanes before
+    anyone asks for them.
+
+    Building the geometry of a lane doesn't depend on the other lanes, so they
+    can be built in a pool of worker processes. Each worker answers a compact
+    description of the geometries (see LaneGeometry.describe), which are then
+    restored and installed road by road and lane by lane, the same order a
+    serial build would follow.
+
+    If a LaneGeometryCache is given, geometries found in it are restored
+    instead of built, and the ones built are stored in it.
+    """
+
+    def __init__(self, city, geometry_classes, workers=1, cache=None):
+        self._city = city
+        self._geometry_classes = geometry_classes
+        self._workers = workers
+        self._cache = cache
+        self._road_digests = {}
+        self._tasks = self._pending_tasks()
+
+    def pending_geometries_count(self):
+        return len(self._tasks)
+
+    def run(self):
+        tasks = self._tasks
+        if self._cache is not None:
+            tasks = self._restore_cached(tasks)
+        if self._workers <= 1 or len(tasks) <= 1:
+            for task in tasks:
+                geometry_class, lane = self._task_data(task)
+                lane.geometry_for(geometry_class)
+        else:
+            for task, description in zip(tasks, self._describe_all_geometries(tasks)):
+                geometry_class, lane = self._task_data(task)
+                lane.install_geometry(geometry_class.restore(lane, description))
+        if self._cache is not None:
+            self._store_built(tasks)
+
+    def _restore_cached(self, tasks):
+        """
+        Install the geometries found in the cache and answer the tasks that
+        are still pending
+        """
+        missing_tasks = []
+        for task in tasks:
+            geometry_class, lane = self._task_data(task)
+            description = self._cache.get(self._cache_key(task))
+            if description is None:
+                missing_tasks.append(task)
+            else:
+                lane.install_geometry(geometry_class.restore(lane, description))
+        return missing_tasks
+
+    def _store_built(self, tasks):
+        for task in tasks:
+            geometry_class, lane = self._task_data(task)
+            self._cache.put(self._cache_key(task), lane.geometry_for(geometry_class).describe())
+
+    def _cache_key(self, task):
+        class_index, road_index, lane_index = task
+        return lane_geometry_key(self._geometry_classes[class_index],
+                                 self._road_digest(road_index),
+                                 lane_index)
+
+    def _road_digest(self, road_index):
+        if road_index not in self._road_digests:
+            self._road_digests[road_index] = road_digest(self._city.roads[road_index])
+        return self._road_digests[road_index]
+
+    def _describe_all_geometries(self, tasks):
+        global _active_builder
+        _active_builder = self
+        pool = multiprocessing.Pool(self._workers)
+        try:
+            # Send the lanes in a few big chunks, as each one is cheap
+            chunk_size = max(1, len(tasks) / (self._workers * 4))
+            return pool.map(_describe_lane_geometry, tasks, chunk_size)
+        finally:
+            pool.close()
+            pool.join()
+            _active_builder = None
+
+    def _pending_tasks(self):
+        # Each task is a (geometry class index, road index, lane index) tuple,
+        # so it can be cheaply sent to the workers
+        tasks = []
+        for class_index, geometry_class in enumerate(self._geometry_classes):
+            for road_index, road in enumerate(self._city.roads):
+                for lane_index, lane in enumerate(road.lanes()):
+                    if not lane.has_geometry(geometry_class):
+                        tasks.append((class_index, road_index, lane_index))
+        return tasks
+
+    def _task_data(self, task):
+        class_index, road_index, lane_index = task
+        lane = self._city.roads[road_index].lane_at(lane_index)
+        return self._geometry_classes[class_index], lane
+
+    def _describe_geometry(self, task):
+        geometry_class, lane = self._task_data(task)
+        return geometry_class(lane).describe()
@@ -0,0 +1,168 @@
+"""
+Copyright (C) 2017 Open Source Robotics Foundation
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import collections
+import cPickle
+import hashlib
+import os
+import tempfile
+import zlib
+
+from geometry import fixed_point
+
+# Bump whenever the way geometries or junctions are computed (or described)
+# changes, so stale entries are no longer found
+FORMAT_VERSION = 1
+
+
+def road_digest(road):
+    """
+    Answer a hash of everything the geometry of the road lanes depends on:
+    the road type, its control points (and whether they are intersections),
+    its lanes and the fixed-point resolution in use, if any
+    """
+    nodes = map(lambda node: (node.__class__.__name__, node.center.to_tuple()), road.nodes())
+    lanes = map(lambda lane: (lane.width(), lane.offset(), lane.is_reversed()), road.lanes())
+    return hashlib.sha1(repr((road.__class__.__name__, nodes, lanes, fixed_point.resolution()))).hexdigest()
+
+
+def lane_geometry_key(geometry_class, digest, lane_index):
+    """
+    Answer the cache key of the geometry of the given class of a lane, out
+    of the digest of its road and its index in it
+    """
+    return LaneGeometryCache.key_for('lane geometry', geometry_class.__name__, digest, lane_index)
+
+
+class LaneGeometryCache(object):
+    """A content-addressed cache of lane geometry results, stored as one
+    compressed binary file per entry in a directory. Keys are built with
+    `key_for` out of road digests (see `road_digest`), so an entry is only
+    found again if the roads it was computed from didn't change.
+
+    If a maximum size (in bytes) is given, the least recently used entries
+    are evicted to stay under it.
+    """
+
+    def __init__(self, directory, max_size=None):
+        self._directory = directory
+        self._max_size = max_size
+        self._hits = 0
+        self._misses = 0
+        self._stores = 0
+        self._evictions = 0
+        try:
+            os.makedirs(directory)
+        except OSError:
+            pass
+        self._entries = self._scan_entries()
+        self._size = sum(self._entries.values())
+
+    @classmethod
+    def key_for(cls, *parts):
+        return hashlib.sha1(repr((FORMAT_VERSION,) + parts)).hexdigest()
+
+    def get(self, key):
+        """
+        Answer the value stored for the key, or None if there is no such
+        entry
+        """
+        if key not in self._entries:
+            self._misses += 1
+            return None
+        try:
+            with open(self._entry_path(key), 'rb') as entry_file:
+                value = cPickle.loads(zlib.decompress(entry_file.read()))
+        except (IOError, OSError, zlib.error, cPickle.UnpicklingError, EOFError):
+            # Treat unreadable entries as missing
+            self._remove(key)
+            self._misses += 1
+            return None
+        self._touch(key)
+        self._hits += 1
+        return value
+
+    def put(self, key, value):
+        data = zlib.compress(cPickle.dumps(value, cPickle.HIGHEST_PROTOCOL))
+        # Write to a temporary file first, so a crash never leaves a
+        # truncated entry behind
+        handle, temporary_path = tempfile.mkstemp(dir=self._directory, suffix='.tmp')
+        with os.fdopen(handle, 'wb') as entry_file:
+            entry_file.write(data)
+        os.rename(temporary_path, self._entry_path(key))
+        if key in self._entries:
+            self._size -= self._entries.pop(key)
+        self._entries[key] = len(data)
+        self._size += len(data)
+        self._stores += 1
+        self._evict()
+
+    def clear(self):
+        for key in list(self._entries):
+            self._remove(key)
+
+    def entries_count(self):
+        return len(self._entries)
+
+    def size(self):
+        return self._size
+
+    def statistics(self):
+        return {'hits': self._hits,
+                'misses': self._misses,
+                'stores': self._stores,
+                'evictions': self._evictions,
+                'entries': self.entries_count(),
+                'size': self.size()}
+
+    def __repr__(self):
+        return "LaneGeometryCache @ {0}: {1[entries]} entries, {1[size]} bytes, " \
+            "{1[hits]} hits, {1[misses]} misses, {1[stores]} stores, {1[evictions]} evictions".format(self._directory, self.statistics())
+
+    def _entry_path(self, key):
+        return os.path.join(self._directory, key + '.entry')
+
+    def _scan_entries(self):
+        # Least recently used entries go first
+        entries = []
+        for file_name in os.listdir(self._directory):
+            if not file_name.endswith('.entry'):
+                continue
+            stat = os.stat(os.path.join(self._directory, file_name))
+            entries.append((stat.st_mtime, file_name[:-len('.entry')], stat.st_size))
+        entries.sort()
+        return collections.OrderedDict((key, size) for _, key, size in entries)
+
+    def _touch(self, key):
+        self._entries[key] = self._entries.pop(key)
+        try:
+            os.utime(self._entry_path(key), None)
+        except OSError:
+            pass
+
+    def _remove(self, key):
+        self._size -= self._entries.pop(key)
+        try:
+            os.remove(self._entry_path(key))
+        except OSError:
+            pass
+
+    def _evict(self):
+        if self._max_size is None:
+            return
+        while self._size > self._max_size and self._entries:
+            self._remove(next(iter(self._entries)))
+            self._evictions += 1
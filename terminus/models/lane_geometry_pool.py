@@ -0,0 +1,148 @@
+"""
+Copyright (C) 2017 Open Source Robotics Foundation
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import collections
+
+from lane_geometry_cache import lane_geometry_key, road_digest
+
+
+class LaneGeometryPool(object):
+    """Keeps the lane geometries of a city under a memory budget (in bytes,
+    as estimated by LaneGeometry.estimated_size), evicting the least
+    recently used ones when asked to.
+
+    The junctions an evicted geometry shares with other lanes are undone in
+    those lanes, so they are resolved again, consistently, if the evicted
+    geometry is ever needed. Geometries are built again on demand or, if a
+    LaneGeometryCache is given to spill them to, restored from it.
+
+    Evicted geometries are replaced by new objects when needed again, so
+    `enforce_budget` must only be called when nobody is holding on to the
+    lane waypoints or connections it may evict (e.g. once a generator wrote
+    a road, if it looks up the waypoints of other roads again when needed).
+    """
+
+    def __init__(self, max_size, spill=None):
+        self._max_size = max_size
+        self._spill = spill
+        # (lane, geometry class) by (lane id, geometry class), least
+        # recently used first
+        self._entries = collections.OrderedDict()
+        # Evicted lanes, by (lane id, geometry class)
+        self._evicted = {}
+        self._geometry_classes = set()
+        self._evictions = 0
+        self._reloads = 0
+        self._peak_entries = 0
+
+    def max_size(self):
+        return self._max_size
+
+    def touch(self, lane, geometry_class):
+        """
+        Record that the geometry of the given class of the lane was just
+        used
+        """
+        key = (id(lane), geometry_class)
+        entries = self._entries
+        if key in entries:
+            del entries[key]
+        entries[key] = (lane, geometry_class)
+        self._geometry_classes.add(geometry_class)
+        self._peak_entries = max(self._peak_entries, len(entries))
+
+    def forget(self, lane):
+        """
+        Stop tracking the geometries of the lane, as they were discarded
+        """
+        for geometry_class in self._geometry_classes:
+            self._entries.pop((id(lane), geometry_class), None)
+            self._evicted.pop((id(lane), geometry_class), None)
+
+    def reload(self, lane, geometry_class):
+        """
+        Answer the geometry of the given class of the lane restored from the
+        spill cache if it is there (it was evicted, or stored by a
+        LaneGeometryBuilder), or None
+        """
+        self._evicted.pop((id(lane), geometry_class), None)
+        if self._spill is None:
+            return None
+        description = self._spill.get(self._spill_key(lane, geometry_class))
+        if description is None:
+            return None
+        self._reloads += 1
+        return geometry_class.restore(lane, description)
+
+    def size(self):
+        """
+        Answer the estimated size of the geometries in memory, in bytes
+        """
+        return sum(lane.built_geometry(geometry_class).estimated_size()
+                   for lane, geometry_class in self._entries.itervalues())
+
+    def enforce_budget(self):
+        """
+        Evict least recently used geometries until the estimated size of
+        the ones left is within the budget
+        """
+        size = self.size()
+        evicted = []
+        for key, (lane, geometry_class) in self._entries.iteritems():
+            if size <= self._max_size:
+                break
+            size -= lane.built_geometry(geometry_class).estimated_size()
+            evicted.append(key)
+        # Drop them all before undoing their junctions, so they are only
+        # undone in the lanes that keep their geometries
+        geometries = map(self._evict, evicted)
+        for (_, geometry_class), geometry in zip(evicted, geometries):
+            self._undo_junctions(geometry, geometry_class)
+
+    def statistics(self):
+        return {'entries': len(self._entries),
+                'peak_entries': self._peak_entries,
+                'evicted': len(self._evicted),
+                'evictions': self._evictions,
+                'reloads': self._reloads}
+
+    def __repr__(self):
+        return "LaneGeometryPool: {0[entries]} geometries (at most {0[peak_entries]}), " \
+            "{0[evicted]} evicted, {0[evictions]} evictions, {0[reloads]} reloads".format(self.statistics())
+
+    def _evict(self, key):
+        lane, geometry_class = self._entries.pop(key)
+        geometry = lane.drop_geometry(geometry_class)
+        if self._spill is not None:
+            self._spill.put(self._spill_key(lane, geometry_class), geometry.describe())
+        self._evicted[key] = lane
+        self._evictions += 1
+        return geometry
+
+    def _undo_junctions(self, geometry, geometry_class):
+        lane = geometry.lane()
+        for node in geometry.road_nodes():
+            if not node.is_intersection():
+                continue
+            for other_lane in node.involved_lanes():
+                if other_lane is not lane:
+                    other_lane.unresolve_intersection(node, geometry_class)
+
+    def _spill_key(self, lane, geometry_class):
+        return lane_geometry_key(geometry_class, road_digest(lane.road()), self._lane_index(lane))
+
+    def _lane_index(self, lane):
+        return next(index for index, other in enumerate(lane.road().lanes()) if other is lane)
@@ -18,6 +18,8 @@ import math
 from shapely.geometry import LineString
 from geometry.point import Point
 from geometry.bounding_box import BoundingBox
+from geometry.snapping_map import SnappingMap
+from geometry import fixed_point
 
 from city_model import CityModel
 from road_simple_node import RoadSimpleNode
@@ -27,11 +29,19 @@ from road_node import RoadNode
 
 
 class Road(CityModel):
+    # Control points closer than this (in each axis) are considered the same
+    CONTROL_POINT_TOLERANCE = 1e-5
+
     def __init__(self, name=None):
         super(Road, self).__init__(name)
         self._nodes = []
-        self._point_to_node = {}
+        # Indexes of the nodes by center, so control points can be looked up
+        # in constant time
+        self._node_indexes = SnappingMap(self.CONTROL_POINT_TOLERANCE)
         self._lanes = []
+        # The city the road was added to, if any, which is told about the
+        # control points added afterwards
+        self._city = None
 
     @classmethod
     def from_nodes(cls, array_of_nodes):
@@ -73,7 +83,6 @@ class Road(CityModel):
     def add_control_point(self, point):
         node = RoadSimpleNode(point)
         self._add_node(node)
-        self._point_to_node[point] = node
 
     def add_control_points(self, points):
         for point in points:
@@ -83,10 +92,7 @@ class Road(CityModel):
         return len(self._nodes)
 
     def includes_control_point(self, point):
-        # Attempt a constant search in the points dictionary. If that fails
-        # do the linear search in the nodes collection.
-        return (point in self._point_to_node) or \
-            any(node.center.almost_equal_to(point, 5) for node in self._nodes)
+        return point in self._node_indexes
 
     def control_points_distances(self):
         points = self.control_points()
@@ -115,10 +121,20 @@ class Road(CityModel):
     def lane_at(self, index):
         return self._lanes[index]
 
+    # City membership
+
+    def added_to_city(self, city):
+        self._city = city
+
+    def removed_from_city(self, city):
+        if self._city is city:
+            self._city = None
+
     # Nodes management
 
     def reverse(self):
         self._nodes.reverse()
+        self._rebuild_node_indexes()
 
     def nodes(self):
         return self._nodes
@@ -126,6 +142,17 @@ class Road(CityModel):
     def node_at(self, index):
         return self._nodes[index]
 
+    def node_at_point(self, point):
+        """
+        Answer the node whose center is the given point or, if there is none,
+        the first one closer than CONTROL_POINT_TOLERANCE (the nodes
+        `includes_control_point` considers). None if there is no such node
+        """
+        index = self._index_of_node_at(point)
+        if index is None:
+            return None
+        return self._nodes[index]
+
     def node_count(self):
         return len(self._nodes)
 
@@ -143,8 +170,12 @@ class Road(CityModel):
 
     def replace_node_at(self, point, new_node):
         index = self._index_of_node_at(point)
+        if index is None:
+            raise ValueError("{0} has no node at {1}".format(self, point))
         old_node = self._nodes[index]
         self._nodes[index] = new_node
+        self._unregister_node_index(old_node.center, index)
+        self._register_node_index(new_node.center, index)
         new_node.added_to(self)
         old_node.removed_from(self)
 
@@ -162,6 +193,7 @@ class Road(CityModel):
                 previous_node = current_node
         trimmed_nodes.append(self.last_node())
         self._nodes = trimmed_nodes
+        self._rebuild_node_indexes()
 
     def __eq__(self, other):
         return self.__class__ == other.__class__ and \
@@ -182,8 +214,31 @@ class Road(CityModel):
         return map(lambda node: node.bounding_box(self.width()), self._nodes)
 
     def _index_of_node_at(self, point):
-        return next((index for index, node in enumerate(self._nodes) if node.center == point), None)
+        point = fixed_point.snapped(point)
+        indexes = self._node_indexes.get(point, [])
+        if not indexes:
+            return None
+        return next((index for index in indexes if self._nodes[index].center == point), indexes[0])
 
     def _add_node(self, node):
         self._nodes.append(node)
+        self._register_node_index(node.center, len(self._nodes) - 1)
         node.added_to(self)
+        if self._city is not None:
+            self._city.control_point_added(self, node.center)
+
+    def _register_node_index(self, point, index):
+        indexes = self._node_indexes.setdefault(point, [])
+        indexes.append(index)
+        indexes.sort()
+
+    def _unregister_node_index(self, point, index):
+        indexes = self._node_indexes[point]
+        indexes.remove(index)
+        if not indexes:
+            del self._node_indexes[point]
+
+    def _rebuild_node_indexes(self):
+        self._node_indexes = SnappingMap(self.CONTROL_POINT_TOLERANCE)
+        for index, node in enumerate(self._nodes):
+            self._register_node_index(node.center, index)
@@ -16,11 +16,12 @@ limitations under the License.
 
 from geometry.point import Point
 from geometry.bounding_box import BoundingBox
+from geometry import fixed_point
 
 
 class RoadNode(object):
     def __init__(self, center, name=None):
-        self.center = center
+        self.center = fixed_point.snapped(center)
         self.name = name
 
     def bounding_box(self, width):
@@ -15,21 +15,29 @@ limitations under the License.
 """
 
 import math
-from sortedcontainers import SortedListWithKey
+from operator import itemgetter
 
 from geometry.point import Point
 from geometry.line import Line
+from geometry import fixed_point
 
 
 class Waypoint(object):
 
+    # Cities have lots of waypoints, so don't give each one a dict
+    __slots__ = ('_lane', '_center', '_heading', '_road_node', '_in_connections', '_out_connections')
+
     def __init__(self, lane, center, heading, road_node):
         self._lane = lane
+        center = fixed_point.snapped(center)
         self._center = center
         self._heading = heading
         self._road_node = road_node
-        self._in_connections = SortedListWithKey(key=lambda connection: connection.start_point().squared_distance_to(center))
-        self._out_connections = SortedListWithKey(key=lambda connection: connection.end_point().squared_distance_to(center))
+        # Most waypoints never get connections, so these are only created
+        # when needed: lists of (sort key, connection) in the order the
+        # connections were added. See _sorted_connections
+        self._in_connections = None
+        self._out_connections = None
 
     def is_proxy(self):
         return False
@@ -56,25 +64,47 @@ class Waypoint(object):
         return Line.from_points(self.center(), self.center() + self.heading_vector())
 
     def is_exit(self):
-        return len(self._out_connections) > 0
+        return bool(self._out_connections)
 
     def is_entry(self):
-        return len(self._in_connections) > 0
+        return bool(self._in_connections)
 
     def is_intersection(self):
         return self.is_exit() or self.is_entry()
 
     def add_in_connection(self, connection):
-        self._in_connections.add(connection)
+        entry = (connection.start_point().squared_distance_to(self._center), connection)
+        if self._in_connections is None:
+            self._in_connections = [entry]
+        else:
+            self._in_connections.append(entry)
 
     def add_out_connection(self, connection):
-        self._out_connections.add(connection)
+        entry = (connection.end_point().squared_distance_to(self._center), connection)
+        if self._out_connections is None:
+            self._out_connections = [entry]
+        else:
+            self._out_connections.append(entry)
+
+    def remove_in_connection(self, connection):
+        self._in_connections = self._connections_without(self._in_connections, connection)
+
+    def remove_out_connection(self, connection):
+        self._out_connections = self._connections_without(self._out_connections, connection)
 
     def in_connections(self):
-        return self._in_connections
+        """
+        Answer the connections that end in this waypoint, sorted by how far
+        they start from it (the closest first)
+        """
+        return self._sorted_connections(self._in_connections)
 
     def out_connections(self):
-        return self._out_connections
+        """
+        Answer the connections that start in this waypoint, sorted by how far
+        they end from it (the closest first)
+        """
+        return self._sorted_connections(self._out_connections)
 
     def center(self):
         return self._center
@@ -83,20 +113,46 @@ class Waypoint(object):
         current_offset = path.offset_for_point(self.center())
         new_offset = current_offset + delta
         new_offset = min(max(new_offset, 0), path.length() - 1e-7)
-        self._center = path.point_at_offset(new_offset)
+        self._center = fixed_point.snapped(path.point_at_offset(new_offset))
         self._heading = path.heading_at_offset(new_offset)
 
+    def _sorted_connections(self, entries):
+        if entries is None:
+            return []
+        if len(entries) > 1:
+            # Sorting is stable, so connections as far as others keep the
+            # order they were added in. Already sorted entries (the usual
+            # case) are just checked
+            entries.sort(key=itemgetter(0))
+        return map(itemgetter(1), entries)
+
+    def _connections_without(self, entries, connection):
+        if entries is None:
+            return None
+        remaining_entries = filter(lambda (key, other): other is not connection, entries)
+        return remaining_entries or None
+
     def __eq__(self, other):
         return (self.__class__ == other.__class__) and \
                (round(self._heading, 7) == round(other._heading, 7)) and \
-               (self._center.rounded_to(7) == other._center.rounded_to(7)) and \
+               (self._same_center_as(other)) and \
                (self._lane == other._lane)
 
     def __ne__(self, other):
         return not self.__eq__(other)
 
     def __hash__(self):
-        return hash((self._lane, self._center.rounded_to(7), round(self._heading, 7)))
+        center = self._center
+        if fixed_point.is_enabled():
+            # Centers are snapped, so they can be hashed exactly
+            return hash((self._lane, center, round(self._heading, 7)))
+        return hash((self._lane, round(center.x, 7), round(center.y, 7), round(center.z, 7), round(self._heading, 7)))
+
+    def _same_center_as(self, other):
+        if fixed_point.is_enabled():
+            # Centers are snapped, so they can be compared exactly
+            return self._center == other._center
+        return self._center.almost_equal_to(other._center, 7)
 
     def __repr__(self):
         result = ""
@@ -17,8 +17,10 @@ limitations under the License.
 """
 
 from geometry.latlon import LatLon
+from geometry import fixed_point
 
 from builders import OsmCityBuilder
+from builders import TiledOsmCityBuilder
 from builders import ProceduralCityBuilder
 from builders import SimpleCityBuilder
 from city_generation_process import CityGenerationProcess
@@ -55,8 +57,49 @@ parser.add_argument('-x',
                     action='store_true',
                     help='Generates extra output files, useful for debugging')
 
+# Number of processes used to compute the lane geometries and resolve the
+# junctions
+parser.add_argument('-w',
+                    '--workers',
+                    type=int,
+                    default=1,
+                    help='number of worker processes used to compute lane \
+                    geometries and resolve junctions')
+
+# Directory where computed lane geometries are cached between runs
+parser.add_argument('-c',
+                    '--cache',
+                    default=None,
+                    help='directory used to cache lane geometries and junctions \
+                    between runs')
+
+# Maximum size of the geometry cache
+parser.add_argument('--cache-size',
+                    type=int,
+                    default=None,
+                    help='maximum size of the geometry cache in megabytes. \
+                    Least recently used entries are evicted to stay under it')
+
+# Memory budget for the lane geometries kept while writing the files
+parser.add_argument('--geometry-budget',
+                    type=int,
+                    default=None,
+                    help='approximate memory, in megabytes, the lane geometries \
+                    can use while the files are written. Least recently used \
+                    ones are evicted to stay under it and computed again (or \
+                    reloaded from the cache) when needed')
+
+# Snap coordinates to a fixed-point grid, so they can be compared exactly
+parser.add_argument('--fixed-point',
+                    action='store_true',
+                    help='snap road and lane coordinates to whole nanometres, \
+                    so they can be compared and hashed exactly')
+
 arguments = parser.parse_args()
 
+if arguments.fixed_point:
+    fixed_point.enable(fixed_point.NANOMETRES)
+
 # Get the base path to generate the different files (join to make sure it has
 # a trailing slash)
 base_path = os.path.join(arguments.destination, '')
@@ -64,6 +107,7 @@ base_path = os.path.join(arguments.destination, '')
 # Get the class of the builder to use
 builders_list = [
     OsmCityBuilder,
+    TiledOsmCityBuilder,
     ProceduralCityBuilder,
     SimpleCityBuilder
 ]
@@ -74,13 +118,28 @@ builder_class = getattr(sys.modules[__name__], arguments.builder)
 # as a dictionary
 builder_parameters = dict(pair.split('=', 1) for pair in arguments.parameters)
 
-# Make sure size is an integer
-if 'size' in builder_parameters:
-    builder_parameters['size'] = int(builder_parameters['size'])
+# Make sure the numeric parameters are integers
+for key in ['size', 'concurrency', 'tiles', 'workers']:
+    if key in builder_parameters:
+        builder_parameters[key] = int(builder_parameters[key])
 
 # Create the builder instance. Unpack the parameter dictionary to be used as
 # keyword parameters
 builder = builder_class(**builder_parameters)
 
-process = CityGenerationProcess(builder, RNDF_ORIGIN, base_path, arguments.debug)
+if arguments.cache_size is None:
+    cache_size = None
+else:
+    cache_size = arguments.cache_size * 1024 * 1024
+
+if arguments.geometry_budget is None:
+    geometry_budget = None
+else:
+    geometry_budget = arguments.geometry_budget * 1024 * 1024
+
+process = CityGenerationProcess(builder, RNDF_ORIGIN, base_path, arguments.debug,
+                                workers=arguments.workers,
+                                cache_path=arguments.cache,
+                                cache_size=cache_size,
+                                geometry_budget=geometry_budget)
 process.run()
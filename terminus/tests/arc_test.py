@@ -180,6 +180,22 @@ class ArcTest(CustomAssertionsMixin, unittest.TestCase):
         self.assertTrue(arc1.includes_point(arc2.start_point()))
         self.assertTrue(arc1.includes_point(arc2.end_point()))
 
+    def test_includes_point_buffer_is_a_distance(self):
+        big_arc = Arc(Point(0, 0), 90, 1000, 90)
+        self.assertTrue(big_arc.includes_point(Point(-1000.00000005, 1000)))
+        self.assertFalse(big_arc.includes_point(Point(-1000.000001, 1000)))
+        small_arc = Arc(Point(0, 0), 90, 0.01, 90)
+        self.assertTrue(small_arc.includes_point(Point(-0.01000005, 0.01)))
+        self.assertFalse(small_arc.includes_point(Point(-0.010001, 0.01)))
+
+    def test_derived_quantities_are_computed_once(self):
+        arc = Arc(Point(0, 0), 30, 10, 90)
+        self.assertIs(arc.center_point(), arc.center_point())
+        self.assertIs(arc.circle(), arc.circle())
+        self.assertIs(arc.circle().center(), arc.center_point())
+        self.assertAlmostEqual(arc.length(), 15.7079632679)
+        self.assertEqual(arc.length(), arc.length())
+
     def test_point_at_offset(self):
         arc_90_deg = Arc(Point(0, 0), 90, 10, 90)
         self.assertAlmostEqual(arc_90_deg.point_at_offset(0), Point(0, 0))
@@ -414,3 +430,23 @@ class ArcTest(CustomAssertionsMixin, unittest.TestCase):
     def test_offset_for_point(self):
         arc = Arc(Point(1, 0), 90, 1, 270)
         self.assertAlmostEqual(arc.offset_for_point(Point(0, 1)), math.pi / 2)
+
+    def test_bounding_box(self):
+        # counter-clockwise quarter of circle, no extreme points
+        arc = Arc(Point(1, 0), 90, 1, 90)
+        self.assertPointAlmostEqual(arc.bounding_box().origin, Point(0, 0))
+        self.assertPointAlmostEqual(arc.bounding_box().corner, Point(1, 1))
+        # counter-clockwise half circle, going through the top of the circle
+        arc = Arc(Point(1, 0), 90, 1, 180)
+        self.assertPointAlmostEqual(arc.bounding_box().origin, Point(-1, 0))
+        self.assertPointAlmostEqual(arc.bounding_box().corner, Point(1, 1))
+        # clockwise three quarters of circle
+        arc = Arc(Point(0, 0), 0, 1, -270)
+        self.assertPointAlmostEqual(arc.bounding_box().origin, Point(-1, -2))
+        self.assertPointAlmostEqual(arc.bounding_box().corner, Point(1, 0))
+
+    def test_bounding_circle(self):
+        arc = Arc(Point(1, 0), 90, 1, 180)
+        circle = arc.bounding_circle()
+        self.assertPointAlmostEqual(circle.center(), Point(0, 1))
+        self.assertAlmostEqual(circle.radius(), math.pi / 2)
@@ -0,0 +1,116 @@
+"""
+Copyright (C) 2017 Open Source Robotics Foundation
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import math
+import unittest
+from custom_assertions_mixin import CustomAssertionsMixin
+
+from geometry.point import Point
+from geometry.circle import Circle
+from geometry.line_segment import LineSegment
+from geometry.arc import Arc
+from geometry.path import Path
+from geometry.array_path import ArrayPath
+
+
+class ArrayPathTest(CustomAssertionsMixin, unittest.TestCase):
+
+    def _path(self):
+        # A 10m segment, a quarter of circle of radius 10, another 10m segment
+        # and a clockwise half circle of radius 5
+        path = Path()
+        path.add_element(LineSegment(Point(0, 0), Point(10, 0)))
+        path.add_element(Arc(Point(10, 0), 0, 10, 90))
+        path.add_element(LineSegment(Point(20, 10), Point(20, 20)))
+        path.add_element(Arc(Point(20, 20), 90, 5, -180))
+        return path
+
+    def test_round_trip(self):
+        path = self._path()
+        converted = ArrayPath.from_path(path).to_path()
+        self.assertEqual(converted.elements_count(), path.elements_count())
+        self.assertLineSegmentAlmostEqual(converted.element_at(0), path.element_at(0))
+        self.assertArcAlmostEqual(converted.element_at(1), path.element_at(1))
+        self.assertLineSegmentAlmostEqual(converted.element_at(2), path.element_at(2))
+        self.assertArcAlmostEqual(converted.element_at(3), path.element_at(3))
+        self.assertPointAlmostEqual(converted.element_at(3).end_point(), path.element_at(3).end_point())
+
+    def test_length(self):
+        array_path = ArrayPath.from_path(self._path())
+        self.assertAlmostEqual(array_path.length(), 20 + 10 * math.pi)
+        self.assertEqual(array_path.elements_count(), 4)
+
+    def test_point_at_offset(self):
+        path = self._path()
+        array_path = ArrayPath.from_path(path)
+        for offset in [0, 5, 10, 10 + 2.5 * math.pi, 15 + 5 * math.pi, 20 + 5 * math.pi, 22 + 7 * math.pi, path.length()]:
+            self.assertPointAlmostEqual(array_path.point_at_offset(offset), path.point_at_offset(offset))
+
+    def test_points_at_offsets(self):
+        path = self._path()
+        offsets = [0, 3.5, 12, 27, path.length()]
+        points = ArrayPath.from_path(path).points_at_offsets(offsets)
+        self.assertEqual(points.shape, (5, 3))
+        for offset, coordinates in zip(offsets, points.tolist()):
+            self.assertPointAlmostEqual(Point.from_tuple(coordinates), path.point_at_offset(offset))
+
+    def test_point_at_offset_greater_than_length(self):
+        array_path = ArrayPath.from_path(self._path())
+        with self.assertRaises(ValueError):
+            array_path.point_at_offset(array_path.length() + 0.1)
+
+    def test_includes_point(self):
+        array_path = ArrayPath.from_path(self._path())
+        self.assertTrue(array_path.includes_point(Point(5, 0)))
+        self.assertTrue(array_path.includes_point(Point(10 + 10 * math.sin(math.pi / 4), 10 - 10 * math.cos(math.pi / 4))))
+        self.assertTrue(array_path.includes_point(Point(20, 15)))
+        self.assertTrue(array_path.includes_point(Point(25, 25)))
+        self.assertFalse(array_path.includes_point(Point(5, 1)))
+        self.assertFalse(array_path.includes_point(Point(25, 15)))
+        self.assertFalse(array_path.includes_point(Point(20, 30)))
+        self.assertEqual(array_path.elements_including_point(Point(20, 10)).tolist(), [False, True, True, False])
+
+    def test_includes_point_buffer_is_a_distance(self):
+        long_path = Path()
+        long_path.add_element(LineSegment(Point(0, 0), Point(3000, 4000)))
+        long_path.add_element(Arc(Point(3000, 4000), 53.13010235415598, 1000, 90))
+        short_path = Path([LineSegment(Point(0, 0), Point(0.003, 0.004))])
+        points = [Point(1500.00000004, 1999.99999997), Point(1500.0000008, 1999.9999994),
+                  Point(3000.00000003, 4000.00000004), Point(-0.0000006, -0.0000008),
+                  Point(0.0015008, 0.0019994), long_path.element_at(1).point_at_offset(100)]
+        for path in [long_path, short_path]:
+            array_path = ArrayPath.from_path(path)
+            for point in points:
+                expected = map(lambda element: element.includes_point(point), path.elements())
+                self.assertEqual(array_path.elements_including_point(point).tolist(), expected)
+        self.assertTrue(ArrayPath.from_path(long_path).includes_point(Point(1500.00000004, 1999.99999997)))
+        self.assertFalse(ArrayPath.from_path(short_path).includes_point(Point(0.0015008, 0.0019994)))
+
+    def test_find_circle_intersection(self):
+        path = self._path()
+        array_path = ArrayPath.from_path(path)
+        for circle in [Circle(Point(10, 0), 3), Circle(Point(20, 15), 6), Circle(Point(15, 20), 5), Circle(Point(100, 100), 1)]:
+            expected = sorted(map(lambda point: point.rounded_to(5).to_tuple(), path.find_intersection(circle)))
+            actual = sorted(map(lambda point: point.rounded_to(5).to_tuple(), array_path.find_circle_intersection(circle)))
+            self.assertEqual(actual, expected)
+
+    def test_line_interpolation_points(self):
+        path = self._path()
+        expected = path.line_interpolation_points()
+        actual = ArrayPath.from_path(path).line_interpolation_points()
+        self.assertEqual(len(actual), len(expected))
+        for actual_point, expected_point in zip(actual, expected):
+            self.assertPointAlmostEqual(actual_point, expected_point)
@@ -98,3 +98,11 @@ class BoundingBoxTest(unittest.TestCase):
     def test_height(self):
         box = BoundingBox(Point(-10, 18), Point(15, 43))
         self.assertEqual(box.height(), 25)
+
+    def test_intersects(self):
+        box = BoundingBox(Point(0, 0), Point(10, 10))
+        self.assertTrue(box.intersects(BoundingBox(Point(5, 5), Point(15, 15))))
+        self.assertTrue(box.intersects(BoundingBox(Point(2, 2), Point(3, 3))))
+        self.assertTrue(box.intersects(BoundingBox(Point(10, -5), Point(20, 0))))
+        self.assertFalse(box.intersects(BoundingBox(Point(11, 0), Point(20, 10))))
+        self.assertFalse(box.intersects(BoundingBox(Point(0, -5), Point(10, -1))))
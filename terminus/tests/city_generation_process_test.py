@@ -0,0 +1,50 @@
+"""
+Copyright (C) 2017 Open Source Robotics Foundation
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import logging
+import os
+import shutil
+import tempfile
+import unittest
+
+from geometry import fixed_point
+from geometry.latlon import LatLon
+from builders.osm_city_builder import OsmCityBuilder
+from city_generation_process import CityGenerationProcess
+
+
+class CityGenerationProcessTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        fixed_point.disable()
+        shutil.rmtree(self.directory)
+
+    def _sample_map(self, name):
+        return os.path.join(os.path.dirname(__file__), '..', '..', 'samples', 'osm', name)
+
+    def test_run_in_fixed_point_mode(self):
+        # The sample has long roads, whose snapped waypoints must still be
+        # found in their paths
+        fixed_point.enable(fixed_point.NANOMETRES)
+        builder = OsmCityBuilder(self._sample_map('osrf.osm'))
+        logger = logging.getLogger(__name__)
+        process = CityGenerationProcess(builder, LatLon(10, 65), os.path.join(self.directory, ''), logger=logger)
+        process.run()
+        for file_name in ['city.rndf', 'city_gazebo_7.world', 'city_gazebo_8.world', 'city_monolane.yaml']:
+            self.assertTrue(os.path.getsize(os.path.join(self.directory, file_name)) > 0)
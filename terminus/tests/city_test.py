@@ -27,6 +27,7 @@ from models.block import Block
 from models.city import City
 from models.road_simple_node import RoadSimpleNode
 from models.road_intersection_node import RoadIntersectionNode
+from models.lines_and_arcs_geometry import LinesAndArcsGeometry
 from geometry.bounding_box import BoundingBox
 
 
@@ -118,6 +119,52 @@ class CityTest(unittest.TestCase):
         self.assertEquals(street1.node_at(0), RoadIntersectionNode.on(0, 0))
         self.assertEquals(street2.node_at(0), RoadSimpleNode.on(0, 0, 1))
 
+    def test_add_intersection_at_keeps_roads_order(self):
+        street1 = Street.from_control_points([Point(0, 0), Point(100, 0)])
+        street2 = Street.from_control_points([Point(0, 0), Point(0, 100)])
+        street3 = Street.from_control_points([Point(0, 0), Point(-100, 0)])
+        self.city.add_road(street1)
+        self.city.add_road(street2)
+        self.city.add_road(street3)
+        self.city.remove_road(street2)
+        self.city.add_road(street2)
+        self.city.add_intersection_at(Point(0, 0))
+        self.assertEqual(street1.node_at(0).involved_roads(), [street1, street3, street2])
+
+    def test_add_intersection_at_on_replaced_node(self):
+        street = Street.from_control_points([Point(0, 0), Point(100, 0)])
+        self.city.add_road(street)
+        self.city.replace_node_at(street, Point(100, 0), RoadSimpleNode.on(100, 50))
+        self.city.add_intersection_at(Point(100, 0))
+        self.city.add_intersection_at(Point(100, 50))
+        self.assertEqual(street.node_at(1), RoadIntersectionNode.on(100, 50))
+
+    def test_add_intersection_at_on_control_point_added_later(self):
+        street = Street.from_control_points([Point(0, 0), Point(100, 0)])
+        self.city.add_road(street)
+        self.city.discard_stale_geometries()
+        street.add_control_point(Point(100, 100))
+        self.assertEqual(self.city.dirty_roads(), [street])
+        self.city.add_intersection_at(Point(100, 100))
+        self.assertEqual(street.node_at(2), RoadIntersectionNode.on(100, 100))
+        self.assertEqual(street.node_at(2).involved_roads(), [street])
+
+    def test_add_control_point_on_existing_intersection(self):
+        self.city.add_intersection_at(Point(100, 100))
+        street = Street.from_control_points([Point(0, 0), Point(100, 0)])
+        self.city.add_road(street)
+        street.add_control_point(Point(100, 100))
+        self.assertEqual(street.node_at(2), RoadIntersectionNode.on(100, 100))
+
+    def test_add_intersection_at_after_trimming_roads(self):
+        street = Street.from_control_points([Point(0, 0), Point(50, 0), Point(100, 0)])
+        self.city.add_road(street)
+        self.city.trim_roads()
+        self.assertEqual(street.control_points(), [Point(0, 0), Point(100, 0)])
+        self.city.add_intersection_at(Point(50, 0))
+        self.assertEqual(street.control_points(), [Point(0, 0), Point(100, 0)])
+        self.assertEqual(self.city._roads_at_control_point(Point(50, 0)), [])
+
     def test_bounding_box_with_ground_plane(self):
         building = Building.square(Point(35, 45), 10, 10)
         block = Block.square(Point(-75, -45), 10)
@@ -142,3 +189,113 @@ class CityTest(unittest.TestCase):
         city.add_block(block)
         city.add_building(building)
         self.assertEqual(city.bounding_box(), BoundingBox(Point(-60, -20), Point(40, 80, 25)))
+
+    def test_add_road_marks_it_as_dirty(self):
+        street = Street.from_control_points([Point(0, 0), Point(100, 0)])
+        self.city.add_road(street)
+        self.assertEqual(self.city.dirty_roads(), [street])
+        self.city.discard_stale_geometries()
+        self.assertEqual(self.city.dirty_roads(), [])
+
+    def test_add_intersection_at_marks_roads_as_dirty(self):
+        street1 = Street.from_control_points([Point(0, 0), Point(100, 0)])
+        street2 = Street.from_control_points([Point(0, 0), Point(0, 100)])
+        street3 = Street.from_control_points([Point(0, 50), Point(100, 50)])
+        self.city.add_road(street1)
+        self.city.add_road(street2)
+        self.city.add_road(street3)
+        self.city.discard_stale_geometries()
+        self.city.add_intersection_at(Point(0, 0))
+        self.assertEqual(self.city.dirty_roads(), [street1, street2])
+
+    def test_replace_node_at_marks_old_intersection_as_stale(self):
+        self.city.add_intersection_at(Point(0, 0))
+        street = Street.from_control_points([Point(0, 0), Point(100, 0)])
+        self.city.add_road(street)
+        intersection = street.node_at(0)
+        self.city.discard_stale_geometries()
+        self.city.replace_node_at(street, Point(0, 0), RoadSimpleNode.on(0, 0))
+        self.assertEqual(self.city.dirty_roads(), [street])
+        self.assertEqual(self.city.stale_intersections(), [intersection])
+        self.assertEqual(intersection.involved_roads(), [])
+
+    def test_remove_road(self):
+        self.city.add_intersection_at(Point(0, 0))
+        street1 = Street.from_control_points([Point(0, 0), Point(100, 0)])
+        street2 = Street.from_control_points([Point(0, 0), Point(0, 100)])
+        self.city.add_road(street1)
+        self.city.add_road(street2)
+        self.city.discard_stale_geometries()
+        intersection = street1.node_at(0)
+        self.city.remove_road(street1)
+        self.assertEqual(self.city.roads, [street2])
+        self.assertEqual(intersection.involved_roads(), [street2])
+        self.assertEqual(self.city.stale_intersections(), [intersection])
+
+    def test_remove_unknown_road(self):
+        street = Street.from_control_points([Point(0, 0), Point(100, 0)])
+        self.city.add_road(Street.from_control_points([Point(0, 0), Point(100, 0)]))
+        self.assertRaises(ValueError, self.city.remove_road, street)
+
+    def test_add_intersection_close_to_a_control_point(self):
+        street = Street.from_control_points([Point(0, 0), Point(100.000001, 0), Point(200, 0)])
+        self.city.add_road(street)
+        self.city.add_intersection_at(Point(100, 0))
+        intersection = self.city.intersections[Point(100, 0)]
+        self.assertTrue(street.node_at(1) is intersection)
+        self.assertEqual(intersection.involved_roads(), [street])
+
+    def test_replace_node_at_missing_point(self):
+        street = Street.from_control_points([Point(0, 0), Point(100, 0)])
+        self.city.add_road(street)
+        self.city.discard_stale_geometries()
+        self.assertRaises(ValueError, self.city.replace_node_at, street, Point(50, 0), RoadSimpleNode.on(50, 0))
+        self.assertEqual(self.city.dirty_roads(), [])
+
+    def _cross_city(self, bend):
+        city = City()
+        city.add_intersection_at(Point(0, 0))
+        city.add_road(Trunk.from_control_points([Point(-100, 0), Point(0, 0), Point(50, bend), Point(100, 0)]))
+        city.add_road(Trunk.from_control_points([Point(0, -100), Point(0, 0), Point(0, 100)]))
+        city.add_road(Street.from_control_points([Point(-100, 100), Point(0, 100)]))
+        city.add_intersection_at(Point(0, 100))
+        return city
+
+    def _describe_lanes(self, city):
+        description = []
+        for road in city.roads:
+            for lane in road.lanes():
+                for waypoint in lane.waypoints_for(LinesAndArcsGeometry):
+                    description.append((waypoint.center().rounded_to(7), round(waypoint.heading(), 7),
+                                        len(waypoint.in_connections()), len(waypoint.out_connections())))
+                for connection in lane.out_connections_for(LinesAndArcsGeometry):
+                    description.append((connection.start_point().rounded_to(7), connection.end_point().rounded_to(7)))
+        return description
+
+    def test_discard_stale_geometries_after_edit(self):
+        city = self._cross_city(10)
+        city.discard_stale_geometries()
+        self._describe_lanes(city)
+        vertical_lane = city.roads[1].lane_at(0)
+        street_lane = city.roads[2].lane_at(0)
+        vertical_geometry = vertical_lane.geometry_for(LinesAndArcsGeometry)
+        street_geometry = street_lane.geometry_for(LinesAndArcsGeometry)
+
+        city.replace_node_at(city.roads[0], Point(50, 10), RoadSimpleNode.on(50, 20))
+        city.discard_stale_geometries()
+
+        self.assertEqual(self._describe_lanes(city), self._describe_lanes(self._cross_city(20)))
+        # Lanes of the roads that didn't change keep their geometries
+        self.assertTrue(vertical_lane.geometry_for(LinesAndArcsGeometry) is vertical_geometry)
+        self.assertTrue(street_lane.geometry_for(LinesAndArcsGeometry) is street_geometry)
+
+    def test_discard_stale_geometries_after_removing_road(self):
+        city = self._cross_city(10)
+        city.discard_stale_geometries()
+        self._describe_lanes(city)
+        city.remove_road(city.roads[2])
+        city.discard_stale_geometries()
+
+        expected_city = self._cross_city(10)
+        expected_city.remove_road(expected_city.roads[2])
+        self.assertEqual(self._describe_lanes(city), self._describe_lanes(expected_city))
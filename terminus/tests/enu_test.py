@@ -0,0 +1,85 @@
+"""
+Copyright (C) 2017 Open Source Robotics Foundation
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import unittest
+
+from geometry.latlon import LatLon
+from geometry.point import Point
+
+
+class EnuProjectorTest(unittest.TestCase):
+
+    def setUp(self):
+        self.origin = LatLon(10, 65)
+        self.projector = self.origin.enu_projector()
+
+    def test_to_point_on_origin(self):
+        point = self.projector.to_point(self.origin)
+        self.assertAlmostEqual(point.x, 0, places=4)
+        self.assertAlmostEqual(point.y, 0, places=4)
+        self.assertEqual(point.z, 0)
+
+    def test_to_point_matches_delta_in_meters(self):
+        for lat_lon in [LatLon(10, 66), LatLon(10, 64), LatLon(9, 65), LatLon(11, 65.5)]:
+            delta_lat, delta_lon = self.origin.delta_in_meters(lat_lon)
+            point = self.projector.to_point(lat_lon)
+            self.assertAlmostEqual(point.x, delta_lon, places=6)
+            self.assertAlmostEqual(point.y, delta_lat, places=6)
+
+    def test_to_points(self):
+        lats = [10, 10, 11]
+        lons = [66, 64, 65]
+        points = self.projector.to_points(lats, lons)
+        self.assertEqual(len(points), 3)
+        for lat, lon, point in zip(lats, lons, points):
+            self.assertAlmostEqual(point.x, self.projector.to_point(LatLon(lat, lon)).x, places=6)
+            self.assertAlmostEqual(point.y, self.projector.to_point(LatLon(lat, lon)).y, places=6)
+        self.assertAlmostEqual(points[0].x, 109633.7978, places=4)
+        self.assertAlmostEqual(points[2].y, 110605.5709, places=4)
+
+    def test_to_points_normalizes_coordinates(self):
+        [point] = self.projector.to_points([10], [66 - 360])
+        self.assertAlmostEqual(point.x, 109633.7978, places=4)
+        self.assertAlmostEqual(point.y, 166.1395712, places=4)
+
+    def test_to_points_with_no_coordinates(self):
+        self.assertEqual(self.projector.to_points([], []), [])
+
+    def test_to_enu_arrays(self):
+        easts, norths, ups = self.projector.to_enu_arrays([10, 9], [66, 65])
+        self.assertAlmostEqual(easts[0], 109633.7978, places=4)
+        self.assertAlmostEqual(norths[0], 166.1395712, places=4)
+        self.assertAlmostEqual(easts[1], 0, places=4)
+        self.assertAlmostEqual(norths[1], -110598.9407, places=4)
+        self.assertEqual(len(ups), 2)
+
+    def test_to_latlon_matches_translate(self):
+        for point in [Point(0, 0), Point(385.6743932, -201.9322713), Point(-1000.5, 2500.25)]:
+            expected = self.origin.translate((point.y, point.x))
+            lat_lon = self.projector.to_latlon(point)
+            self.assertAlmostEqual(lat_lon.lat, expected.lat, places=10)
+            self.assertAlmostEqual(lat_lon.lon, expected.lon, places=10)
+
+    def test_to_latlons_is_inverse_of_to_points(self):
+        lats = [10.001, 9.999, 10.0005]
+        lons = [65.002, 64.998, 65.0]
+        lat_lons = self.projector.to_latlons(self.projector.to_points(lats, lons))
+        for lat, lon, lat_lon in zip(lats, lons, lat_lons):
+            self.assertAlmostEqual(lat_lon.lat, lat, places=6)
+            self.assertAlmostEqual(lat_lon.lon, lon, places=6)
+
+    def test_to_latlons_with_no_points(self):
+        self.assertEqual(self.projector.to_latlons([]), [])
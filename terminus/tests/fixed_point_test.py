@@ -0,0 +1,128 @@
+"""
+Copyright (C) 2017 Open Source Robotics Foundation
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import unittest
+
+from geometry.point import Point
+from geometry.latlon import LatLon
+from geometry.line_segment import LineSegment
+from geometry.path import Path
+from geometry import fixed_point
+from generators.monolane_generator import MonolaneGenerator
+from generators.rndf_generator import RNDFGenerator
+from models.city import City
+from models.road_simple_node import RoadSimpleNode
+from models.street import Street
+from models.trunk import Trunk
+from models.waypoint import Waypoint
+
+
+class FixedPointTest(unittest.TestCase):
+
+    def tearDown(self):
+        fixed_point.disable()
+
+    def test_disabled_by_default(self):
+        self.assertFalse(fixed_point.is_enabled())
+        self.assertIsNone(fixed_point.resolution())
+        point = Point(1.23456789123, 2, 3)
+        self.assertIs(fixed_point.snapped(point), point)
+
+    def test_invalid_resolution(self):
+        with self.assertRaises(ValueError):
+            fixed_point.enable(0)
+        with self.assertRaises(ValueError):
+            fixed_point.enable(1e-6)
+
+    def test_enabled_context(self):
+        with fixed_point.enabled(1e-8):
+            self.assertTrue(fixed_point.is_enabled())
+            self.assertEqual(fixed_point.resolution(), 1e-8)
+            with fixed_point.enabled():
+                self.assertEqual(fixed_point.resolution(), fixed_point.NANOMETRES)
+            self.assertEqual(fixed_point.resolution(), 1e-8)
+        self.assertFalse(fixed_point.is_enabled())
+
+    def test_fixed_coordinates(self):
+        fixed_point.enable()
+        self.assertEqual(fixed_point.fixed_coordinates(Point(1.5, -2.0000000004, 0.0000000006)),
+                         (1500000000, -2000000000, 1))
+
+    def test_snapped(self):
+        fixed_point.enable()
+        self.assertEqual(fixed_point.snapped(Point(1.2345678904, 0.1 + 0.2, -3)),
+                         Point(1.23456789, 0.3, -3))
+        point = Point(1.5, 2, 0)
+        self.assertIs(fixed_point.snapped(point), point)
+
+    def test_same_point(self):
+        point = Point(1, 2)
+        self.assertTrue(fixed_point.same_point(point, Point(1.00000001, 2), 7))
+        fixed_point.enable()
+        self.assertTrue(fixed_point.same_point(point, Point(1.0000000004, 2), 7))
+        self.assertFalse(fixed_point.same_point(point, Point(1.000000001, 2), 7))
+        # Points are the same exactly when their snapped versions are equal
+        # (and hash the same)
+        first, second, third = Point(1.0000000004, 2), Point(1.0000000006, 2), Point(1.0000000014, 2)
+        self.assertFalse(fixed_point.same_point(first, second, 7))
+        self.assertTrue(fixed_point.same_point(second, third, 7))
+        self.assertEqual(fixed_point.snapped(second), fixed_point.snapped(third))
+        self.assertEqual(hash(fixed_point.snapped(second)), hash(fixed_point.snapped(third)))
+
+    def test_snapped_road_nodes_are_equal(self):
+        fixed_point.enable()
+        node = RoadSimpleNode(Point(0.1 + 0.2, 1))
+        other = RoadSimpleNode(Point(0.3, 1))
+        self.assertEqual(node.center, Point(0.3, 1))
+        self.assertEqual(node, other)
+        self.assertEqual(hash(node), hash(other))
+
+    def test_snapped_road_lookups(self):
+        fixed_point.enable()
+        street = Street.from_control_points([Point(0, 0), Point(0.1 + 0.2, 0), Point(1, 0)])
+        self.assertEqual(street.node_at_point(Point(0.3, 0)).center, Point(0.3, 0))
+
+    def test_waypoints_are_compared_exactly(self):
+        fixed_point.enable()
+        lane = object()
+        waypoint = Waypoint(lane, Point(0.1 + 0.2, 1), 90, None)
+        other = Waypoint(lane, Point(0.3, 1), 90, None)
+        self.assertEqual(waypoint.center(), Point(0.3, 1))
+        self.assertEqual(waypoint, other)
+        self.assertEqual(hash(waypoint), hash(other))
+        self.assertNotEqual(waypoint, Waypoint(lane, Point(0.300000001, 1), 90, None))
+
+    def test_path_vertices_are_snapped(self):
+        fixed_point.enable()
+        path = Path([LineSegment(Point(0, 0), Point(0.1 + 0.2, 0)),
+                     LineSegment(Point(0.1 + 0.2, 0), Point(1, 1))])
+        self.assertEqual(path.vertices(), [Point(0, 0), Point(0.3, 0), Point(1, 1)])
+
+    def test_long_segments_include_snapped_points(self):
+        fixed_point.enable()
+        segment = LineSegment(Point(-613.3, -217.9), Point(704.1, 298.7))
+        for index in range(1, 100):
+            point = fixed_point.snapped(segment.point_at_offset(segment.length() * index / 100.0))
+            self.assertTrue(segment.includes_point(point))
+
+    def test_generate_city_with_long_roads(self):
+        fixed_point.enable()
+        city = City()
+        city.add_intersection_at(Point(0, 0))
+        city.add_road(Trunk.from_control_points([Point(-613.3, -217.9), Point(0, 0), Point(704.1, 298.7)]))
+        city.add_road(Street.from_control_points([Point(-123.7, 811.9), Point(0, 0), Point(97.3, -733.1)]))
+        self.assertIn('end_file', RNDFGenerator(city, LatLon(10, 65)).generate())
+        self.assertIn('connections:', MonolaneGenerator(city).generate())
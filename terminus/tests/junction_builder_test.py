@@ -0,0 +1,158 @@
+"""
+Copyright (C) 2017 Open Source Robotics Foundation
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import unittest
+import mock
+
+from geometry.point import Point
+
+from models.city import City
+from models.street import Street
+from models.junction_builder import JunctionBuilder
+from models.lines_and_arcs_geometry import LinesAndArcsGeometry
+
+
+class JunctionBuilderTest(unittest.TestCase):
+
+    def _cross_city(self):
+        city = City()
+        city.add_intersection_at(Point(0, 0))
+        city.add_road(Street.from_control_points([Point(-50, 0), Point(0, 0), Point(50, 0)]))
+        city.add_road(Street.from_control_points([Point(0, -50), Point(0, 0), Point(0, 50)]))
+        return city
+
+    def _builder(self, city):
+        node = city.intersections[Point(0, 0)]
+        return JunctionBuilder(node, node.center, LinesAndArcsGeometry)
+
+    def test_add_connections_to_lanes(self):
+        city = self._cross_city()
+        builder = self._builder(city)
+        builder.add_connections_to_lanes()
+        out_connections = []
+        for road in city.roads:
+            for lane in road.lanes():
+                out_connections.extend(lane.out_connections_for(LinesAndArcsGeometry))
+        # Each lane exits the junction to the lane of the other road
+        self.assertEqual(len(out_connections), 2)
+
+    def test_lane_crossings_are_computed_once_per_radius(self):
+        city = self._cross_city()
+        builder = self._builder(city)
+        lane = city.roads[0].lane_at(0)
+        geometry = lane.geometry_for(LinesAndArcsGeometry)
+        with mock.patch.object(geometry, 'intersections_around', wraps=geometry.intersections_around) as spy:
+            crossings = builder._lane_crossings_at(lane, 5.0)
+            self.assertIs(builder._lane_crossings_at(lane, 5.0), crossings)
+            builder._lane_crossings_at(lane, 6.0)
+        self.assertEqual(spy.call_count, 2)
+        self.assertEqual(len(crossings), 2)
+
+    def test_new_waypoints_are_created_on_each_attempt(self):
+        city = self._cross_city()
+        builder = self._builder(city)
+        lane = city.roads[0].lane_at(0)
+        crossings = builder._lane_crossings_at(lane, 5.0)
+        first_waypoints = builder._get_waypoints_for_intersections(lane, crossings)
+        second_waypoints = builder._get_waypoints_for_intersections(lane, crossings)
+        for first, second in zip(first_waypoints, second_waypoints):
+            self.assertIsNot(first, second)
+            self.assertEqual(first, second)
+
+    def _search(self, builder, outcome_for):
+        radii = []
+
+        def recorded_outcome_for(radius):
+            radii.append(radius)
+            return outcome_for(radius)
+        return builder._search_radius(recorded_outcome_for), radii
+
+    def test_search_radius_above_preferred_one(self):
+        builder = self._builder(self._cross_city())
+        radius, radii = self._search(builder, lambda radius: JunctionBuilder.FITS if radius >= 8.5 else JunctionBuilder.TOO_SMALL)
+        self.assertEqual(radius, 8.5)
+        self.assertEqual(radii[0], 5.0)
+        self.assertLessEqual(len(radii), 6)
+
+    def test_search_radius_below_preferred_one(self):
+        builder = self._builder(self._cross_city())
+
+        def outcome_for(radius):
+            if radius > 3.0:
+                return JunctionBuilder.TOO_BIG
+            if radius < 1.5:
+                return JunctionBuilder.TOO_SMALL
+            return JunctionBuilder.FITS
+        radius, radii = self._search(builder, outcome_for)
+        self.assertEqual(radius, 3.0)
+        self.assertLessEqual(len(radii), 6)
+
+    def test_search_radius_finds_narrow_interval(self):
+        builder = self._builder(self._cross_city())
+
+        def outcome_for(radius):
+            if radius < 11.0:
+                return JunctionBuilder.TOO_SMALL
+            if radius > 11.0:
+                return JunctionBuilder.TOO_BIG
+            return JunctionBuilder.FITS
+        radius, radii = self._search(builder, outcome_for)
+        self.assertEqual(radius, 11.0)
+        self.assertLessEqual(len(radii), 10)
+
+    def test_search_radius_without_fitting_radius(self):
+        builder = self._builder(self._cross_city())
+        radius, _ = self._search(builder, lambda radius: JunctionBuilder.TOO_SMALL)
+        self.assertIsNone(radius)
+        radius, _ = self._search(builder, lambda radius: JunctionBuilder.TOO_SMALL if radius < 7.0 else JunctionBuilder.TOO_BIG)
+        self.assertIsNone(radius)
+        radius, radii = self._search(builder, lambda radius: None)
+        self.assertIsNone(radius)
+        self.assertEqual(radii, [5.0])
+
+    def test_search_radius_scans_radii_when_outcomes_are_not_an_interval(self):
+        builder = self._builder(self._cross_city())
+        # Too small on both ends of the bigger radii, but one in between fits
+        radius, _ = self._search(builder, lambda radius: JunctionBuilder.FITS if radius == 9.0 else JunctionBuilder.TOO_SMALL)
+        self.assertEqual(radius, 9.0)
+        # The bisection finds no fitting radius above the preferred one, so
+        # the scan goes on with the ones below it
+        radius, _ = self._search(builder, lambda radius: JunctionBuilder.FITS if radius in [2.0, 3.5] else JunctionBuilder.TOO_SMALL)
+        self.assertEqual(radius, 3.5)
+
+        def outcome_for(radius):
+            if radius in [6.0, 13.0]:
+                return None
+            if radius == 12.5:
+                return JunctionBuilder.FITS
+            return JunctionBuilder.TOO_SMALL if radius < 14.0 else JunctionBuilder.TOO_BIG
+        radius, _ = self._search(builder, outcome_for)
+        self.assertEqual(radius, 12.5)
+
+    def test_sharp_turn_uses_a_bigger_radius(self):
+        # Roads meeting at a sharp angle need a bigger circle to be connected
+        # with arcs that are not too tight
+        city = City()
+        city.add_intersection_at(Point(0, 0))
+        city.add_road(Street.from_control_points([Point(-50, 0), Point(0, 0)]))
+        city.add_road(Street.from_control_points([Point(0, 0), Point(-10, 50)]))
+        builder = self._builder(city)
+        connections = builder.build_connections()
+        self.assertTrue(connections)
+        for connection in connections:
+            self.assertTrue(connection.primitive().is_valid_path_connection())
+        self.assertEqual(builder._attempt_at(5.0).values()[0][0], JunctionBuilder.TOO_SMALL)
+        self.assertLess(len(builder._attempts), len(JunctionBuilder.RADII) / 2)
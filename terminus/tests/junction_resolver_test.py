@@ -0,0 +1,106 @@
+"""
+Copyright (C) 2017 Open Source Robotics Foundation
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import shutil
+import tempfile
+import unittest
+
+from geometry.point import Point
+
+from models.city import City
+from models.street import Street
+from models.trunk import Trunk
+from models.junction_resolver import JunctionResolver
+from models.lane_geometry_cache import LaneGeometryCache
+from models.polyline_geometry import PolylineGeometry
+from models.lines_and_arcs_geometry import LinesAndArcsGeometry
+
+
+class JunctionResolverTest(unittest.TestCase):
+
+    def _grid_city(self):
+        city = City()
+        for x in range(3):
+            for y in range(3):
+                city.add_intersection_at(Point(x * 100, y * 100))
+        for x in range(3):
+            city.add_road(Trunk.from_control_points([Point(x * 100, y * 100) for y in range(3)]))
+        for y in range(3):
+            city.add_road(Street.from_control_points([Point(x * 100, y * 100) for x in range(3)]))
+        return city
+
+    def _describe(self, city, geometry_class):
+        description = []
+        for road in city.roads:
+            for lane in road.lanes():
+                for waypoint in lane.waypoints_for(geometry_class):
+                    description.append((waypoint.center().to_tuple(), waypoint.heading()))
+                for connection in lane.out_connections_for(geometry_class):
+                    description.append((connection.start_point().to_tuple(), connection.end_point().to_tuple()))
+        return description
+
+    def test_junctions_follow_lazy_resolution_order(self):
+        city = self._grid_city()
+        resolver = JunctionResolver(city, PolylineGeometry)
+        centers = map(lambda (node, _): node.center, resolver.junctions())
+        self.assertEqual(len(centers), 9)
+        # All the junctions of the first trunk are reached by its lanes first,
+        # then the remaining ones of the second trunk and so on
+        self.assertEqual(set(centers[0:3]), set([Point(0, 0), Point(0, 100), Point(0, 200)]))
+        self.assertEqual(set(centers[3:6]), set([Point(100, 0), Point(100, 100), Point(100, 200)]))
+        self.assertEqual(set(centers[6:9]), set([Point(200, 0), Point(200, 100), Point(200, 200)]))
+
+    def test_run_resolves_all_junctions(self):
+        city = self._grid_city()
+        JunctionResolver(city, LinesAndArcsGeometry).run()
+        for road in city.roads:
+            for lane in road.lanes():
+                self.assertEqual(lane.geometry_for(LinesAndArcsGeometry).unresolved_intersections(), [])
+        self.assertEqual(JunctionResolver(city, LinesAndArcsGeometry).junctions(), [])
+
+    def test_run_matches_lazy_resolution(self):
+        # The resolver finds the lane elements around each junction with a
+        # LaneElementIndex, while lazy resolution goes through the lane paths
+        for geometry_class in [PolylineGeometry, LinesAndArcsGeometry]:
+            lazy_city = self._grid_city()
+            expected = self._describe(lazy_city, geometry_class)
+            city = self._grid_city()
+            JunctionResolver(city, geometry_class).run()
+            self.assertEqual(self._describe(city, geometry_class), expected)
+
+    def test_run_in_workers_matches_lazy_resolution(self):
+        for geometry_class in [PolylineGeometry, LinesAndArcsGeometry]:
+            lazy_city = self._grid_city()
+            expected = self._describe(lazy_city, geometry_class)
+            city = self._grid_city()
+            JunctionResolver(city, geometry_class, workers=2).run()
+            self.assertEqual(self._describe(city, geometry_class), expected)
+
+    def test_run_with_cache(self):
+        directory = tempfile.mkdtemp()
+        try:
+            lazy_city = self._grid_city()
+            expected = self._describe(lazy_city, LinesAndArcsGeometry)
+            cache = LaneGeometryCache(directory)
+            JunctionResolver(self._grid_city(), LinesAndArcsGeometry, cache=cache).run()
+            self.assertEqual(cache.statistics()['stores'], 9)
+            for workers in [1, 2]:
+                city = self._grid_city()
+                JunctionResolver(city, LinesAndArcsGeometry, workers, cache).run()
+                self.assertEqual(self._describe(city, LinesAndArcsGeometry), expected)
+            self.assertEqual(cache.statistics()['hits'], 18)
+        finally:
+            shutil.rmtree(directory)
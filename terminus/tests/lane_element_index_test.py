@@ -0,0 +1,77 @@
+"""
+Copyright (C) 2017 Open Source Robotics Foundation
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import unittest
+
+from geometry.point import Point
+from geometry.bounding_box import BoundingBox
+
+from models.city import City
+from models.street import Street
+from models.lane_element_index import LaneElementIndex
+from models.polyline_geometry import PolylineGeometry
+from models.lines_and_arcs_geometry import LinesAndArcsGeometry
+
+
+class LaneElementIndexTest(unittest.TestCase):
+
+    def _city(self):
+        city = City()
+        city.add_road(Street.from_control_points([Point(0, 0), Point(100, 0), Point(200, 100)]))
+        city.add_road(Street.from_control_points([Point(0, 100), Point(0, 200)]))
+        return city
+
+    def _matches(self, entries):
+        return map(lambda entry: (entry.lane(), entry.element_index()), entries)
+
+    def test_entries(self):
+        city = self._city()
+        index = LaneElementIndex(city, PolylineGeometry)
+        self.assertEqual(index.entries_count(), 3)
+        first_lane = city.roads[0].lane_at(0)
+        second_lane = city.roads[1].lane_at(0)
+        self.assertEqual(self._matches(index.entries()), [(first_lane, 0), (first_lane, 1), (second_lane, 0)])
+        for entry in index.entries():
+            self.assertIs(entry.element(), entry.lane().path_for(PolylineGeometry).element_at(entry.element_index()))
+
+    def test_elements_near(self):
+        city = self._city()
+        index = LaneElementIndex(city, PolylineGeometry, 10)
+        first_lane = city.roads[0].lane_at(0)
+        second_lane = city.roads[1].lane_at(0)
+        self.assertEqual(self._matches(index.elements_near(Point(50, 1), 2)), [(first_lane, 0)])
+        self.assertEqual(self._matches(index.elements_near(Point(100, 0), 1)), [(first_lane, 0), (first_lane, 1)])
+        self.assertEqual(self._matches(index.elements_near(Point(1, 150), 2)), [(second_lane, 0)])
+        self.assertEqual(self._matches(index.elements_near(Point(-50, -50), 10)), [])
+
+    def test_elements_in_box(self):
+        city = self._city()
+        index = LaneElementIndex(city, LinesAndArcsGeometry)
+        second_lane = city.roads[1].lane_at(0)
+        entries = index.elements_in_box(BoundingBox(Point(-10, 150), Point(10, 160)))
+        self.assertEqual(self._matches(entries), [(second_lane, 0)])
+        entries = index.elements_in_box(BoundingBox(Point(90, -10), Point(110, 10)))
+        self.assertTrue(entries)
+        self.assertTrue(all(map(lambda entry: entry.road() is city.roads[0], entries)))
+
+    def test_element_indexes_near(self):
+        city = self._city()
+        index = LaneElementIndex(city, PolylineGeometry, 10)
+        first_lane = city.roads[0].lane_at(0)
+        second_lane = city.roads[1].lane_at(0)
+        self.assertEqual(index.element_indexes_near(Point(100, 0), 1), {first_lane: [0, 1]})
+        self.assertEqual(index.element_indexes_near(Point(0, 50), 50), {first_lane: [0], second_lane: [0]})
+        self.assertEqual(index.element_indexes_near(Point(-50, -50), 10), {})
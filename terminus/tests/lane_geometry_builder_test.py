@@ -0,0 +1,100 @@
+"""
+Copyright (C) 2017 Open Source Robotics Foundation
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import shutil
+import tempfile
+import unittest
+
+from geometry.point import Point
+
+from models.city import City
+from models.street import Street
+from models.trunk import Trunk
+from models.lane_geometry_builder import LaneGeometryBuilder
+from models.lane_geometry_cache import LaneGeometryCache
+from models.polyline_geometry import PolylineGeometry
+from models.lines_and_arcs_geometry import LinesAndArcsGeometry
+
+
+class LaneGeometryBuilderTest(unittest.TestCase):
+
+    def _grid_city(self):
+        city = City()
+        for x in range(3):
+            for y in range(3):
+                city.add_intersection_at(Point(x * 100, y * 100))
+        for x in range(3):
+            city.add_road(Trunk.from_control_points([Point(x * 100, y * 100 + x * 7) for y in range(3)]))
+        for y in range(3):
+            city.add_road(Street.from_control_points([Point(x * 100, y * 100 + x * 7) for x in range(3)]))
+        return city
+
+    def _describe(self, city, geometry_class):
+        description = []
+        for road in city.roads:
+            for lane in road.lanes():
+                geometry = lane.geometry_for(geometry_class)
+                description.append(geometry.base_path().elements())
+                description.append(map(lambda node: node.center, geometry.unresolved_intersections()))
+                for waypoint in lane.waypoints_for(geometry_class):
+                    description.append((waypoint.center().to_tuple(), waypoint.heading()))
+                for connection in lane.out_connections_for(geometry_class):
+                    description.append((connection.start_point().to_tuple(), connection.end_point().to_tuple()))
+        return description
+
+    def test_run_installs_all_geometries(self):
+        city = self._grid_city()
+        builder = LaneGeometryBuilder(city, [PolylineGeometry, LinesAndArcsGeometry])
+        self.assertEqual(builder.pending_geometries_count(), 2 * 9)
+        builder.run()
+        for road in city.roads:
+            for lane in road.lanes():
+                self.assertTrue(lane.has_geometry(PolylineGeometry))
+                self.assertTrue(lane.has_geometry(LinesAndArcsGeometry))
+        self.assertEqual(LaneGeometryBuilder(city, [PolylineGeometry]).pending_geometries_count(), 0)
+
+    def test_restore_matches_described_geometry(self):
+        city = self._grid_city()
+        lane = city.roads[0].lane_at(0)
+        geometry = LinesAndArcsGeometry(lane)
+        restored = LinesAndArcsGeometry.restore(lane, geometry.describe())
+        self.assertEqual(restored.path().elements(), geometry.path().elements())
+        self.assertEqual(map(lambda waypoint: waypoint.center(), restored._waypoints),
+                         map(lambda waypoint: waypoint.center(), geometry._waypoints))
+        self.assertEqual(restored.unresolved_intersections(), geometry.unresolved_intersections())
+
+    def test_run_in_workers_matches_lazy_build(self):
+        for geometry_class in [PolylineGeometry, LinesAndArcsGeometry]:
+            lazy_city = self._grid_city()
+            expected = self._describe(lazy_city, geometry_class)
+            city = self._grid_city()
+            LaneGeometryBuilder(city, [geometry_class], workers=2).run()
+            self.assertEqual(self._describe(city, geometry_class), expected)
+
+    def test_run_with_cache(self):
+        directory = tempfile.mkdtemp()
+        try:
+            lazy_city = self._grid_city()
+            expected = self._describe(lazy_city, LinesAndArcsGeometry)
+            cache = LaneGeometryCache(directory)
+            LaneGeometryBuilder(self._grid_city(), [LinesAndArcsGeometry], cache=cache).run()
+            self.assertEqual(cache.statistics()['stores'], 9)
+            city = self._grid_city()
+            LaneGeometryBuilder(city, [LinesAndArcsGeometry], cache=cache).run()
+            self.assertEqual(cache.statistics()['hits'], 9)
+            self.assertEqual(self._describe(city, LinesAndArcsGeometry), expected)
+        finally:
+            shutil.rmtree(directory)
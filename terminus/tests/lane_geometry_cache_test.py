@@ -0,0 +1,99 @@
+"""
+Copyright (C) 2017 Open Source Robotics Foundation
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from geometry.point import Point
+
+from models.street import Street
+from models.trunk import Trunk
+from models.lane_geometry_cache import LaneGeometryCache, road_digest
+
+
+class LaneGeometryCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_get_missing_entry(self):
+        cache = LaneGeometryCache(self.directory)
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.statistics()['misses'], 1)
+
+    def test_put_and_get(self):
+        cache = LaneGeometryCache(self.directory)
+        cache.put('a', [Point(1, 2), (3.5, None)])
+        self.assertEqual(cache.get('a'), [Point(1, 2), (3.5, None)])
+        statistics = cache.statistics()
+        self.assertEqual(statistics['hits'], 1)
+        self.assertEqual(statistics['stores'], 1)
+        self.assertEqual(statistics['entries'], 1)
+        self.assertEqual(statistics['size'], cache.size())
+
+    def test_entries_persist(self):
+        LaneGeometryCache(self.directory).put('a', 1)
+        cache = LaneGeometryCache(self.directory)
+        self.assertEqual(cache.entries_count(), 1)
+        self.assertEqual(cache.get('a'), 1)
+
+    def test_unreadable_entries_are_missing(self):
+        cache = LaneGeometryCache(self.directory)
+        cache.put('a', 1)
+        with open(os.path.join(self.directory, 'a.entry'), 'wb') as entry_file:
+            entry_file.write('garbage')
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.entries_count(), 0)
+
+    def test_evicts_least_recently_used(self):
+        cache = LaneGeometryCache(self.directory)
+        cache.put('a', 'a' * 100)
+        entry_size = cache.size()
+        cache = LaneGeometryCache(self.directory, max_size=2 * entry_size)
+        cache.put('b', 'b' * 100)
+        cache.get('a')
+        cache.put('c', 'c' * 100)
+        self.assertEqual(cache.statistics()['evictions'], 1)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), 'a' * 100)
+        self.assertEqual(cache.get('c'), 'c' * 100)
+
+    def test_clear(self):
+        cache = LaneGeometryCache(self.directory)
+        cache.put('a', 1)
+        cache.clear()
+        self.assertEqual(cache.entries_count(), 0)
+        self.assertEqual(cache.size(), 0)
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_key_for(self):
+        self.assertEqual(LaneGeometryCache.key_for('a', 1), LaneGeometryCache.key_for('a', 1))
+        self.assertNotEqual(LaneGeometryCache.key_for('a', 1), LaneGeometryCache.key_for('a', 2))
+
+    def test_road_digest(self):
+        points = [Point(0, 0), Point(50, 0), Point(100, 10)]
+        digest = road_digest(Street.from_control_points(points))
+        self.assertEqual(road_digest(Street.from_control_points(points)), digest)
+        self.assertNotEqual(road_digest(Trunk.from_control_points(points)), digest)
+        self.assertNotEqual(road_digest(Street.from_control_points(points[0:2])), digest)
+        road = Street.from_control_points(points)
+        road.add_lane(4, width=3)
+        self.assertNotEqual(road_digest(road), digest)
@@ -0,0 +1,160 @@
+"""
+Copyright (C) 2017 Open Source Robotics Foundation
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+import shutil
+import tempfile
+import unittest
+
+from geometry.point import Point
+from geometry.latlon import LatLon
+
+from models.city import City
+from models.street import Street
+from models.trunk import Trunk
+from models.lane_geometry_cache import LaneGeometryCache
+from models.lane_geometry_pool import LaneGeometryPool
+from models.polyline_geometry import PolylineGeometry
+from models.lines_and_arcs_geometry import LinesAndArcsGeometry
+
+from generators.rndf_generator import RNDFGenerator
+from generators.monolane_generator import MonolaneGenerator
+
+
+class LaneGeometryPoolTest(unittest.TestCase):
+
+    def _grid_city(self):
+        city = City('Grid')
+        for x in range(3):
+            for y in range(3):
+                city.add_intersection_at(Point(x * 100, y * 100))
+        for x in range(3):
+            road = Trunk.from_control_points([Point(x * 100, y * 100) for y in range(3)])
+            road.name = 'Trunk {0}'.format(x)
+            city.add_road(road)
+        for y in range(3):
+            road = Street.from_control_points([Point(x * 100, y * 100) for x in range(3)])
+            road.name = 'Street {0}'.format(y)
+            city.add_road(road)
+        return city
+
+    def _blocks_city(self, size):
+        city = City('Blocks')
+        for x in range(size):
+            for y in range(size):
+                city.add_intersection_at(Point(x * 100, y * 100))
+        for x in range(size):
+            for y in range(size - 1):
+                road = Street.from_control_points([Point(x * 100, y * 100), Point(x * 100, (y + 1) * 100)])
+                road.name = 'Avenue {0}-{1}'.format(x, y)
+                city.add_road(road)
+                road = Street.from_control_points([Point(y * 100, x * 100), Point((y + 1) * 100, x * 100)])
+                road.name = 'Street {0}-{1}'.format(x, y)
+                city.add_road(road)
+        return city
+
+    def _lanes(self, city):
+        return [lane for road in city.roads for lane in road.lanes()]
+
+    def _describe(self, city, geometry_class):
+        description = []
+        for lane in self._lanes(city):
+            for waypoint in lane.waypoints_for(geometry_class):
+                description.append((waypoint.center().to_tuple(), waypoint.heading()))
+            for connection in lane.out_connections_for(geometry_class):
+                description.append((connection.start_point().to_tuple(), connection.end_point().to_tuple()))
+        return description
+
+    def test_geometries_within_budget_are_kept(self):
+        city = self._grid_city()
+        pool = LaneGeometryPool(10 ** 9)
+        city.set_geometry_pool(pool)
+        self._describe(city, LinesAndArcsGeometry)
+        city.enforce_geometry_budget()
+        self.assertEqual(pool.statistics()['entries'], 9)
+        self.assertEqual(pool.statistics()['evictions'], 0)
+
+    def test_least_recently_used_geometries_are_evicted_first(self):
+        city = self._grid_city()
+        lanes = self._lanes(city)
+        expected = self._describe(city, LinesAndArcsGeometry)
+        sizes = map(lambda lane: lane.built_geometry(LinesAndArcsGeometry).estimated_size(), lanes)
+        pool = LaneGeometryPool(sum(sizes) - 1)
+        city.set_geometry_pool(pool)
+        lanes[0].waypoints_for(LinesAndArcsGeometry)
+        city.enforce_geometry_budget()
+        self.assertEqual(pool.statistics()['evictions'], 1)
+        self.assertFalse(lanes[1].has_geometry(LinesAndArcsGeometry))
+        self.assertTrue(lanes[0].has_geometry(LinesAndArcsGeometry))
+        # Evicted geometries are built again, along with their junctions
+        self.assertEqual(self._describe(city, LinesAndArcsGeometry), expected)
+
+    def test_geometries_with_unresolved_junctions_are_evicted(self):
+        city = self._grid_city()
+        expected = self._describe(city, PolylineGeometry)
+        city = self._grid_city()
+        pool = LaneGeometryPool(0)
+        city.set_geometry_pool(pool)
+        for lane in self._lanes(city):
+            lane.geometry_for(PolylineGeometry)
+        city.enforce_geometry_budget()
+        self.assertEqual(pool.statistics()['evictions'], 9)
+        self.assertEqual(pool.statistics()['entries'], 0)
+        self.assertEqual(self._describe(city, PolylineGeometry), expected)
+
+    def test_evicted_geometries_are_reloaded_from_spill(self):
+        directory = tempfile.mkdtemp()
+        try:
+            city = self._grid_city()
+            expected = self._describe(city, PolylineGeometry)
+            pool = LaneGeometryPool(0, LaneGeometryCache(directory))
+            city.set_geometry_pool(pool)
+            city.enforce_geometry_budget()
+            self.assertEqual(pool.statistics()['evicted'], 9)
+            self.assertEqual(pool.statistics()['entries'], 0)
+            self.assertEqual(self._describe(city, PolylineGeometry), expected)
+            self.assertEqual(pool.statistics()['reloads'], 9)
+        finally:
+            shutil.rmtree(directory)
+
+    def test_generators_keep_geometries_within_budget_while_writing(self):
+        expected_rndf = RNDFGenerator(self._blocks_city(5), LatLon(10, 65)).generate()
+        expected_monolane = MonolaneGenerator(self._blocks_city(5)).generate()
+        directory = tempfile.mkdtemp()
+        try:
+            city = self._blocks_city(5)
+            lanes_count = len(self._lanes(city))
+            pool = LaneGeometryPool(0, LaneGeometryCache(directory))
+            city.set_geometry_pool(pool)
+            self.assertEqual(RNDFGenerator(city, LatLon(10, 65)).generate(), expected_rndf)
+            self.assertEqual(MonolaneGenerator(city).generate(), expected_monolane)
+            # Only the geometries around the road being written are in
+            # memory at any time
+            self.assertTrue(pool.statistics()['peak_entries'] < lanes_count / 2)
+            self.assertEqual(pool.statistics()['entries'], 0)
+        finally:
+            shutil.rmtree(directory)
+
+    def test_discarded_geometries_are_forgotten(self):
+        city = self._grid_city()
+        pool = LaneGeometryPool(0)
+        city.set_geometry_pool(pool)
+        self._describe(city, PolylineGeometry)
+        road = city.roads[0]
+        city.remove_road(road)
+        city.discard_stale_geometries()
+        built_lanes = filter(lambda lane: lane.has_geometry(PolylineGeometry), self._lanes(city))
+        self.assertEqual(pool.statistics()['entries'], len(built_lanes))
+        self._describe(city, PolylineGeometry)
+        self.assertEqual(pool.statistics()['entries'], 9 - len(road.lanes()))
@@ -208,3 +208,20 @@ class LatLonTest(unittest.TestCase):
         self.assertTrue(LatLon(45, -10).is_inside(LatLon(40, -10), LatLon(50, 10)))
         # in the corner
         self.assertTrue(LatLon(45, -10).is_inside(LatLon(45, -10), LatLon(50, 10)))
+
+    def test_normalized_arrays(self):
+        lats, lons = LatLon.normalized_arrays([100, 25, 45, 360, -100, 190, 90],
+                                              [190, -180, 90, 360, -30, 30, 7])
+        for lat, lon, expected_lat, expected_lon in zip(lats, lons,
+                                                        [80, 25, 45, 0, -80, -10, 90],
+                                                        [10, 180, 90, 0, 150, -150, 0]):
+            self.assertEqual(lat, expected_lat)
+            self.assertEqual(lon, expected_lon)
+
+    def test_arrays_to_ecef(self):
+        x, y, z = LatLon.arrays_to_ecef([10, -35.5], [65, 120])
+        for index, lat_lon in enumerate([LatLon(10, 65), LatLon(-35.5, 120)]):
+            point_in_ecef = lat_lon.to_ecef()
+            self.assertAlmostEqual(x[index], point_in_ecef.x, places=6)
+            self.assertAlmostEqual(y[index], point_in_ecef.y, places=6)
+            self.assertAlmostEqual(z[index], point_in_ecef.z, places=6)
@@ -21,6 +21,7 @@ from math import *
 
 from geometry.point import Point
 from geometry.line_segment import LineSegment
+from geometry.bounding_box import BoundingBox
 
 
 class LineSegmentTest(CustomAssertionsMixin, unittest.TestCase):
@@ -54,6 +55,15 @@ class LineSegmentTest(CustomAssertionsMixin, unittest.TestCase):
         self.assertFalse(segment.includes_point(Point(0.5, 0.51, 0.5)))
         self.assertFalse(segment.includes_point(Point(0.5, 0.5, 0.51)))
 
+    def test_derived_quantities_are_computed_once(self):
+        segment = LineSegment(Point(1, 1), Point(4, 5))
+        self.assertIs(segment.direction_vector(), segment.direction_vector())
+        self.assertEqual(segment.direction_vector(), Point(3, 4))
+        self.assertEqual(segment.length(), 5)
+        self.assertEqual(segment.unit_direction(), (0.6, 0.8))
+        self.assertAlmostEqual(segment.start_heading(), 53.13010235)
+        self.assertEqual(segment.end_heading(), segment.start_heading())
+
     def test_includes_point_buffer(self):
         '''The point is slightly outside the line, so by increasing the buffer
         we use to test collinearity between vectors we make it pass'''
@@ -62,6 +72,16 @@ class LineSegmentTest(CustomAssertionsMixin, unittest.TestCase):
         self.assertFalse(segment.includes_point(Point(0.5, 0.01)))
         self.assertTrue(segment.includes_point(Point(0.5, 0.01), 0.01))
 
+    def test_includes_point_buffer_is_a_distance(self):
+        long_segment = LineSegment(Point(0, 0), Point(3000, 4000))
+        self.assertTrue(long_segment.includes_point(Point(1500.00000004, 1999.99999997)))
+        self.assertTrue(long_segment.includes_point(Point(3000.00000003, 4000.00000004)))
+        self.assertFalse(long_segment.includes_point(Point(1500.0000008, 1999.9999994)))
+        self.assertFalse(long_segment.includes_point(Point(3000.0000006, 4000.0000008)))
+        short_segment = LineSegment(Point(0, 0), Point(0.003, 0.004))
+        self.assertFalse(short_segment.includes_point(Point(0.0015008, 0.0019994)))
+        self.assertFalse(short_segment.includes_point(Point(-0.0000006, -0.0000008)))
+
     def test_is_orthogonal_to_touching_segments(self):
         target_segment = LineSegment(Point(2, 2), Point(4, 2))
         orthogonal_segment = LineSegment(Point(3, 1), Point(3, 2))
@@ -130,3 +150,12 @@ class LineSegmentTest(CustomAssertionsMixin, unittest.TestCase):
         original = LineSegment(Point(0, 0), Point(1, 1))
         expected = LineSegment(Point(0, 0), Point(2, 2))
         self.assertAlmostEqual(original.extended_by(sqrt(2)), expected)
+
+    def test_bounding_box(self):
+        segment = LineSegment(Point(3, -1), Point(-2, 4))
+        self.assertEqual(segment.bounding_box(), BoundingBox(Point(-2, -1), Point(3, 4)))
+
+    def test_bounding_circle(self):
+        circle = LineSegment(Point(0, 0), Point(6, 8)).bounding_circle()
+        self.assertPointAlmostEqual(circle.center(), Point(3, 4))
+        self.assertAlmostEqual(circle.radius(), 5)
@@ -24,6 +24,7 @@ from geometry.point import Point
 from geometry.line_segment import LineSegment
 from geometry.arc import Arc
 
+from models.city import City
 from models.lines_and_arcs_geometry import LinesAndArcsGeometry
 from models.street import Street
 
@@ -188,3 +189,29 @@ class LinesAndArcsGeometryTest(CustomAssertionsMixin, unittest.TestCase):
         self.assertAlmostEqual(elements[3].end_heading(), 0)
         self.assertAlmostEqual(elements[4].start_heading(), 0)
         self.assertAlmostEqual(elements[4].end_heading(), 0)
+
+    def test_waypoints_of_crossed_road(self):
+        city = City("Crossings")
+        road = Street.from_control_points([Point(0, 0), Point(100, 0), Point(200, 10), Point(250, 10), Point(300, 10)])
+        city.add_road(road)
+        for point in [Point(100, 0), Point(200, 10), Point(250, 10)]:
+            city.add_intersection_at(point)
+            city.add_road(Street.from_control_points([point + Point(0, -40), point, point + Point(0, 40)]))
+        lane = road.lane_at(0)
+        waypoints = lane.waypoints_for(LinesAndArcsGeometry)
+        path = lane.path_for(LinesAndArcsGeometry)
+        connections = lane.inner_connections_for(LinesAndArcsGeometry)
+
+        # One element and one connection between each pair of consecutive
+        # waypoints, in path order
+        self.assertEqual(len(path.elements()), len(waypoints) - 1)
+        self.assertEqual(len(connections), len(waypoints) - 1)
+        offsets = map(lambda waypoint: path.offset_for_point(waypoint.center()), waypoints)
+        self.assertEqual(offsets, sorted(offsets))
+        for index, connection in enumerate(connections):
+            self.assertIs(connection.start_waypoint(), waypoints[index])
+            self.assertIs(connection.end_waypoint(), waypoints[index + 1])
+            self.assertIs(connection.primitive(), path.element_at(index))
+            self.assertAlmostEqual(connection.primitive().start_point(), waypoints[index].center())
+            self.assertAlmostEqual(connection.primitive().end_point(), waypoints[index + 1].center())
+        self.assertEqual(len(filter(lambda waypoint: waypoint.is_intersection(), waypoints)), 6)
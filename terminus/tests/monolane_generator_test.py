@@ -18,6 +18,8 @@ limitations under the License.
 import unittest
 import textwrap
 
+from geometry.point import Point
+from models.lines_and_arcs_geometry import LinesAndArcsGeometry
 from generators.monolane_generator import MonolaneGenerator
 
 from test_cities_generator import TestCitiesGenerator
@@ -721,3 +723,19 @@ class MonolaneGeneratorTest(unittest.TestCase):
               explicit_end: points.s1_1_2
             s1_1_2-s1_1_3: {start: points.s1_1_2, length: 45.0, explicit_end: points.s1_1_3}
           groups: {}""")
+
+    def test_recreated_waypoints_are_mapped_to_the_same_ids(self):
+        city = self.test_generator.simple_street_city()
+        self._generate_yaml(city)
+        id_mapper = self.generator.monolane_id_mapper
+        lane = city.roads[0].lanes()[0]
+        old_ids = map(id_mapper.id_for, lane.waypoints_for(LinesAndArcsGeometry))
+        # Replace the waypoints with new (equal) objects, moving one of them
+        lane.drop_geometry(LinesAndArcsGeometry)
+        new_waypoints = lane.waypoints_for(LinesAndArcsGeometry)
+        self.assertEqual(map(id_mapper.id_for, new_waypoints), old_ids)
+        id_mapper.forget_waypoints()
+        moved_waypoint = new_waypoints[0]
+        lane.drop_geometry(LinesAndArcsGeometry)
+        moved_waypoint._center = moved_waypoint.center() + Point(1, 0)
+        self.assertRaises(KeyError, id_mapper.id_for, moved_waypoint)
@@ -0,0 +1,121 @@
+"""
+Copyright (C) 2017 Open Source Robotics Foundation
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+import bz2
+import os
+import shutil
+import struct
+import tempfile
+import unittest
+import zlib
+
+from geometry.latlon import LatLon
+
+from builders.osm_bounds import read_osm_bounds
+
+
+class OsmBoundsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _osm_file(self, body):
+        path = os.path.join(self.directory, 'map.osm')
+        with open(path, 'w') as osm_file:
+            osm_file.write('<?xml version="1.0" encoding="UTF-8"?>\n<osm version="0.6">\n')
+            osm_file.write(body)
+            osm_file.write('</osm>\n')
+        return path
+
+    def _varint(self, value):
+        data = ''
+        while True:
+            byte = value & 0x7f
+            value >>= 7
+            if value:
+                data += chr(byte | 0x80)
+            else:
+                return data + chr(byte)
+
+    def _zigzag(self, value):
+        return (value << 1) ^ (value >> 63)
+
+    def _field(self, field, value):
+        if isinstance(value, str):
+            return self._varint(field << 3 | 2) + self._varint(len(value)) + value
+        return self._varint(field << 3) + self._varint(value)
+
+    def _pbf_file(self, bbox, compressed=True):
+        # bbox is (left, right, top, bottom) in degrees
+        fields = []
+        for field, degrees in zip([1, 2, 3, 4], bbox):
+            fields.append(self._field(field, self._zigzag(int(round(degrees * 1e9)))))
+        header_block = self._field(1, ''.join(fields)) + self._field(4, 'OsmSchema-V0.6')
+        if compressed:
+            blob = self._field(2, len(header_block)) + self._field(3, zlib.compress(header_block))
+        else:
+            blob = self._field(1, header_block)
+        blob_header = self._field(1, 'OSMHeader') + self._field(3, len(blob))
+        path = os.path.join(self.directory, 'map.osm.pbf')
+        with open(path, 'wb') as pbf_file:
+            pbf_file.write(struct.pack('>I', len(blob_header)) + blob_header + blob)
+            # Whatever follows the header is never read
+            pbf_file.write('\x00\x00\x00')
+        return path
+
+    def test_bounds_at_the_head(self):
+        path = self._osm_file('<bounds minlat="10.5" minlon="-65.25" maxlat="10.75" maxlon="-65"/>\n'
+                              '<node id="1" lat="10.6" lon="-65.1"/>\n')
+        self.assertEqual(read_osm_bounds(path), (LatLon(10.5, -65.25), LatLon(10.75, -65)))
+
+    def test_bounds_after_other_elements(self):
+        path = self._osm_file('<node id="1" lat="10.6" lon="-65.1"><tag k="a" v="b"/></node>\n'
+                              '<bounds minlat="1" minlon="2" maxlat="3" maxlon="4"/>\n')
+        self.assertEqual(read_osm_bounds(path), (LatLon(1, 2), LatLon(3, 4)))
+
+    def test_scan_stops_at_the_bounds(self):
+        # Whatever follows the bounds is never parsed
+        path = self._osm_file('<bounds minlat="1" minlon="2" maxlat="3" maxlon="4"/>\n' +
+                              '<node id="1" lat="1" lon="2"/>\n' * 10000 + '<broken')
+        self.assertEqual(read_osm_bounds(path), (LatLon(1, 2), LatLon(3, 4)))
+
+    def test_missing_bounds(self):
+        path = self._osm_file('<node id="1" lat="10.6" lon="-65.1"/>\n')
+        self.assertRaises(ValueError, read_osm_bounds, path)
+
+    def test_compressed_xml_bounds(self):
+        path = os.path.join(self.directory, 'map.osm.bz2')
+        with open(path, 'wb') as osm_file:
+            osm_file.write(bz2.compress('<osm><bounds minlat="1" minlon="2" maxlat="3" maxlon="4"/></osm>'))
+        self.assertEqual(read_osm_bounds(path), (LatLon(1, 2), LatLon(3, 4)))
+
+    def test_pbf_bounds(self):
+        path = self._pbf_file((-65.25, -65, 10.75, 10.5))
+        origin, corner = read_osm_bounds(path)
+        self.assertAlmostEqual(origin.lat, 10.5)
+        self.assertAlmostEqual(origin.lon, -65.25)
+        self.assertAlmostEqual(corner.lat, 10.75)
+        self.assertAlmostEqual(corner.lon, -65)
+
+    def test_uncompressed_pbf_bounds(self):
+        path = self._pbf_file((2, 4, 3, 1), compressed=False)
+        origin, corner = read_osm_bounds(path)
+        self.assertAlmostEqual(origin.lat, 1)
+        self.assertAlmostEqual(origin.lon, 2)
+        self.assertAlmostEqual(corner.lat, 3)
+        self.assertAlmostEqual(corner.lon, 4)
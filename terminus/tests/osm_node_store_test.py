@@ -0,0 +1,102 @@
+"""
+Copyright (C) 2017 Open Source Robotics Foundation
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from geometry.latlon import LatLon
+
+from builders.osm_node_store import OsmNodeStore
+
+
+class OsmNodeStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.projector = LatLon(10, 65).enu_projector()
+        self.coords = [(30, 65.001, 10.002), (10, 65.0, 10.0), (20, 64.999, 9.998)]
+
+    def test_points_match_projector(self):
+        store = OsmNodeStore(self.projector)
+        store.add_coords(self.coords[:2])
+        store.add_coords(self.coords[2:])
+        self.assertEqual(len(store), 3)
+        self.assertEqual(store.ids().tolist(), [10, 20, 30])
+        for osmid, lon, lat in self.coords:
+            self.assertEqual(store.point_for(osmid), self.projector.to_point(LatLon(lat, lon)))
+            self.assertEqual(store.latlon_for(osmid), LatLon(lat, lon))
+
+    def test_points_for_keeps_order(self):
+        store = OsmNodeStore(self.projector)
+        store.add_coords(self.coords)
+        self.assertEqual(store.points_for([30, 10, 30]),
+                         map(store.point_for, [30, 10, 30]))
+
+    def test_only_wanted_nodes_are_kept(self):
+        store = OsmNodeStore(self.projector, [20, 30, 40])
+        store.add_coords(self.coords)
+        store.add_coords([(50, 65, 10)])
+        self.assertEqual(store.ids().tolist(), [20, 30])
+        self.assertTrue(20 in store)
+        self.assertFalse(10 in store)
+        self.assertFalse(40 in store)
+
+    def test_missing_node(self):
+        store = OsmNodeStore(self.projector)
+        store.add_coords(self.coords)
+        self.assertRaises(KeyError, store.point_for, 25)
+        self.assertRaises(KeyError, store.points_for, [10, 40])
+        self.assertRaises(KeyError, OsmNodeStore(self.projector).point_for, 10)
+
+    def test_frozen_store_rejects_nodes(self):
+        store = OsmNodeStore(self.projector)
+        store.freeze()
+        self.assertEqual(len(store), 0)
+        self.assertRaises(ValueError, store.add_coords, self.coords)
+
+    def test_memory_mapped_arrays(self):
+        directory = tempfile.mkdtemp()
+        try:
+            store = OsmNodeStore(self.projector, directory=directory)
+            store.add_coords(self.coords)
+            store.freeze()
+            self.assertTrue(isinstance(store.xs(), np.memmap))
+            in_memory = OsmNodeStore(self.projector)
+            in_memory.add_coords(self.coords)
+            self.assertEqual(store.points_for([10, 20, 30]), in_memory.points_for([10, 20, 30]))
+        finally:
+            shutil.rmtree(directory)
+
+    def test_wanted_nodes_are_written_to_the_directory_as_added(self):
+        directory = tempfile.mkdtemp()
+        try:
+            store = OsmNodeStore(self.projector, [10, 15, 20, 25, 30], directory)
+            store.CHUNK_SIZE = 2
+            store.add_coords(self.coords[:1])
+            xs = np.load(os.path.join(directory, 'xs.npy'), mmap_mode='r')
+            self.assertEqual(xs[4], self.projector.to_point(LatLon(10.002, 65.001)).x)
+            store.add_coords(self.coords[1:])
+            self.assertEqual(store.ids().tolist(), [10, 20, 30])
+            self.assertTrue(isinstance(store.xs(), np.memmap))
+            in_memory = OsmNodeStore(self.projector)
+            in_memory.add_coords(self.coords)
+            self.assertEqual(store.points_for([10, 20, 30]), in_memory.points_for([10, 20, 30]))
+            self.assertEqual(store.latlon_for(20), in_memory.latlon_for(20))
+            self.assertRaises(KeyError, store.point_for, 15)
+        finally:
+            shutil.rmtree(directory)
@@ -0,0 +1,79 @@
+"""
+Copyright (C) 2017 Open Source Robotics Foundation
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+import unittest
+
+from builders.osm_way_store import OsmWayFilter, OsmWayStore
+
+
+class OsmWayStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.way_filter = OsmWayFilter('highway', ['primary', 'residential'], ['oneway'])
+        self.ways = [(30, {'highway': 'residential', 'name': 'Third'}, [5, 6, 7]),
+                     (10, {'highway': 'primary', 'oneway': 'yes'}, [1, 2, 3, 5]),
+                     (40, {'building': 'yes'}, [8, 9, 10, 8]),
+                     (20, {'highway': 'footway'}, [3, 11]),
+                     (50, {'highway': 'residential'}, [12, 13, 12, 3])]
+
+    def test_filter_tags(self):
+        tags = {'highway': 'primary', 'oneway': 'yes', 'name': 'First'}
+        self.way_filter.filter_tags(tags)
+        self.assertEqual(tags, {'highway': 'primary', 'oneway': 'yes'})
+        tags = {'highway': 'footway', 'oneway': 'yes'}
+        self.way_filter.filter_tags(tags)
+        self.assertEqual(tags, {})
+
+    def test_only_selected_ways_are_kept(self):
+        store = OsmWayStore(self.way_filter)
+        store.add_ways(self.ways[:2])
+        store.add_ways(self.ways[2:])
+        self.assertEqual(len(store), 3)
+        self.assertEqual(list(store),
+                         [(10, {'highway': 'primary', 'oneway': 'yes'}, [1, 2, 3, 5]),
+                          (30, {'highway': 'residential'}, [5, 6, 7]),
+                          (50, {'highway': 'residential'}, [12, 13, 12, 3])])
+
+    def test_node_ids(self):
+        store = OsmWayStore(self.way_filter)
+        store.add_ways(self.ways)
+        self.assertEqual(store.node_ids().tolist(), [1, 2, 3, 5, 6, 7, 12, 13])
+
+    def test_shared_node_ids(self):
+        # Node 12 is visited twice by the same way, so it is not shared
+        store = OsmWayStore(self.way_filter)
+        store.add_ways(self.ways)
+        self.assertEqual(store.shared_node_ids().tolist(), [3, 5])
+
+    def test_split_at(self):
+        store = OsmWayStore(self.way_filter)
+        store.add_ways(self.ways)
+        way_indexes, starts, ends = store.split_at([3, 5, 7])
+        refs = store.refs().tolist()
+        pieces = [(way_index, refs[start:end + 1]) for way_index, start, end in zip(way_indexes, starts, ends)]
+        # Ways are not split at their ends
+        self.assertEqual(pieces, [(0, [1, 2, 3]), (0, [3, 5]), (1, [5, 6, 7]), (2, [12, 13, 12, 3])])
+
+    def test_empty_store(self):
+        store = OsmWayStore(self.way_filter)
+        store.add_ways(self.ways[2:4])
+        self.assertEqual(len(store), 0)
+        self.assertEqual(list(store), [])
+        self.assertEqual(store.shared_node_ids().tolist(), [])
+
+    def test_frozen_store_rejects_ways(self):
+        store = OsmWayStore(self.way_filter)
+        store.freeze()
+        self.assertRaises(ValueError, store.add_ways, self.ways)
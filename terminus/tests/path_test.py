@@ -0,0 +1,149 @@
+"""
+Copyright (C) 2017 Open Source Robotics Foundation
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import math
+import unittest
+from custom_assertions_mixin import CustomAssertionsMixin
+
+from geometry.point import Point
+from geometry.circle import Circle
+from geometry.line_segment import LineSegment
+from geometry.arc import Arc
+from geometry.path import Path
+from models.waypoint import Waypoint
+
+
+class PathTest(CustomAssertionsMixin, unittest.TestCase):
+
+    def _path(self):
+        # A 10m segment, a quarter of circle of radius 10 and another 10m segment
+        path = Path()
+        path.add_element(LineSegment(Point(0, 0), Point(10, 0)))
+        path.add_element(Arc(Point(10, 0), 0, 10, 90))
+        path.add_element(LineSegment(Point(20, 10), Point(20, 20)))
+        return path
+
+    def test_length(self):
+        self.assertAlmostEqual(self._path().length(), 20 + 5 * math.pi)
+        self.assertEqual(Path().length(), 0)
+
+    def test_point_at_offset(self):
+        path = self._path()
+        self.assertPointAlmostEqual(path.point_at_offset(0), Point(0, 0))
+        self.assertPointAlmostEqual(path.point_at_offset(5), Point(5, 0))
+        self.assertPointAlmostEqual(path.point_at_offset(10), Point(10, 0))
+        self.assertPointAlmostEqual(path.point_at_offset(10 + 5 * math.pi), Point(20, 10))
+        self.assertPointAlmostEqual(path.point_at_offset(15 + 5 * math.pi), Point(20, 15))
+        self.assertPointAlmostEqual(path.point_at_offset(path.length()), Point(20, 20))
+
+    def test_point_at_offset_greater_than_length(self):
+        path = self._path()
+        with self.assertRaises(ValueError):
+            path.point_at_offset(path.length() + 0.1)
+
+    def test_heading_at_offset(self):
+        path = self._path()
+        self.assertAlmostEqual(path.heading_at_offset(5), 0)
+        self.assertAlmostEqual(path.heading_at_offset(10 + 2.5 * math.pi), 45)
+        self.assertAlmostEqual(path.heading_at_offset(15 + 5 * math.pi), 90)
+
+    def test_element_index_at_offset(self):
+        path = self._path()
+        self.assertEqual(path.element_index_at_offset(0), 0)
+        self.assertEqual(path.element_index_at_offset(10), 0)
+        self.assertEqual(path.element_index_at_offset(11), 1)
+        self.assertEqual(path.element_index_at_offset(path.length()), 2)
+        self.assertAlmostEqual(path.element_start_offset(2), 10 + 5 * math.pi)
+
+    def test_offset_for_point(self):
+        path = self._path()
+        self.assertAlmostEqual(path.offset_for_point(Point(0, 0)), 0)
+        self.assertAlmostEqual(path.offset_for_point(Point(10, 0)), 10)
+        self.assertAlmostEqual(path.offset_for_point(Point(20, 15)), 15 + 5 * math.pi)
+        with self.assertRaises(ValueError):
+            path.offset_for_point(Point(5, 5))
+
+    def test_offset_for_point_with_start_offset(self):
+        # A path that goes and comes back over the same points
+        path = Path.polyline_from_points([Point(0, 0), Point(10, 0), Point(0, 0), Point(10, 0)])
+        self.assertAlmostEqual(path.offset_for_point(Point(5, 0)), 5)
+        self.assertAlmostEqual(path.offset_for_point(Point(5, 0), 5), 5)
+        self.assertAlmostEqual(path.offset_for_point(Point(5, 0), 6), 15)
+        self.assertAlmostEqual(path.offset_for_point(Point(5, 0), 16), 25)
+        self.assertAlmostEqual(path.offset_for_point(Point(10, 0), 10), 10)
+        with self.assertRaises(ValueError):
+            path.offset_for_point(Point(5, 0), 26)
+
+    def test_offsets_are_updated_when_elements_change(self):
+        path = Path.polyline_from_points([Point(0, 0), Point(10, 0)])
+        self.assertAlmostEqual(path.length(), 10)
+        path.add_element(LineSegment(Point(10, 0), Point(20, 0)))
+        self.assertAlmostEqual(path.length(), 20)
+        self.assertPointAlmostEqual(path.point_at_offset(15), Point(15, 0))
+        path.replace_first_element(LineSegment(Point(5, 0), Point(10, 0)))
+        self.assertAlmostEqual(path.length(), 15)
+        self.assertPointAlmostEqual(path.point_at_offset(5), Point(10, 0))
+        path.simplify()
+        self.assertEqual(path.elements_count(), 1)
+        self.assertAlmostEqual(path.offset_for_point(Point(15, 0)), 10)
+        path.remove_first_element()
+        self.assertEqual(path.length(), 0)
+
+    def test_element_indexes_near_circle(self):
+        path = self._path()
+        self.assertEqual(path.element_indexes_near_circle(Circle(Point(0, 0), 1)), [0])
+        self.assertEqual(path.element_indexes_near_circle(Circle(Point(10, 0), 1)), [0, 1])
+        self.assertEqual(path.element_indexes_near_circle(Circle(Point(20, 15), 2)), [2])
+        self.assertEqual(path.element_indexes_near_circle(Circle(Point(100, 100), 5)), [])
+
+    def test_find_intersection(self):
+        path = self._path()
+        intersections = path.find_intersection(Circle(Point(20, 15), 2))
+        self.assertEqual(len(intersections), 2)
+        self.assertPointAlmostEqual(intersections[0], Point(20, 17))
+        self.assertPointAlmostEqual(intersections[1], Point(20, 13))
+        self.assertEqual(path.find_intersection(Circle(Point(100, 100), 5)), [])
+
+    def test_element_indexes_near_circle_are_updated_when_adding_elements(self):
+        path = self._path()
+        self.assertEqual(path.element_indexes_near_circle(Circle(Point(20, 30), 1)), [])
+        path.add_element(LineSegment(Point(20, 20), Point(20, 30)))
+        self.assertEqual(path.element_indexes_near_circle(Circle(Point(20, 30), 1)), [3])
+
+    def test_element_indexes_near_circle_in_long_path(self):
+        points = map(lambda index: Point(index * 10, (index % 2) * 10), range(1000))
+        path = Path.polyline_from_points(points)
+        self.assertEqual(path.element_indexes_near_circle(Circle(Point(5000, 5), 3)), [499, 500])
+        # Elements completely inside the circle can't intersect it
+        self.assertEqual(path.element_indexes_near_circle(Circle(Point(5000, 5), 30)), [496, 497, 502, 503])
+        self.assertEqual(path.element_indexes_near_circle(Circle(Point(5000, -5000), 1)), [])
+
+    def test_split_in_keeps_elements_not_split(self):
+        path = self._path()
+        arc_end_point = path.element_at(1).end_point()
+        waypoints = map(lambda point: Waypoint(None, point, 0, None),
+                        [Point(0, 0), Point(5, 0), Point(10, 0), arc_end_point, Point(20, 20)])
+        split_path = path.split_in(waypoints)
+        self.assertEqual(split_path.elements_count(), 4)
+        self.assertLineSegmentAlmostEqual(split_path.element_at(0), LineSegment(Point(0, 0), Point(5, 0)))
+        self.assertIs(split_path.element_at(2), path.element_at(1))
+        self.assertLineSegmentAlmostEqual(split_path.element_at(3), path.element_at(2))
+
+    def test_heading_at_point(self):
+        path = self._path()
+        self.assertAlmostEqual(path.heading_at_point(Point(5, 0)), 0)
+        self.assertAlmostEqual(path.heading_at_point(Point(10 + 10 * math.sin(math.pi / 4), 10 - 10 * math.cos(math.pi / 4))), 45)
+        self.assertAlmostEqual(path.heading_at_point(Point(20, 15)), 90)
@@ -16,6 +16,7 @@ limitations under the License.
 
 import unittest
 import math
+import pickle
 from geometry.point import Point
 
 
@@ -105,3 +106,25 @@ class PointTest(unittest.TestCase):
         # with negative angle
         self.assertEqual(Point(1, 1).angle(Point(1, -1)), -90)
         self.assertEqual(Point(-1, -1).angle(Point(-1, 1)), -90)
+
+    def test_almost_equal_to(self):
+        self.assertTrue(Point(1.0000001, 2, 3).almost_equal_to(Point(1, 2, 3), 5))
+        self.assertFalse(Point(1.0001, 2, 3).almost_equal_to(Point(1, 2, 3), 5))
+        self.assertFalse(Point(1, 2, 3.0001).almost_equal_to(Point(1, 2, 3), 5))
+
+    def test_hash(self):
+        point = Point(1, 2, 3)
+        self.assertEqual(hash(point), hash(Point(1.0, 2.0, 3.0)))
+        self.assertEqual(hash(point), hash(point))
+        self.assertEqual(len(set([point, Point(1, 2, 3), Point(3, 2, 1)])), 2)
+
+    def test_has_no_instance_dictionary(self):
+        self.assertFalse(hasattr(Point(1, 2), '__dict__'))
+
+    def test_pickle(self):
+        point = Point(1, 2, 3)
+        hash(point)
+        for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+            unpickled_point = pickle.loads(pickle.dumps(point, protocol))
+            self.assertEqual(unpickled_point, point)
+            self.assertEqual(hash(unpickled_point), hash(point))
@@ -78,3 +78,12 @@ class PolylineGeometryTest(CustomAssertionsMixin, unittest.TestCase):
         geometry = lane.path_for(PolylineGeometry)
         interpolation_points = geometry.line_interpolation_points()
         self.assertEquals(interpolation_points, points)
+
+    def test_intersections_around_road_node(self):
+        [a, b, c, d] = self._road_points()
+        lane = Street.from_control_points([a, b, c, d]).lane_at(0)
+        geometry = lane.geometry_for(PolylineGeometry)
+        intersections = geometry.intersections_around(lane.road_nodes()[2], 5)
+        self.assertEqual(len(intersections), 2)
+        self.assertPointAlmostEqual(intersections[0], Point(70, -50))
+        self.assertPointAlmostEqual(intersections[1], c + Point(5, 10).normalized() * 5)
@@ -16,6 +16,8 @@ limitations under the License.
 
 import unittest
 import textwrap
+import mock
+from StringIO import StringIO
 
 from geometry.point import Point
 from geometry.latlon import LatLon
@@ -23,6 +25,7 @@ from models.city import City
 from models.road import *
 from models.street import Street
 from models.trunk import Trunk
+from models.polyline_geometry import PolylineGeometry
 
 from generators.rndf_generator import RNDFGenerator
 
@@ -608,3 +611,50 @@ class RNDFGeneratorTest(unittest.TestCase):
         end_lane
         end_segment
         end_file""")
+
+    def test_recreated_waypoints_are_translated_again(self):
+        city = self.test_generator.simple_street_city()
+        generator = RNDFGenerator(city, LatLon(10, 65))
+        generator.start_document()
+        lane = city.roads[0].lanes()[0]
+        old_waypoints = generator.waypoints_for(lane)
+        pairs = generator.waypoints_with_latlons_for(lane)
+        self.assertEqual(map(lambda (waypoint, latlon): waypoint, pairs), old_waypoints)
+        # Replace the waypoints with new (equal) objects, moving one of them
+        lane.drop_geometry(PolylineGeometry)
+        new_waypoints = generator.waypoints_for(lane)
+        new_waypoints[0]._center = new_waypoints[0].center() + Point(1, 0)
+        pairs = generator.waypoints_with_latlons_for(lane)
+        for (waypoint, latlon), new_waypoint in zip(pairs, new_waypoints):
+            self.assertIs(waypoint, new_waypoint)
+            self.assertEqual(latlon, generator.translate_point(new_waypoint.center()))
+
+    def test_recreated_waypoints_are_mapped_to_the_same_ids(self):
+        city = self.test_generator.simple_street_city()
+        generator = RNDFGenerator(city, LatLon(10, 65))
+        generator.start_document()
+        lane = city.roads[0].lanes()[0]
+        old_ids = map(generator.id_mapper.id_for, generator.waypoints_for(lane))
+        lane.drop_geometry(PolylineGeometry)
+        new_waypoints = generator.waypoints_for(lane)
+        self.assertEqual(map(generator.id_mapper.id_for, new_waypoints), old_ids)
+        generator.id_mapper.forget_waypoints()
+        moved_waypoint = new_waypoints[0]
+        lane.drop_geometry(PolylineGeometry)
+        moved_waypoint._center = moved_waypoint.center() + Point(1, 0)
+        self.assertRaises(KeyError, generator.id_mapper.id_for, moved_waypoint)
+
+    def test_latlons_are_cached_per_lane_while_writing_the_road(self):
+        city = self.test_generator.simple_street_city()
+        generator = RNDFGenerator(city, LatLon(10, 65))
+        generator.document = StringIO()
+        generator.start_document()
+        road = city.roads[0]
+        lane = road.lanes()[0]
+        with mock.patch.object(generator.projector, 'to_latlons', wraps=generator.projector.to_latlons) as to_latlons:
+            pairs = generator.waypoints_with_latlons_for(lane)
+            self.assertEqual(generator.waypoints_with_latlons_for(lane), pairs)
+            self.assertEqual(to_latlons.call_count, 1)
+            generator.end_road(road)
+            self.assertEqual(generator.waypoints_with_latlons_for(lane), pairs)
+            self.assertEqual(to_latlons.call_count, 2)
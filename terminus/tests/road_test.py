@@ -280,3 +280,39 @@ class RoadTest(unittest.TestCase):
         self.assertEqual(road.nodes(), before_trim_expected_nodes)
         road.trim_redundant_nodes(45.0)
         self.assertEqual(road.nodes(), [RoadSimpleNode(Point(0, 0)), RoadSimpleNode(Point(200, 100))])
+
+    def test_includes_control_point(self):
+        road = Road.from_control_points([Point(0, 0), Point(100, 0), Point(200, 100)])
+        self.assertTrue(road.includes_control_point(Point(100, 0)))
+        self.assertTrue(road.includes_control_point(Point(100.000001, 0)))
+        self.assertFalse(road.includes_control_point(Point(100.0001, 0)))
+
+    def test_includes_control_point_after_trimming_nodes(self):
+        road = Road.from_control_points([Point(0, 0), Point(100, 0), Point(200, 0)])
+        road.trim_redundant_nodes()
+        self.assertFalse(road.includes_control_point(Point(100, 0)))
+        self.assertTrue(road.includes_control_point(Point(200, 0)))
+
+    def test_node_at_point(self):
+        road = Road.from_control_points([Point(0, 0), Point(100, 0), Point(200, 100)])
+        self.assertTrue(road.node_at_point(Point(100, 0)) is road.node_at(1))
+        # Within the control point tolerance, as includes_control_point
+        self.assertTrue(road.node_at_point(Point(100.000001, 0)) is road.node_at(1))
+        self.assertIsNone(road.node_at_point(Point(100.001, 0)))
+        road.reverse()
+        self.assertTrue(road.node_at_point(Point(0, 0)) is road.node_at(2))
+
+    def test_replace_node_at(self):
+        road = Road.from_control_points([Point(0, 0), Point(100, 0), Point(200, 100)])
+        new_node = RoadSimpleNode(Point(100, 10))
+        road.replace_node_at(Point(100, 0), new_node)
+        self.assertTrue(road.node_at(1) is new_node)
+        self.assertFalse(road.includes_control_point(Point(100, 0)))
+        self.assertTrue(road.node_at_point(Point(100, 10)) is new_node)
+
+    def test_replace_node_at_within_tolerance(self):
+        road = Road.from_control_points([Point(0, 0), Point(100, 0), Point(200, 100)])
+        new_node = RoadSimpleNode(Point(100.000001, 0))
+        road.replace_node_at(Point(100.000001, 0), new_node)
+        self.assertTrue(road.node_at(1) is new_node)
+        self.assertRaises(ValueError, road.replace_node_at, Point(150, 0), RoadSimpleNode(Point(150, 0)))
@@ -0,0 +1,102 @@
+"""
+Copyright (C) 2017 Open Source Robotics Foundation
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import unittest
+
+from geometry.point import Point
+from geometry.snapping_map import SnappingMap
+
+
+class SnappingMapTest(unittest.TestCase):
+
+    def test_invalid_tolerance(self):
+        with self.assertRaises(ValueError):
+            SnappingMap(0)
+
+    def test_empty(self):
+        snapping_map = SnappingMap(0.1)
+        self.assertEqual(len(snapping_map), 0)
+        self.assertIsNone(snapping_map.get(Point(0, 0)))
+        self.assertFalse(Point(0, 0) in snapping_map)
+        with self.assertRaises(KeyError):
+            snapping_map[Point(0, 0)]
+
+    def test_matches_points_within_tolerance(self):
+        snapping_map = SnappingMap(0.1)
+        snapping_map[Point(1, 1, 1)] = 'a'
+        self.assertEqual(snapping_map[Point(1, 1, 1)], 'a')
+        self.assertEqual(snapping_map[Point(1.09, 0.91, 1.05)], 'a')
+        self.assertFalse(Point(1.11, 1, 1) in snapping_map)
+        self.assertFalse(Point(1, 1, 0.8) in snapping_map)
+
+    def test_matches_points_across_rounding_boundaries(self):
+        snapping_map = SnappingMap(1e-5)
+        snapping_map[Point(0.000004, 0)] = 'a'
+        self.assertNotEqual(Point(0.000004, 0).rounded_to(5), Point(0.000006, 0).rounded_to(5))
+        self.assertEqual(snapping_map.get(Point(0.000006, 0)), 'a')
+
+    def test_answers_closest_match(self):
+        snapping_map = SnappingMap(1)
+        snapping_map[Point(0, 0)] = 'a'
+        snapping_map[Point(3, 0)] = 'b'
+        snapping_map[Point(1.6, 0)] = 'c'
+        self.assertEqual(snapping_map[Point(1, 0)], 'c')
+        self.assertEqual(snapping_map[Point(0.7, 0)], 'a')
+        self.assertEqual(snapping_map[Point(2.4, 0)], 'b')
+
+    def test_set_replaces_value_of_matching_entry(self):
+        snapping_map = SnappingMap(0.1)
+        snapping_map[Point(0, 0)] = 'a'
+        snapping_map[Point(0.05, 0)] = 'b'
+        self.assertEqual(len(snapping_map), 1)
+        self.assertEqual(snapping_map.keys(), [Point(0, 0)])
+        self.assertEqual(snapping_map[Point(0, 0)], 'b')
+        self.assertEqual(snapping_map.key_for(Point(0.05, 0)), Point(0, 0))
+
+    def test_keeps_insertion_order(self):
+        snapping_map = SnappingMap(0.1)
+        points = [Point(5, 0), Point(-3, 2), Point(0, 0), Point(10, 10, 10)]
+        for index, point in enumerate(points):
+            snapping_map[point] = index
+        snapping_map[Point(-3, 2)] = 'x'
+        self.assertEqual(snapping_map.keys(), points)
+        self.assertEqual(list(snapping_map), points)
+        self.assertEqual(snapping_map.values(), [0, 'x', 2, 3])
+        self.assertEqual(snapping_map.items()[1], (Point(-3, 2), 'x'))
+
+    def test_setdefault(self):
+        snapping_map = SnappingMap(0.1)
+        snapping_map.setdefault(Point(0, 0), []).append(1)
+        snapping_map.setdefault(Point(0.01, 0), []).append(2)
+        self.assertEqual(snapping_map.values(), [[1, 2]])
+
+    def test_pop(self):
+        snapping_map = SnappingMap(0.1)
+        snapping_map[Point(0, 0)] = 'a'
+        snapping_map[Point(1, 0)] = 'b'
+        self.assertEqual(snapping_map.pop(Point(0.01, 0)), 'a')
+        self.assertEqual(snapping_map.pop(Point(0, 0), None), None)
+        with self.assertRaises(KeyError):
+            snapping_map.pop(Point(0, 0))
+        del snapping_map[Point(1, 0)]
+        self.assertEqual(len(snapping_map), 0)
+
+    def test_finds_points_in_the_middle_of_a_cell(self):
+        # Rounding the bounds around these coordinates skips the cell they
+        # are in
+        snapping_map = SnappingMap(1e-5)
+        snapping_map[Point(200.07243, 198.858663)] = 'a'
+        self.assertEqual(snapping_map.get(Point(200.07243, 198.858663)), 'a')
@@ -0,0 +1,161 @@
+"""
+Copyright (C) 2017 Open Source Robotics Foundation
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+import os
+import shutil
+import tempfile
+import unittest
+
+from builders.osm_city_builder import OsmCityBuilder
+from builders.tiled_osm_city_builder import TiledOsmCityBuilder
+
+
+class TiledOsmCityBuilderTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.osm_map = self._grid_map()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _node_id(self, row, column):
+        return row * 6 + column + 1
+
+    def _way(self, way_id, node_ids, highway, oneway=None):
+        refs = ''.join('<nd ref="%d"/>' % node_id for node_id in node_ids)
+        tags = '<tag k="highway" v="%s"/>' % highway
+        if oneway is not None:
+            tags += '<tag k="oneway" v="%s"/>' % oneway
+        return '<way id="%d">%s%s</way>\n' % (way_id, refs, tags)
+
+    def _grid_map(self):
+        # A 6x6 grid of nodes, with the first and last rows and columns
+        # outside the map bounds
+        path = os.path.join(self.directory, 'map.osm')
+        with open(path, 'w') as osm_file:
+            osm_file.write('<?xml version="1.0" encoding="UTF-8"?>\n<osm version="0.6">\n')
+            osm_file.write('<bounds minlat="10.0" minlon="65.0" maxlat="10.02" maxlon="65.02"/>\n')
+            for row in range(6):
+                for column in range(6):
+                    osm_file.write('<node id="%d" lat="%.4f" lon="%.4f"/>\n' %
+                                   (self._node_id(row, column), 9.995 + 0.006 * row, 64.995 + 0.006 * column))
+            way_id = 100
+            for row in range(1, 5):
+                nodes = [self._node_id(row, column) for column in range(1, 5)]
+                osm_file.write(self._way(way_id, nodes, 'residential'))
+                way_id += 1
+            for column in range(1, 5):
+                nodes = [self._node_id(row, column) for row in range(1, 5)]
+                osm_file.write(self._way(way_id, nodes, 'primary'))
+                way_id += 1
+            # A road that goes outside the bounds and back in
+            nodes = [self._node_id(2, 2), self._node_id(2, 0), self._node_id(3, 0), self._node_id(3, 3)]
+            osm_file.write(self._way(way_id, nodes, 'secondary'))
+            # Ignored by the default way filter
+            nodes = [self._node_id(1, 1), self._node_id(4, 4)]
+            osm_file.write(self._way(way_id + 1, nodes, 'footway'))
+            # A road of its own nodes, between the second and third rows,
+            # that crosses the middle of the map between two of them
+            for index, column in enumerate([1.5, 2.2, 2.8, 3.5]):
+                osm_file.write('<node id="%d" lat="%.4f" lon="%.4f"/>\n' %
+                               (1000 + index, 9.995 + 0.006 * (2.5 + 0.1 * index), 64.995 + 0.006 * column))
+            osm_file.write(self._way(way_id + 2, range(1000, 1004), 'tertiary'))
+            # One way roads given in reversed order: one across the tiles
+            # and one that goes outside the bounds and back in
+            nodes = [self._node_id(index, index) for index in range(1, 5)]
+            osm_file.write(self._way(way_id + 3, nodes, 'residential', '-1'))
+            nodes = [self._node_id(4, 2), self._node_id(4, 0), self._node_id(1, 0), self._node_id(1, 2)]
+            osm_file.write(self._way(way_id + 4, nodes, 'residential', 'reverse'))
+            osm_file.write('</osm>\n')
+        return path
+
+    def _describe(self, city):
+        roads = []
+        for road in city.roads:
+            nodes = [(node.center.to_tuple(), node.is_intersection()) for node in road.nodes()]
+            roads.append((road.__class__.__name__, road.name, nodes))
+        intersections = []
+        for node in city.intersections.values():
+            names = sorted(road.name for road in city.roads if any(road_node is node for road_node in road.nodes()))
+            intersections.append((node.center.to_tuple(), names))
+        return roads, sorted(intersections)
+
+    def test_same_city_as_monolithic_build(self):
+        expected = self._describe(OsmCityBuilder(self.osm_map).get_city())
+        for tiles in [1, 2, 3]:
+            city = TiledOsmCityBuilder(self.osm_map, tiles=tiles, workers=1).get_city()
+            self.assertEqual(self._describe(city), expected)
+
+    def test_same_city_with_worker_processes(self):
+        expected = self._describe(OsmCityBuilder(self.osm_map).get_city())
+        city = TiledOsmCityBuilder(self.osm_map, tiles=3, workers=2).get_city()
+        self.assertEqual(self._describe(city), expected)
+
+    def test_pieces_belong_to_the_tile_of_their_first_node(self):
+        builder = TiledOsmCityBuilder(self.osm_map, tiles=2, workers=1)
+        builder.get_city()
+        refs = builder.osm_ways.refs().tolist()
+        pieces_by_tile = [indexes.tolist() for indexes in builder._pieces_by_tile]
+        self.assertEqual(sorted(sum(pieces_by_tile, [])), range(len(builder._piece_ways)))
+        for tile, indexes in enumerate(pieces_by_tile):
+            for index in indexes:
+                first_id = refs[builder._piece_starts[index]]
+                if first_id > 36:
+                    continue
+                # Rows and columns 1 and 2 are in the first half of the map
+                row, column = divmod(first_id - 1, 6)
+                self.assertEqual((row > 2) * 2 + (column > 2), tile)
+
+    def test_ways_crossing_tile_borders(self):
+        expected = self._describe(OsmCityBuilder(self.osm_map).get_city())
+        builder = TiledOsmCityBuilder(self.osm_map, tiles=2, workers=1)
+        city = builder.get_city()
+        self.assertEqual(self._describe(city), expected)
+        tasks = list(builder._tile_tasks())
+        way_ids = builder.osm_ways.ids().tolist()
+        # The first row is split at each intersection, and its pieces are
+        # stitched back in a single road
+        self.assertEqual(len(filter(lambda road: road.name.startswith('OSM_100'), city.roads)), 1)
+        row_tiles = [tile for tile, (_, pieces, _) in enumerate(tasks) for index, _, _ in pieces
+                     if builder._piece_ways[index] == way_ids.index(100)]
+        self.assertEqual(row_tiles, [0, 0, 1])
+        # The road crossing the middle of the map without intersections is
+        # a single piece, built along with its nodes past the tile border
+        crossing_pieces = [(tile, coordinates) for tile, (_, pieces, _) in enumerate(tasks)
+                           for index, _, coordinates in pieces if builder._piece_ways[index] == way_ids.index(110)]
+        self.assertEqual(len(crossing_pieces), 1)
+        tile, coordinates = crossing_pieces[0]
+        self.assertEqual(tile, 0)
+        self.assertEqual(len(coordinates), 4)
+        middle_x = builder.bounding_box.origin.x + builder.bounding_box.corner.x
+        self.assertTrue(coordinates[0][0] < middle_x / 2 < coordinates[-1][0])
+
+    def test_reversed_one_way_ways(self):
+        expected = self._describe(OsmCityBuilder(self.osm_map).get_city())
+        city = TiledOsmCityBuilder(self.osm_map, tiles=2, workers=1).get_city()
+        self.assertEqual(self._describe(city), expected)
+        roads = dict((road.name, road) for road in city.roads)
+        # The diagonal is split in the three tiles it goes through and
+        # stitched back, from its last node to its first one
+        diagonal = roads['OSM_111']
+        self.assertEqual(diagonal.node_count(), 4)
+        self.assertTrue(diagonal.nodes()[0].center.x > diagonal.nodes()[-1].center.x)
+        self.assertTrue(diagonal.nodes()[0].center.y > diagonal.nodes()[-1].center.y)
+        # Each time the other one goes in the map makes a reversed road,
+        # in the order of the way
+        self.assertTrue(roads['OSM_112_A'].nodes()[0].center.x < roads['OSM_112_A'].nodes()[-1].center.x)
+        self.assertTrue(roads['OSM_112_B'].nodes()[0].center.x > roads['OSM_112_B'].nodes()[-1].center.x)
+        self.assertTrue(roads['OSM_112_A'].nodes()[0].center.y > roads['OSM_112_B'].nodes()[0].center.y)
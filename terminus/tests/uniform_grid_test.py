@@ -0,0 +1,73 @@
+"""
+Copyright (C) 2017 Open Source Robotics Foundation
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import unittest
+
+from geometry.point import Point
+from geometry.bounding_box import BoundingBox
+from geometry.uniform_grid import UniformGrid
+
+
+class UniformGridTest(unittest.TestCase):
+
+    def _grid(self):
+        items = ['a', 'b', 'c', 'd']
+        boxes = [
+            BoundingBox(Point(0, 0), Point(5, 5)),
+            BoundingBox(Point(8, 8), Point(30, 9)),
+            BoundingBox(Point(-20, -20), Point(-15, -12)),
+            BoundingBox(Point(4, 4), Point(6, 6))
+        ]
+        return UniformGrid.from_items(items, boxes, 10)
+
+    def test_invalid_cell_size(self):
+        with self.assertRaises(ValueError):
+            UniformGrid(0)
+
+    def test_cell_size_for(self):
+        self.assertEqual(UniformGrid.cell_size_for([]), 1.0)
+        boxes = [BoundingBox(Point(0, 0), Point(5, 5)), BoundingBox(Point(8, 8), Point(30, 9))]
+        self.assertEqual(UniformGrid.cell_size_for(boxes), 13.5)
+        self.assertEqual(UniformGrid.cell_size_for([BoundingBox(Point(0, 0), Point(0.1, 0.2))]), 1.0)
+
+    def test_items_count(self):
+        grid = self._grid()
+        self.assertEqual(len(grid), 4)
+        self.assertEqual(grid.items(), ['a', 'b', 'c', 'd'])
+
+    def test_items_in_box(self):
+        grid = self._grid()
+        self.assertEqual(grid.items_in_box(BoundingBox(Point(1, 1), Point(2, 2))), ['a'])
+        self.assertEqual(grid.items_in_box(BoundingBox(Point(3, 3), Point(25, 25))), ['a', 'b', 'd'])
+        self.assertEqual(grid.items_in_box(BoundingBox(Point(-30, -30), Point(-19, -19))), ['c'])
+        self.assertEqual(grid.items_in_box(BoundingBox(Point(50, 50), Point(60, 60))), [])
+
+    def test_items_in_box_filters_items_in_same_cell(self):
+        grid = self._grid()
+        self.assertEqual(grid.items_in_box(BoundingBox(Point(7, 1), Point(9, 2))), [])
+
+    def test_items_near(self):
+        grid = self._grid()
+        self.assertEqual(grid.items_near(Point(7, 7), 1), ['b', 'd'])
+        self.assertEqual(grid.items_near(Point(29, 12), 2), [])
+        self.assertEqual(grid.items_near(Point(29, 12), 3), ['b'])
+
+    def test_items_in_huge_box(self):
+        grid = UniformGrid.from_items(['a', 'b'], [BoundingBox(Point(0, 0), Point(1, 1)),
+                                                   BoundingBox(Point(1e6, 1e6), Point(1e6 + 1, 1e6 + 1))], 0.5)
+        huge_box = BoundingBox(Point(-1e9, -1e9), Point(1e9, 1e9))
+        self.assertEqual(grid.items_in_box(huge_box), ['a', 'b'])
+        self.assertEqual(grid.items_in_box(BoundingBox(Point(-1e9, -1e9), Point(2, 2))), ['a'])
@@ -0,0 +1,72 @@
+"""
+Copyright (C) 2017 Open Source Robotics Foundation
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import unittest
+
+from geometry.point import Point
+from geometry.line_segment import LineSegment
+from models.waypoint import Waypoint
+from models.waypoint_connection import WaypointConnection
+
+
+class WaypointTest(unittest.TestCase):
+
+    def setUp(self):
+        self.waypoint = Waypoint(object(), Point(0, 0), 0, None)
+
+    def _connection_to(self, point):
+        other = Waypoint(object(), point, 0, None)
+        return WaypointConnection(self.waypoint, other, LineSegment(Point(0, 0), point))
+
+    def _connection_from(self, point):
+        other = Waypoint(object(), point, 0, None)
+        return WaypointConnection(other, self.waypoint, LineSegment(point, Point(0, 0)))
+
+    def test_no_connections(self):
+        self.assertFalse(self.waypoint.is_exit())
+        self.assertFalse(self.waypoint.is_entry())
+        self.assertFalse(self.waypoint.is_intersection())
+        self.assertEqual(self.waypoint.in_connections(), [])
+        self.assertEqual(self.waypoint.out_connections(), [])
+
+    def test_out_connections_are_sorted_by_distance(self):
+        far = self._connection_to(Point(10, 0))
+        near = self._connection_to(Point(0, 1))
+        same_as_near = self._connection_to(Point(1, 0))
+        for connection in [far, near, same_as_near]:
+            self.waypoint.add_out_connection(connection)
+        self.assertTrue(self.waypoint.is_exit())
+        self.assertFalse(self.waypoint.is_entry())
+        self.assertEqual(self.waypoint.out_connections(), [near, same_as_near, far])
+
+    def test_in_connections_are_sorted_by_distance(self):
+        far = self._connection_from(Point(-10, 0))
+        near = self._connection_from(Point(-1, 0))
+        self.waypoint.add_in_connection(far)
+        self.waypoint.add_in_connection(near)
+        self.assertTrue(self.waypoint.is_entry())
+        self.assertEqual(self.waypoint.in_connections(), [near, far])
+
+    def test_remove_connections(self):
+        near = self._connection_to(Point(1, 0))
+        far = self._connection_to(Point(10, 0))
+        self.waypoint.add_out_connection(far)
+        self.waypoint.add_out_connection(near)
+        self.waypoint.remove_out_connection(near)
+        self.assertEqual(self.waypoint.out_connections(), [far])
+        self.waypoint.remove_out_connection(far)
+        self.assertFalse(self.waypoint.is_exit())
+        self.assertEqual(self.waypoint.out_connections(), [])